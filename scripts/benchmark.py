@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Offline benchmark of setup.py and update.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : benchmark.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Generates a git server of local bare repositories with a
+#               configurable number of layers, branches, tags and commits, a copy
+#               of this MSC-LDK with matching layers-*.csv and bsp-mapping.csv,
+#               and times the setup.py and update.py runs against it. No network
+#               access is needed. The results are written as JSON, so the runs
+#               of different MSC-LDK commits can be compared (--compare).
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import configparser
+import datetime
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+MSC_LDK_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+BENCHMARK_BSP = "09999"
+BENCHMARK_BSP_NAME = "Benchmark"
+BENCHMARK_VARIANT = "64"
+BENCHMARK_LAYER_FILE = "bench"
+
+# The layers of the snapshot used by the version_file step are pinned to this tag (one commit before the branch head)
+PIN_TAG = "BENCH_PIN"
+
+# Commit dates of the generated repositories, fixed so the same parameters always give the same SHA1s
+COMMIT_TIME_BASE = 1467331200
+COMMITTER = "MSC-LDK Benchmark <benchmark@localhost>"
+
+# The steps of one repetition, in the order they are run
+STEPS = ["setup_fresh", "setup_unchanged", "re_create_conf", "show_layer_info", "write_snapshot",
+         "version_file", "update", "update_unchanged", "setup_fresh_cached"]
+
+def run_git(args, cwd=None, input_data=None):
+    """Runs git, returns its output (bytes). Raises subprocess.CalledProcessError on failure."""
+    return subprocess.run(["git"] + args, cwd=cwd, input=input_data, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, check=True).stdout
+
+class FastImportStream(object):
+    """Builds the input of 'git fast-import' for one repository."""
+    def __init__(self):
+        self.chunks = []
+        self.mark_count = 0
+        self.commit_time = COMMIT_TIME_BASE
+
+    def add_data(self, data):
+        data = data.encode("utf-8")
+        self.chunks.append(b"data %d\n" % len(data))
+        self.chunks.append(data + b"\n")
+
+    def add_commit(self, ref, message, files, parent=None):
+        """Adds a commit of files ({path: content}) to ref, returns its mark."""
+        self.mark_count += 1
+        self.commit_time += 60
+        self.chunks.append(("commit %s\nmark :%d\ncommitter %s %d +0000\n" % (ref, self.mark_count, COMMITTER, self.commit_time)).encode("utf-8"))
+        self.add_data(message)
+        if parent is not None:
+            self.chunks.append(("from %s\n" % parent).encode("utf-8"))
+        for path, content in sorted(files.items()):
+            self.chunks.append(("M 644 inline %s\n" % path).encode("utf-8"))
+            self.add_data(content)
+        self.chunks.append(b"\n")
+        return ":%d" % self.mark_count
+
+    def add_ref(self, ref, commit):
+        self.chunks.append(("reset %s\nfrom %s\n\n" % (ref, commit)).encode("utf-8"))
+
+    def get_bytes(self):
+        return b"".join(self.chunks)
+
+def get_spread(count, length):
+    """Returns count indexes in range(length), spread evenly."""
+    if count <= 0 or length <= 0:
+        return []
+    return [index * length // count for index in range(count)]
+
+def get_layer_conf(layer_name):
+    return """# Generated by benchmark.py
+BBPATH .= ":${LAYERDIR}"
+BBFILES += "${LAYERDIR}/recipes-*/*/*.bb"
+BBFILE_COLLECTIONS += "%(name)s"
+BBFILE_PATTERN_%(name)s = "^${LAYERDIR}/"
+BBFILE_PRIORITY_%(name)s = "6"
+""" % {"name": layer_name}
+
+def create_repository(repo_dir, initial_files, branch, args):
+    """Creates the bare repository repo_dir with args.history_depth commits on branch and master,
+    args.branches - 2 further branches, args.tags tags and the tag PIN_TAG.
+    """
+    stream = FastImportStream()
+    history = [stream.add_commit("refs/heads/master", "Initial commit", initial_files)]
+    for index in range(1, max(args.history_depth, 2)):
+        # The files are rewritten round robin, so the tree grows up to args.files files
+        file_name = "recipes-bench/bench/bench-%d.bb" % (index % args.files)
+        history.append(stream.add_commit("refs/heads/master", "Change %d" % index,
+                                         {file_name: 'SUMMARY = "Benchmark recipe"\nPR = "r%d"\n' % index}))
+    stream.add_ref("refs/heads/%s" % branch, history[-1])
+    for index, position in enumerate(get_spread(args.branches - 2, len(history))):
+        branch_ref = "refs/heads/bench-branch-%d" % index
+        stream.add_commit(branch_ref, "Work on branch %d" % index, {"branch-%d.txt" % index: "%d\n" % index}, history[position])
+    for index, position in enumerate(get_spread(args.tags, len(history))):
+        stream.add_ref("refs/tags/BENCH_%d" % index, history[position])
+    stream.add_ref("refs/tags/%s" % PIN_TAG, history[-2])
+    os.makedirs(repo_dir)
+    run_git(["init", "--bare", "--quiet"], cwd=repo_dir)
+    run_git(["fast-import", "--quiet"], cwd=repo_dir, input_data=stream.get_bytes())
+    run_git(["symbolic-ref", "HEAD", "refs/heads/master"], cwd=repo_dir)
+
+def add_upstream_commit(repo_dir, branch, number):
+    """Adds a commit to branch of the bare repository repo_dir, returns the previous SHA1 of branch."""
+    old_sha1 = run_git(["rev-parse", "refs/heads/%s" % branch], cwd=repo_dir).decode().strip()
+    stream = FastImportStream()
+    stream.commit_time += 10 ** 8 + number * 60
+    stream.add_commit("refs/heads/%s" % branch, "Upstream change %d" % number, {"upstream.txt": "%d\n" % number}, old_sha1)
+    run_git(["fast-import", "--quiet", "--force"], cwd=repo_dir, input_data=stream.get_bytes())
+    return old_sha1
+
+class Workspace(object):
+    """The generated git server, the copy of MSC-LDK and the home directory of one benchmark run."""
+    def __init__(self, work_dir, args):
+        self.work_dir = os.path.abspath(work_dir)
+        self.args = args
+        self.server_dir = os.path.join(self.work_dir, "server")
+        self.msc_ldk_dir = os.path.join(self.work_dir, "msc-ldk")
+        self.home_dir = os.path.join(self.work_dir, "home")
+        self.log_dir = os.path.join(self.work_dir, "logs")
+        with open(os.path.join(MSC_LDK_ROOT, "scripts", "based_on_yocto.txt")) as f:
+            self.layer_branch = f.read().strip() + "-msc"
+        self.layer_repos = []
+        # (repo, subdir) of the generated layers, the first half goes into layers-core.csv, the rest into layers-bench.csv
+        self.layer_entries = []
+
+    def get_env(self):
+        """Returns the environment of the setup.py and update.py runs: everything is fetched from the generated server."""
+        env = dict(os.environ)
+        for name in ["MSC_LDK_SSTATE_MIRROR", "GIT_DIR", "GIT_WORK_TREE"]:
+            env.pop(name, None)
+        env.update({"HOME": self.home_dir,
+                    "MSC_GIT_SERVER": self.server_dir + "/",
+                    # The scripts are timed past their "MSC-LDK has been moved" stop
+                    "MSC_LDK_IGNORE_MOVED": "1",
+                    # setup_fresh_cached measures the clones from the git object cache
+                    "MSC_LDK_GIT_OBJECT_CACHE": os.path.join(self.home_dir, ".cache", "msc-ldk", "git"),
+                    "GIT_CONFIG_NOSYSTEM": "1",
+                    # Anything that is not a local repository fails immediately instead of going to the network
+                    "GIT_ALLOW_PROTOCOL": "file",
+                    "GIT_TERMINAL_PROMPT": "0",
+                    "GIT_AUTHOR_NAME": "MSC-LDK Benchmark", "GIT_AUTHOR_EMAIL": "benchmark@localhost",
+                    "GIT_COMMITTER_NAME": "MSC-LDK Benchmark", "GIT_COMMITTER_EMAIL": "benchmark@localhost"})
+        return env
+
+    def create(self, msc_boost_python_repo):
+        for directory in [self.server_dir, self.home_dir, self.log_dir]:
+            os.makedirs(directory)
+        self.create_layer_repositories()
+        self.create_msc_boost_python_repository(msc_boost_python_repo)
+        self.create_msc_ldk_copy()
+
+    def create_layer_repositories(self):
+        args = self.args
+        yocto_subdirs = ["meta", "meta-yocto", "meta-yocto-bsp"]
+        create_repository(os.path.join(self.server_dir, "3rdparty", "yocto"),
+                          dict(("%s/conf/layer.conf" % subdir, get_layer_conf(subdir.replace("-", "_"))) for subdir in yocto_subdirs),
+                          self.layer_branch, args)
+        self.layer_repos.append("3rdparty/yocto")
+        for layer_index in range(args.layers):
+            repo = "bench/meta-bench-%03d" % layer_index
+            if args.sublayers > 1:
+                subdirs = ["meta-bench-%03d-%d" % (layer_index, sublayer_index) for sublayer_index in range(args.sublayers)]
+            else:
+                subdirs = [""]
+            files = dict((os.path.join(subdir, "conf", "layer.conf"), get_layer_conf("bench_%03d_%d" % (layer_index, subdir_index)))
+                         for subdir_index, subdir in enumerate(subdirs))
+            create_repository(os.path.join(self.server_dir, repo), files, self.layer_branch, args)
+            self.layer_repos.append(repo)
+            self.layer_entries.extend((repo, subdir) for subdir in subdirs)
+        bsp_files = {"conf/local-32.conf": 'MACHINE ?= "genericx86"\n',
+                     "conf/local-64.conf": 'MACHINE ?= "genericx86-64"\n',
+                     "meta/conf/layer.conf": get_layer_conf("bench_bsp"),
+                     "layers-bsp.csv": "# Relative GIT Repository,Layer subdirectory in repository,Tag/Branch to checkout in develop MSC-LDK branch\n"}
+        bsp_repo = "msc/%s/msc-ldk-bsp-recipes" % BENCHMARK_BSP
+        create_repository(os.path.join(self.server_dir, bsp_repo), bsp_files, self.layer_branch, args)
+        self.layer_repos.append(bsp_repo)
+
+    def create_msc_boost_python_repository(self, msc_boost_python_repo):
+        """Mirrors libMscBoostPython to the generated server, setup.py bootstraps it from there."""
+        repo_dir = os.path.join(self.server_dir, "msc", "0000", "libMscBoostPython")
+        os.makedirs(repo_dir)
+        run_git(["init", "--bare", "--quiet"], cwd=repo_dir)
+        # The branches of a clone are remote branches, they become branches on the server again
+        refspecs = {}
+        refs = run_git(["for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes/origin"], cwd=msc_boost_python_repo).decode().split()
+        for ref in refs:
+            branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref[len("refs/remotes/origin/"):]
+            if branch != "HEAD" and (branch not in refspecs or ref.startswith("refs/remotes/")):
+                refspecs[branch] = "+%s:refs/heads/%s" % (ref, branch)
+        run_git(["fetch", "--quiet", os.path.abspath(msc_boost_python_repo), "+refs/tags/*:refs/tags/*"] + sorted(refspecs.values()), cwd=repo_dir)
+        run_git(["symbolic-ref", "HEAD", "refs/heads/master"], cwd=repo_dir)
+
+    def create_msc_ldk_copy(self):
+        """Copies the tracked files of this MSC-LDK (including uncommitted changes) and replaces the layer .csv files."""
+        # Untracked files are not copied, sources/ and build/ of this MSC-LDK are not in .gitignore
+        files = run_git(["ls-files", "-z"], cwd=MSC_LDK_ROOT).decode().split("\0")
+        for file_name in files:
+            source = os.path.join(MSC_LDK_ROOT, file_name)
+            if not file_name or not os.path.lexists(source) or os.path.isdir(source):
+                continue
+            target = os.path.join(self.msc_ldk_dir, file_name)
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            shutil.copy2(source, target, follow_symlinks=False)
+        scripts_dir = os.path.join(self.msc_ldk_dir, "scripts")
+        for file_name in os.listdir(scripts_dir):
+            if file_name.startswith("layers-") and file_name.endswith(".csv"):
+                os.unlink(os.path.join(scripts_dir, file_name))
+        core_count = (len(self.layer_entries) + 1) // 2
+        with open(os.path.join(scripts_dir, "layers-core.csv"), "w") as f:
+            print("Relative GIT Repository,Layer subdirectory in repository,Tag/Branch to checkout in develop MSC-LDK branch", file=f)
+            print("3rdparty/yocto,meta,", file=f)
+            for repo, subdir in self.layer_entries[:core_count]:
+                print("%s,%s," % (repo, subdir), file=f)
+        with open(os.path.join(scripts_dir, "layers-%s.csv" % BENCHMARK_LAYER_FILE), "w") as f:
+            print("# Description: Generated benchmark layers", file=f)
+            print("# Relative GIT Repository,Layer subdirectory in repository,Tag/Branch to checkout in develop MSC-LDK branch", file=f)
+            for repo, subdir in self.layer_entries[core_count:]:
+                print("%s,%s," % (repo, subdir), file=f)
+        with open(os.path.join(scripts_dir, "bsp-mapping.csv"), "w") as f:
+            print("%s,%s" % (BENCHMARK_BSP, BENCHMARK_BSP_NAME), file=f)
+        # The copy is a clone of the server repository msc-ldk, so update.py can fetch it
+        env = self.get_env()
+        subprocess.run(["git", "init", "--quiet"], cwd=self.msc_ldk_dir, env=env, check=True)
+        subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/master"], cwd=self.msc_ldk_dir, env=env, check=True)
+        with open(os.path.join(self.msc_ldk_dir, ".git", "info", "exclude"), "a") as f:
+            f.write("sources\nbuild\nscripts/MscBoost\nscripts/libMscBoostPython.git\nMSC-LDK.default-config\n__pycache__\n*.snapshot\n")
+        subprocess.run(["git", "add", "-A"], cwd=self.msc_ldk_dir, env=env, check=True)
+        subprocess.run(["git", "commit", "--quiet", "-m", "MSC-LDK benchmark copy"], cwd=self.msc_ldk_dir, env=env, check=True)
+        server_msc_ldk = os.path.join(self.server_dir, "msc-ldk")
+        subprocess.run(["git", "clone", "--quiet", "--bare", self.msc_ldk_dir, server_msc_ldk], env=env, check=True)
+        subprocess.run(["git", "remote", "add", "origin", server_msc_ldk], cwd=self.msc_ldk_dir, env=env, check=True)
+        subprocess.run(["git", "fetch", "--quiet", "origin"], cwd=self.msc_ldk_dir, env=env, check=True)
+        subprocess.run(["git", "branch", "--quiet", "--set-upstream-to=origin/master"], cwd=self.msc_ldk_dir, env=env, check=True)
+
+    def clean(self, keep_git_cache):
+        """Removes everything created by setup.py, the git object cache only when keep_git_cache is False."""
+        for name in ["sources", "build", "MSC-LDK.default-config"]:
+            path = os.path.join(self.msc_ldk_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.unlink(path)
+        git_cache = os.path.join(self.home_dir, ".cache", "msc-ldk")
+        if not keep_git_cache and os.path.isdir(git_cache):
+            shutil.rmtree(git_cache)
+
+class Benchmark(object):
+    """Runs the steps and collects their durations."""
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.env = workspace.get_env()
+        self.durations = dict((step, []) for step in STEPS)
+        self.failures = dict((step, 0) for step in STEPS)
+
+    def run_script(self, script, script_args, log_file_name):
+        """Runs scripts/<script> with script_args in the MSC-LDK copy, returns (exit code, duration)."""
+        cmd = [sys.executable, os.path.join(self.workspace.msc_ldk_dir, "scripts", script)] + script_args
+        with open(log_file_name, "w") as log_file:
+            print("$ %s" % " ".join(cmd), file=log_file, flush=True)
+            start_time = time.perf_counter()
+            returncode = subprocess.call(cmd, cwd=self.workspace.msc_ldk_dir, env=self.env, stdin=subprocess.DEVNULL,
+                                         stdout=log_file, stderr=subprocess.STDOUT)
+            return returncode, time.perf_counter() - start_time
+
+    def run_step(self, step, repetition, script, script_args):
+        """Runs scripts/<script> and records the duration of step."""
+        log_file_name = os.path.join(self.workspace.log_dir, "%d-%s.log" % (repetition, step))
+        returncode, duration = self.run_script(script, script_args, log_file_name)
+        if returncode == 0:
+            self.durations[step].append(duration)
+            print("  %-20s %8.2fs" % (step, duration))
+        else:
+            self.failures[step] += 1
+            print("  %-20s   FAILED (exit code %d, see %s)" % (step, returncode, log_file_name))
+        return returncode == 0
+
+    def skip_step(self, step, reason):
+        self.failures[step] += 1
+        print("  %-20s   SKIPPED (%s)" % (step, reason))
+
+    def pin_snapshot(self, snapshot_file_name):
+        """Moves all layers except MSC-LDK in the snapshot to PIN_TAG, so the version_file step has to switch them."""
+        snapshot = configparser.ConfigParser()
+        snapshot.read(snapshot_file_name)
+        for layer in snapshot.sections():
+            if layer in ("general", "msc-ldk"):
+                continue
+            repo_dir = os.path.join(self.workspace.msc_ldk_dir, "sources", layer)
+            snapshot[layer]["sha1"] = run_git(["rev-parse", "%s^{commit}" % PIN_TAG], cwd=repo_dir).decode().strip()
+        with open(snapshot_file_name, "w") as f:
+            snapshot.write(f)
+
+    def run_bootstrap(self):
+        """The first setup.py run clones libMscBoostPython from the generated server (not timed), returns False when it fails."""
+        log_file_name = os.path.join(self.workspace.log_dir, "0-bootstrap.log")
+        returncode, duration = self.run_script("setup.py", ["--help"], log_file_name)
+        if returncode != 0:
+            print("ERROR: 'setup.py --help' failed in the MSC-LDK copy (exit code %d):" % returncode, file=sys.stderr)
+            with open(log_file_name, errors="replace") as log_file:
+                sys.stderr.write("".join(log_file.readlines()[-20:]))
+            return False
+        return True
+
+    def run_repetition(self, repetition):
+        setup_args = ["--bsp", BENCHMARK_BSP, "--variant", BENCHMARK_VARIANT, "--layers-%s" % BENCHMARK_LAYER_FILE]
+        self.workspace.clean(keep_git_cache=False)
+        self.run_step("setup_fresh", repetition, "setup.py", setup_args)
+        self.run_step("setup_unchanged", repetition, "setup.py", setup_args)
+        self.run_step("re_create_conf", repetition, "setup.py", setup_args + ["--re-create-conf"])
+        # Without --re-create-conf, setup.py reports the existing build directory as an error
+        self.run_step("show_layer_info", repetition, "setup.py", setup_args + ["--show-layer-info", "--re-create-conf"])
+
+        snapshot_file_name = os.path.join(self.workspace.msc_ldk_dir, "benchmark.snapshot")
+        if os.path.exists(snapshot_file_name):
+            os.unlink(snapshot_file_name)
+        if self.run_step("write_snapshot", repetition, "setup.py", ["--write-snapshot", snapshot_file_name]) and os.path.exists(snapshot_file_name):
+            self.pin_snapshot(snapshot_file_name)
+            self.run_step("version_file", repetition, "setup.py", ["--version-file", snapshot_file_name, "--re-create-conf"])
+        else:
+            self.skip_step("version_file", "no snapshot")
+        # Back to the branches (not timed), update.py skips layers with a detached HEAD
+        self.run_script("setup.py", setup_args + ["--checkout-layers"], os.path.join(self.workspace.log_dir, "%d-checkout_layers.log" % repetition))
+
+        # Every layer gets a new upstream commit for update.py to fetch, the server is reset afterwards
+        old_sha1s = {}
+        for repo in self.workspace.layer_repos:
+            repo_dir = os.path.join(self.workspace.server_dir, repo)
+            old_sha1s[repo_dir] = add_upstream_commit(repo_dir, self.workspace.layer_branch, repetition)
+        self.run_step("update", repetition, "update.py", [])
+        self.run_step("update_unchanged", repetition, "update.py", [])
+        for repo_dir, old_sha1 in old_sha1s.items():
+            run_git(["update-ref", "refs/heads/%s" % self.workspace.layer_branch, old_sha1], cwd=repo_dir)
+
+        self.workspace.clean(keep_git_cache=True)
+        self.run_step("setup_fresh_cached", repetition, "setup.py", setup_args)
+
+    def get_step_results(self):
+        results = {}
+        for step, durations in self.durations.items():
+            step_result = {"durations": [round(duration, 4) for duration in durations], "failed": self.failures[step]}
+            if durations:
+                sorted_durations = sorted(durations)
+                step_result["min"] = round(sorted_durations[0], 4)
+                step_result["median"] = round(sorted_durations[len(sorted_durations) // 2], 4)
+                step_result["max"] = round(sorted_durations[-1], 4)
+            results[step] = step_result
+        return results
+
+def get_msc_ldk_version():
+    """Returns (HEAD SHA1, 'git describe' string) of this MSC-LDK, the describe string ends with -dirty for uncommitted changes."""
+    try:
+        sha1 = run_git(["rev-parse", "HEAD"], cwd=MSC_LDK_ROOT).decode().strip()
+        describe = run_git(["describe", "--always", "--tags", "--dirty"], cwd=MSC_LDK_ROOT).decode().strip()
+    except subprocess.CalledProcessError:
+        return None, "unknown"
+    return sha1, describe
+
+def print_results(results):
+    print("%-20s %6s %10s %10s %10s" % ("Step", "Runs", "Min s", "Median s", "Max s"))
+    for step in STEPS:
+        step_result = results["steps"][step]
+        if "median" in step_result:
+            print("%-20s %6d %10.2f %10.2f %10.2f%s" % (step, len(step_result["durations"]), step_result["min"], step_result["median"], step_result["max"],
+                                                    " (%d failed)" % step_result["failed"] if step_result["failed"] else ""))
+        else:
+            print("%-20s %6d %10s %10s %10s (%d failed)" % (step, 0, "-", "-", "-", step_result["failed"]))
+
+def print_comparison(old_results, results):
+    """Shows the median durations of the steps of old_results and results."""
+    print("Comparison with %s (%s):" % (old_results["describe"], old_results["timestamp"]))
+    # The number of repetitions only changes the precision
+    different_parameters = ["%s: %s -> %s" % (name, old_results["parameters"].get(name), value)
+                            for name, value in sorted(results["parameters"].items())
+                            if name != "repeat" and old_results["parameters"].get(name) != value]
+    if different_parameters:
+        print("WARNING: The runs used different parameters (%s)" % ", ".join(different_parameters))
+    print("%-20s %10s %10s %10s" % ("Step", "Old s", "New s", "Change"))
+    for step in STEPS:
+        old_median = old_results["steps"].get(step, {}).get("median")
+        median = results["steps"][step].get("median")
+        if old_median is None or median is None:
+            print("%-20s %10s %10s" % (step, "%.2f" % old_median if old_median is not None else "-", "%.2f" % median if median is not None else "-"))
+            continue
+        change = "%+.1f%%" % ((median - old_median) * 100.0 / old_median) if old_median else "-"
+        print("%-20s %10.2f %10.2f %10s" % (step, old_median, median, change))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Times setup.py and update.py of this MSC-LDK against a generated local git server (no network access is needed).")
+    arg_parser.add_argument("--layers", type=int, default=20, help="Number of generated layer repositories (default: 20).")
+    arg_parser.add_argument("--sublayers", type=int, default=1, help="Number of layers in every generated repository, like meta-openembedded (default: 1).")
+    arg_parser.add_argument("--branches", type=int, default=10, help="Number of branches in every generated repository (default: 10).")
+    arg_parser.add_argument("--tags", type=int, default=20, help="Number of tags in every generated repository (default: 20).")
+    arg_parser.add_argument("--history-depth", type=int, default=200, help="Number of commits in every generated repository (default: 200).")
+    arg_parser.add_argument("--files", type=int, default=50, help="Number of recipe files changed by the commits of every generated repository (default: 50).")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Number of times all steps are run, the median is compared (default: 3).")
+    arg_parser.add_argument("--msc-boost-python", default=os.path.join(MSC_LDK_ROOT, "scripts", "libMscBoostPython.git"),
+                            help="libMscBoostPython clone that is mirrored to the generated server (default: scripts/libMscBoostPython.git of a previous setup).")
+    arg_parser.add_argument("--work-dir", help="Directory for the generated server and MSC-LDK copy, it is kept after the run (default: a temporary directory that is removed).")
+    arg_parser.add_argument("--output", help="Write the results as JSON to OUTPUT (default: benchmark-<git describe>.json).")
+    arg_parser.add_argument("--compare", metavar="RESULTS_FILE", help="Compare the results with the JSON results of a previous run.")
+    args = arg_parser.parse_args()
+
+    if args.layers < 1 or args.sublayers < 1 or args.files < 1 or args.repeat < 1:
+        arg_parser.error("--layers, --sublayers, --files and --repeat must be at least 1")
+    if not os.path.isdir(args.msc_boost_python):
+        print("ERROR: libMscBoostPython not found in '%s' (run setup.py once or use --msc-boost-python)" % args.msc_boost_python, file=sys.stderr)
+        return 1
+    old_results = None
+    if args.compare:
+        with open(args.compare) as f:
+            old_results = json.load(f)
+    sha1, describe = get_msc_ldk_version()
+    output_file_name = args.output or "benchmark-%s.json" % describe
+
+    if args.work_dir:
+        if os.path.exists(args.work_dir):
+            print("ERROR: '%s' already exists" % args.work_dir, file=sys.stderr)
+            return 1
+        work_dir = args.work_dir
+    else:
+        work_dir = tempfile.mkdtemp(prefix="msc-ldk-benchmark-")
+        os.rmdir(work_dir)
+    try:
+        workspace = Workspace(work_dir, args)
+        print("Generating %d layer repositories with %d commits, %d branches and %d tags in %s" % (args.layers + 2, args.history_depth, args.branches, args.tags, workspace.work_dir))
+        start_time = time.perf_counter()
+        try:
+            workspace.create(args.msc_boost_python)
+        except subprocess.CalledProcessError as e:
+            print("ERROR: Generating the benchmark data failed: '%s': %s" % (" ".join(e.cmd), (e.stderr or b"").decode(errors="replace").strip()), file=sys.stderr)
+            return 1
+        generation_duration = time.perf_counter() - start_time
+        print("Generated in %.2fs" % generation_duration)
+
+        benchmark = Benchmark(workspace)
+        if not benchmark.run_bootstrap():
+            return 1
+        for repetition in range(1, args.repeat + 1):
+            print("Repetition %d of %d:" % (repetition, args.repeat))
+            benchmark.run_repetition(repetition)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    parameters = dict((name, getattr(args, name)) for name in ["layers", "sublayers", "branches", "tags", "history_depth", "files", "repeat"])
+    results = {"commit": sha1,
+               "describe": describe,
+               "timestamp": datetime.datetime.now().isoformat(),
+               "host": socket.gethostname(),
+               "python": platform.python_version(),
+               "git": run_git(["--version"]).decode().strip(),
+               "parameters": parameters,
+               "generation": round(generation_duration, 4),
+               "steps": benchmark.get_step_results()}
+    with open(output_file_name, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+    print_results(results)
+    print("Results written to %s" % output_file_name)
+    if old_results is not None:
+        print_comparison(old_results, results)
+    if any(step_result["failed"] for step_result in results["steps"].values()):
+        if args.work_dir:
+            print("ERROR: Some steps failed, the logs are in %s" % workspace.log_dir, file=sys.stderr)
+        else:
+            print("ERROR: Some steps failed, use --work-dir to keep the logs", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,11 +12,14 @@
 #  Copyright (c) 2016 -- MSC Technologies
 # ----------------------------------------------------------------------------------
 
+import importlib.util
 import os
 import shutil
 import subprocess
 import sys
 
+import git_state
+
 try:
     MAIN_SCRIPT_DIR = os.path.dirname(os.path.realpath(sys.modules['__main__'].__file__))
 except AttributeError:
@@ -26,6 +29,9 @@ MSC_PUBLIC_GIT_SERVER = "ssh://gitolite@msc-git02.msc-ge.com:9418/"
 MSC_GIT_SERVER = os.environ.get("MSC_GIT_SERVER", MSC_PUBLIC_GIT_SERVER)
 MSC_GIT_SERVER = MSC_GIT_SERVER.rstrip("/")
 
+# Written into libMscBoostPython.git/.git after a successful bootstrap: '<version> <HEAD SHA1>'
+BOOTSTRAP_STAMP_FILE_NAME = "msc_ldk_bootstrap_stamp"
+
 def check_for_pip3():
     pip3_available = shutil.which("pip3")
     if not pip3_available:
@@ -37,9 +43,8 @@ class PipInstall(object):
         self.module_name = module_name
         self.pip_package_name = pip_package_name
     def check(self):
-        try:
-            exec("import %s" % self.module_name)
-        except ImportError:
+        # Only look the module up, importing it is expensive
+        if importlib.util.find_spec(self.module_name) is None:
             return ["sudo pip3 install %s" % self.pip_package_name]
         return []
 
@@ -147,6 +152,27 @@ def check_python_requirements():
         return False
     return True
 
+def get_bootstrap_stamp_file_name():
+    return os.path.join(MAIN_SCRIPT_DIR, "libMscBoostPython.git", ".git", BOOTSTRAP_STAMP_FILE_NAME)
+
+def is_bootstrap_stamp_valid(version):
+    """Checks without running git that libMscBoostPython is still at the HEAD that was verified for version."""
+    if not os.path.islink(os.path.join(MAIN_SCRIPT_DIR, "MscBoost")):
+        return False
+    try:
+        stamp = open(get_bootstrap_stamp_file_name()).read().split()
+    except (OSError, IOError):
+        return False
+    head_sha1 = git_state.read_git_head(os.path.join(MAIN_SCRIPT_DIR, "libMscBoostPython.git"))[1]
+    return head_sha1 is not None and stamp == [version, head_sha1]
+
+def write_bootstrap_stamp(version):
+    with WorkingDirectory(os.path.join(MAIN_SCRIPT_DIR, "libMscBoostPython.git")):
+        if is_head_at_git_version(version):
+            head_sha1 = os.popen("git rev-parse HEAD").read().strip()
+            with open(get_bootstrap_stamp_file_name(), "w") as stamp_file:
+                print("%s %s" % (version, head_sha1), file=stamp_file)
+
 def install_msc_boost_python(version):
     with WorkingDirectory(MAIN_SCRIPT_DIR):
         branch_name = get_git_branch_name()
@@ -166,7 +192,11 @@ def install_msc_boost_python(version):
                     git_checkout_msc_boost_python(branch_name, version)
 
 def bootstrap_msc_boost_python(version):
-    if check_python_requirements():
-        install_msc_boost_python(version)
+    if not check_python_requirements():
+        sys.exit(1)
+    if is_bootstrap_stamp_valid(version):
+        # Fast path: libMscBoostPython has already been verified to be at version
         return
-    sys.exit(1)
+    install_msc_boost_python(version)
+    if os.path.isdir(os.path.join(MAIN_SCRIPT_DIR, "libMscBoostPython.git")):
+        write_bootstrap_stamp(version)
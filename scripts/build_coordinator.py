@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Build several BSPs in parallel within one CPU and memory budget
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : build_coordinator.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Runs 'make' in several build directories at the same time.
+#               The jobs of the build host (see parallelism.conf) are shared
+#               between the running builds: every build reads its current share
+#               of BB_NUMBER_THREADS and PARALLEL_MAKE from a file that is
+#               updated when builds start, finish or are idle (do_fetch,
+#               do_rootfs, packaging).
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import durations
+import parallelism_model
+
+MSC_LDK_SCRIPTS = os.path.dirname(os.path.realpath(__file__))
+SHARE_FILE_NAME = ".build_coordinator_share"
+POSTFILE_NAME = "build_coordinator.conf"
+LOG_FILE_NAME = "build_coordinator.log"
+
+# BB_NUMBER_THREADS is read when bitbake starts, PARALLEL_MAKE when a task starts.
+# So the make jobs of running tasks follow the share, bitbake threads follow it per 'bitbake' call.
+POSTFILE_TEMPLATE = """# Written by build_coordinator.py, the share is updated while the build is running
+BB_NUMBER_THREADS = "${@open('%(share_file)s').read().split()[0]}"
+PARALLEL_MAKE = "-j ${@open('%(share_file)s').read().split()[1]} -l %(load_limit)d"
+"""
+
+class Build(object):
+    """A build directory that is built by the coordinator."""
+    def __init__(self, build_dir):
+        self.build_dir = os.path.realpath(build_dir)
+        self.name = os.path.basename(self.build_dir)
+        self.share_file = os.path.join(self.build_dir, SHARE_FILE_NAME)
+        self.postfile = os.path.join(self.build_dir, "conf", POSTFILE_NAME)
+        self.process = None
+        self.start_time = None
+        self.end_time = None
+        self.threads = None
+        self.share = None
+        self.cpu_seconds = 0.0
+        self.cpu_usage = None
+        self.returncode = None
+
+    def get_duration(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def write_share(self, threads, share):
+        """Publishes the share (bitbake threads and make jobs) to the running build."""
+        self.threads = threads
+        self.share = share
+        with open(self.share_file + ".tmp", "w") as f:
+            f.write("%d %d\n" % (threads, share))
+        os.replace(self.share_file + ".tmp", self.share_file)
+
+    def start(self, share, load_limit, make_target):
+        self.write_share(share, share)
+        with open(self.postfile, "w") as f:
+            f.write(POSTFILE_TEMPLATE % {"share_file": self.share_file, "load_limit": load_limit})
+        log_file = open(os.path.join(self.build_dir, LOG_FILE_NAME), "w")
+        bitbake_flags = "%s -R %s" % (os.environ.get("BITBAKE_FLAGS", "-k"), self.postfile)
+        # A session of its own, so the CPU time of bitbake and all its workers can be measured
+        self.process = subprocess.Popen(["make", "-C", self.build_dir, make_target, "BITBAKE_FLAGS=%s" % bitbake_flags],
+                                        stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+        log_file.close()
+        self.start_time = time.time()
+        self.cpu_seconds = 0.0
+        self.cpu_usage = None
+
+    def poll(self):
+        """Returns True when the build has finished."""
+        if self.process.poll() is None:
+            return False
+        self.returncode = self.process.returncode
+        self.end_time = time.time()
+        for file_name in (self.share_file, self.postfile):
+            if os.path.exists(file_name):
+                os.unlink(file_name)
+        return True
+
+    def update_cpu_usage(self, interval):
+        """Measures the number of CPUs used by the build since the last call."""
+        cpu_seconds = get_session_cpu_seconds(self.process.pid)
+        self.cpu_usage = max(0.0, cpu_seconds - self.cpu_seconds) / interval
+        self.cpu_seconds = max(self.cpu_seconds, cpu_seconds)
+
+def get_session_cpu_seconds(session_id):
+    """Returns the CPU time of all processes in a session, including their finished children."""
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    ticks = 0
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % pid) as f:
+                # The command name in field 2 may contain spaces
+                fields = f.read().rpartition(")")[2].split()
+        except (OSError, IOError):
+            continue
+        if int(fields[3]) == session_id:
+            # utime, stime, cutime, cstime
+            ticks += sum(int(value) for value in fields[11:15])
+    return ticks / float(clock_ticks)
+
+def calculate_shares(builds, budget):
+    """Splits the make jobs of the budget between the running builds.
+
+    Idle builds (using clearly less than their share, e.g. while fetching or creating the rootfs)
+    keep what they use, the rest of the budget is split between the busy builds.
+    """
+    shares = {}
+    busy_builds = []
+    for build in builds:
+        if build.cpu_usage is not None and build.cpu_usage < 0.5 * build.share:
+            shares[build] = max(1, int(math.ceil(build.cpu_usage * 1.5)))
+        else:
+            busy_builds.append(build)
+    if not busy_builds:
+        busy_builds = list(builds)
+        shares = {}
+    remaining = max(len(busy_builds), budget - sum(shares.values()))
+    for index, build in enumerate(busy_builds):
+        shares[build] = remaining // len(busy_builds) + (1 if index < remaining % len(busy_builds) else 0)
+    return shares
+
+def print_summary(builds, elapsed):
+    name_width = max([len("Build directory")] + [len(build.name) for build in builds])
+    row_format = "%%-%ds  %%-8s  %%10s  %%s" % name_width
+    print("Build summary:")
+    print(row_format % ("Build directory", "Duration", "CPU time", "Result"))
+    for build in builds:
+        if build.returncode is None:
+            result = "not built"
+        elif build.returncode == 0:
+            result = "ok"
+        else:
+            result = "failed (see %s)" % os.path.join(build.build_dir, LOG_FILE_NAME)
+        print(row_format % (build.name, durations.format_duration(build.get_duration()), durations.format_duration(build.cpu_seconds), result))
+    # The durations of concurrent builds are not comparable to a serial run (they share the
+    # CPUs, the download directory and the sstate cache), no "saved" time is derived from them
+    print("Wall-clock time: %s" % durations.format_duration(elapsed))
+
+def run_builds(builds, budget, max_builds, make_target, interval):
+    """Builds all build directories, returns the number of failed builds."""
+    queued_builds = list(builds)
+    running_builds = []
+    start_time = time.time()
+    try:
+        while queued_builds or running_builds:
+            changed = False
+            for build in list(running_builds):
+                if build.poll():
+                    running_builds.remove(build)
+                    changed = True
+                    print("%s finished after %s: %s" % (build.name, durations.format_duration(build.get_duration()),
+                                                        "ok" if build.returncode == 0 else "failed (exit code %d)" % build.returncode))
+            while queued_builds and len(running_builds) < max_builds:
+                build = queued_builds.pop(0)
+                share = max(1, budget // (len(running_builds) + 1))
+                build.start(share, budget, make_target)
+                running_builds.append(build)
+                changed = True
+                print("%s started (log: %s)" % (build.name, os.path.join(build.build_dir, LOG_FILE_NAME)))
+            if running_builds:
+                time.sleep(interval)
+                for build in running_builds:
+                    build.update_cpu_usage(interval)
+                # bitbake keeps its thread count until it exits, so the threads are always split evenly
+                threads = max(1, budget // len(running_builds))
+                shares = calculate_shares(running_builds, budget)
+                if changed or any(shares[build] != build.share or threads != build.threads for build in running_builds):
+                    for build in running_builds:
+                        build.write_share(threads, shares[build])
+                    print("Make jobs of %d: %s" % (budget, ", ".join("%s %d (using %.1f CPUs)" % (build.name, build.share, build.cpu_usage)
+                                                                     for build in running_builds)))
+    except KeyboardInterrupt:
+        print("Interrupted, stopping the running builds")
+        for build in running_builds:
+            # bitbake shuts down cleanly on SIGINT
+            os.killpg(build.process.pid, signal.SIGINT)
+        for build in running_builds:
+            build.process.wait()
+            build.poll()
+    print_summary(builds, time.time() - start_time)
+    return len([build for build in builds if build.returncode != 0])
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Builds several build directories in parallel, sharing the CPUs and memory of the build host.")
+    arg_parser.add_argument("build_dirs", nargs="+", help="The build directories (e.g. build/01011-lxqt).")
+    arg_parser.add_argument("--target", default="all", help="The make target built in every build directory (default: all).")
+    arg_parser.add_argument("--jobs", type=int, help="Number of jobs shared by all builds (default: derived from CPUs and memory like setup.py).")
+    arg_parser.add_argument("--max-builds", type=int, help="Maximum number of builds that run at the same time (default: every build gets at least --min-share jobs).")
+    arg_parser.add_argument("--min-share", type=int, default=4, help="Minimum number of jobs of a build when --max-builds is not given (default: 4).")
+    arg_parser.add_argument("--interval", type=float, default=10.0, help="Seconds between the updates of the shares (default: 10).")
+    args = arg_parser.parse_args()
+
+    for build_dir in args.build_dirs:
+        if not os.path.isfile(os.path.join(build_dir, "conf", "local.conf")):
+            print("ERROR: '%s' is no build directory created by setup.py" % build_dir, file=sys.stderr)
+            return 1
+    if args.jobs:
+        budget, description = args.jobs, "--jobs"
+    else:
+        model = parallelism_model.ParallelismModel([os.path.join(MSC_LDK_SCRIPTS, "parallelism.conf")])
+        budget, description = model.get_job_budget()
+    max_builds = args.max_builds or max(1, budget // max(1, args.min_share))
+    print("Building %d build directories, %d at the same time, sharing %d jobs (%s)" % (len(args.build_dirs), min(max_builds, len(args.build_dirs)), budget, description))
+    builds = [Build(build_dir) for build_dir in args.build_dirs]
+    return 1 if run_builds(builds, budget, max_builds, args.target, args.interval) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
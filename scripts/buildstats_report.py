@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Analysis of the bitbake build statistics
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : buildstats_report.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Reads tmp/buildstats/<build name>/ of a build directory and shows
+#               the slowest tasks (wall and CPU time), an estimate of the
+#               critical path and the achieved parallelism. Two builds can be
+#               compared to find the tasks that made a build slower.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import bisect
+import json
+import os
+import re
+import sys
+
+import durations
+
+# A task that starts at most this many seconds after another task ended is assumed to have waited for it
+CRITICAL_PATH_GAP = 2.0
+
+class TaskStats(object):
+    """The statistics of one bitbake task (tmp/buildstats/<build name>/<PF>/<task>)."""
+    def __init__(self, recipe, task):
+        self.recipe = recipe
+        self.task = task
+        self.start = None
+        self.end = None
+        self.elapsed = None
+        self.cpu_time = None
+        self.cpu_usage = None
+        self.status = None
+
+    def get_name(self):
+        return "%s:%s" % (self.recipe, self.task)
+
+    def get_key(self):
+        """Identifies the task across builds, also when the version of the recipe changed."""
+        return "%s:%s" % (get_pn(self.recipe), self.task)
+
+    def to_dict(self):
+        return {"recipe": self.recipe, "task": self.task, "start": self.start, "end": self.end,
+                "elapsed": self.elapsed, "cpu_time": self.cpu_time, "status": self.status}
+
+def get_pn(pf):
+    """Returns the recipe name of PF (<PN>-<PV>-<PR>)."""
+    parts = pf.rsplit("-", 2)
+    return parts[0] if len(parts) == 3 else pf
+
+def read_task_stats(file_name, recipe, task):
+    """Parses a task file of buildstats.bbclass, returns None when the task did not finish."""
+    stats = TaskStats(recipe, task)
+    rusage_cpu_time = 0.0
+    has_rusage = False
+    with open(file_name, errors="replace") as f:
+        for line in f:
+            name, dummy, value = line.partition(":")
+            value = value.strip()
+            if name == "Started":
+                stats.start = float(value)
+            elif name == "Ended":
+                stats.end = float(value)
+            elif name == "Status":
+                stats.status = value
+            elif name == "CPU usage":
+                stats.cpu_usage = float(value.rstrip("%").strip())
+            elif name.endswith("rusage ru_utime") or name.endswith("rusage ru_stime"):
+                rusage_cpu_time += float(value)
+                has_rusage = True
+            elif "Elapsed time:" in line:
+                stats.elapsed = float(re.search(r"Elapsed time: ([0-9.]+)", line).group(1))
+    if stats.start is None or stats.end is None:
+        return None
+    if stats.elapsed is None:
+        stats.elapsed = stats.end - stats.start
+    if has_rusage:
+        stats.cpu_time = rusage_cpu_time
+    elif stats.cpu_usage is not None:
+        stats.cpu_time = stats.elapsed * stats.cpu_usage / 100.0
+    return stats
+
+def find_buildstats_run(path, previous=False):
+    """Returns the buildstats directory of one bitbake run.
+
+    path is either such a directory or a build directory (its latest run, with previous the run before).
+    """
+    buildstats_dir = os.path.join(path, "tmp", "buildstats")
+    if not os.path.isdir(buildstats_dir):
+        return path
+    runs = sorted(name for name in os.listdir(buildstats_dir) if os.path.isdir(os.path.join(buildstats_dir, name)))
+    index = -2 if previous else -1
+    if len(runs) < -index:
+        return None
+    return os.path.join(buildstats_dir, runs[index])
+
+def read_buildstats_run(run_dir):
+    """Returns the TaskStats of all finished tasks of a bitbake run."""
+    tasks = []
+    for recipe in sorted(os.listdir(run_dir)):
+        recipe_dir = os.path.join(run_dir, recipe)
+        if not os.path.isdir(recipe_dir):
+            continue
+        for task in sorted(os.listdir(recipe_dir)):
+            if not task.startswith("do_"):
+                continue
+            stats = read_task_stats(os.path.join(recipe_dir, task), recipe, task)
+            if stats is not None:
+                tasks.append(stats)
+    return tasks
+
+def get_critical_path(tasks):
+    """Estimates the critical path: starting with the last task, the task that ended just before a task started is its predecessor.
+
+    buildstats has no dependency information, a task of the same recipe is preferred as predecessor.
+    """
+    if not tasks:
+        return []
+    tasks_by_end = sorted(tasks, key=lambda task: task.end)
+    ends = [task.end for task in tasks_by_end]
+    path = [tasks_by_end[-1]]
+    while True:
+        task = path[-1]
+        index = bisect.bisect_right(ends, task.start + 0.01)
+        candidates = [candidate for candidate in tasks_by_end[max(0, index - 200):index]
+                      if candidate is not task and candidate.end >= task.start - CRITICAL_PATH_GAP]
+        if not candidates:
+            break
+        same_recipe = [candidate for candidate in candidates if candidate.recipe == task.recipe]
+        predecessor = (same_recipe or candidates)[-1]
+        if predecessor.start >= task.start:
+            break
+        path.append(predecessor)
+    path.reverse()
+    return path
+
+def analyze(run_dir, tasks, top_n):
+    """Returns the report of one bitbake run as dict."""
+    start = min(task.start for task in tasks)
+    end = max(task.end for task in tasks)
+    wall_time = end - start
+    task_time = sum(task.elapsed for task in tasks)
+    cpu_time = sum(task.cpu_time or 0.0 for task in tasks)
+    critical_path = get_critical_path(tasks)
+    return {
+        "run": run_dir,
+        "tasks": len(tasks),
+        "failed_tasks": [task.get_name() for task in tasks if task.status not in (None, "PASSED")],
+        "wall_time": wall_time,
+        "task_time": task_time,
+        "cpu_time": cpu_time,
+        # Average number of tasks running at the same time and CPUs in use
+        "parallelism": task_time / wall_time if wall_time else 0.0,
+        "cpu_parallelism": cpu_time / wall_time if wall_time else 0.0,
+        "slowest_tasks": [task.to_dict() for task in sorted(tasks, key=lambda task: task.elapsed, reverse=True)[:top_n]],
+        "most_cpu_tasks": [task.to_dict() for task in sorted(tasks, key=lambda task: task.cpu_time or 0.0, reverse=True)[:top_n]],
+        "critical_path": [task.to_dict() for task in critical_path],
+        "critical_path_time": sum(task.elapsed for task in critical_path),
+    }
+
+def compare(tasks, base_tasks, top_n):
+    """Returns the differences between two runs as dict (positive deltas: slower than base)."""
+    base_by_key = dict((task.get_key(), task) for task in base_tasks)
+    keys = set()
+    changes = []
+    new_tasks = []
+    for task in tasks:
+        keys.add(task.get_key())
+        base_task = base_by_key.get(task.get_key())
+        if base_task is None:
+            new_tasks.append(task)
+        else:
+            changes.append({"task": task.get_key(), "elapsed": task.elapsed, "base_elapsed": base_task.elapsed,
+                            "delta": task.elapsed - base_task.elapsed})
+    missing_tasks = [task for task in base_tasks if task.get_key() not in keys]
+    changes.sort(key=lambda change: change["delta"], reverse=True)
+    return {
+        "regressions": [change for change in changes[:top_n] if change["delta"] > 0],
+        "improvements": [change for change in reversed(changes[-top_n:]) if change["delta"] < 0],
+        # Tasks that only ran in one build (e.g. not taken from the sstate cache)
+        "new_tasks": [task.to_dict() for task in sorted(new_tasks, key=lambda task: task.elapsed, reverse=True)[:top_n]],
+        "new_tasks_count": len(new_tasks),
+        "new_tasks_time": sum(task.elapsed for task in new_tasks),
+        "missing_tasks_count": len(missing_tasks),
+        "missing_tasks_time": sum(task.elapsed for task in missing_tasks),
+    }
+
+def print_task_table(title, tasks, value_name):
+    print(title)
+    for task in tasks:
+        print("  %10s  %s:%s" % (durations.format_duration(task[value_name] or 0.0), task["recipe"], task["task"]))
+
+def print_report(report, comparison):
+    print("Build statistics of %s" % report["run"])
+    print("  %d tasks, wall time %s, task time %s, CPU time %s" % (
+        report["tasks"], durations.format_duration(report["wall_time"]), durations.format_duration(report["task_time"]), durations.format_duration(report["cpu_time"])))
+    print("  Parallelism: %.1f tasks, %.1f CPUs in use on average" % (report["parallelism"], report["cpu_parallelism"]))
+    if report["failed_tasks"]:
+        print("  Failed tasks: %s" % ", ".join(report["failed_tasks"]))
+    print_task_table("Slowest tasks (wall time):", report["slowest_tasks"], "elapsed")
+    print_task_table("Slowest tasks (CPU time):", report["most_cpu_tasks"], "cpu_time")
+    print("Critical path (estimate, %d tasks, %s of %s wall time):" % (
+        len(report["critical_path"]), durations.format_duration(report["critical_path_time"]), durations.format_duration(report["wall_time"])))
+    for task in report["critical_path"]:
+        print("  %10s  %s:%s" % (durations.format_duration(task["elapsed"]), task["recipe"], task["task"]))
+    if comparison is None:
+        return
+    print("Compared to %s:" % comparison["base_run"])
+    print("  Wall time %s (%s), %d tasks only in this build (%s), %d tasks only in the other build (%s)" % (
+        durations.format_duration(comparison["wall_time_delta"]), "slower" if comparison["wall_time_delta"] > 0 else "faster",
+        comparison["new_tasks_count"], durations.format_duration(comparison["new_tasks_time"]),
+        comparison["missing_tasks_count"], durations.format_duration(comparison["missing_tasks_time"])))
+    print("Regressions:")
+    for change in comparison["regressions"]:
+        print("  %10s  %s (%s -> %s)" % ("+" + durations.format_duration(change["delta"]), change["task"],
+                                         durations.format_duration(change["base_elapsed"]), durations.format_duration(change["elapsed"])))
+    print("Improvements:")
+    for change in comparison["improvements"]:
+        print("  %10s  %s (%s -> %s)" % (durations.format_duration(change["delta"]), change["task"],
+                                         durations.format_duration(change["base_elapsed"]), durations.format_duration(change["elapsed"])))
+    print("Slowest tasks only in this build:")
+    for task in comparison["new_tasks"]:
+        print("  %10s  %s:%s" % (durations.format_duration(task["elapsed"]), task["recipe"], task["task"]))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Shows the slowest tasks, the critical path and the parallelism of a bitbake run from its buildstats.")
+    arg_parser.add_argument("run", help="A build directory (its latest bitbake run) or a directory tmp/buildstats/<build name>.")
+    arg_parser.add_argument("--compare", metavar="RUN", help="Compare with another run (build directory or tmp/buildstats/<build name>).")
+    arg_parser.add_argument("--compare-previous", action="store_true", help="Compare with the run before the latest run of the build directory.")
+    arg_parser.add_argument("--top", type=int, default=20, help="Number of tasks in the lists (default: 20).")
+    arg_parser.add_argument("--json", metavar="FILE", help="Also write the report as JSON to FILE ('-' for stdout instead of the text report).")
+    args = arg_parser.parse_args()
+
+    run_dir = find_buildstats_run(args.run)
+    base_run_dir = None
+    if args.compare:
+        base_run_dir = find_buildstats_run(args.compare)
+    elif args.compare_previous:
+        base_run_dir = find_buildstats_run(args.run, previous=True)
+        if base_run_dir is None:
+            print("ERROR: %s has no previous run" % args.run, file=sys.stderr)
+            return 1
+    tasks = read_buildstats_run(run_dir) if run_dir and os.path.isdir(run_dir) else []
+    if not tasks:
+        print("ERROR: No build statistics found in %s (is INHERIT += \"buildstats\" in local.conf?)" % (run_dir or args.run), file=sys.stderr)
+        return 1
+    report = analyze(run_dir, tasks, args.top)
+    comparison = None
+    if base_run_dir:
+        base_tasks = read_buildstats_run(base_run_dir) if os.path.isdir(base_run_dir) else []
+        if not base_tasks:
+            print("ERROR: No build statistics found in %s" % base_run_dir, file=sys.stderr)
+            return 1
+        comparison = compare(tasks, base_tasks, args.top)
+        comparison["base_run"] = base_run_dir
+        comparison["wall_time_delta"] = report["wall_time"] - analyze(base_run_dir, base_tasks, 0)["wall_time"]
+        report["comparison"] = comparison
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=4, sort_keys=True)
+        print()
+        return 0
+    print_report(report, comparison)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Size budget for the shared sstate cache and download directory
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : cache_cleanup.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Removes the least recently used files from SSTATE_DIR and DL_DIR
+#               until they fit into their size budget. sstate objects used by
+#               the existing build directories are never removed. Shows how
+#               much of the sstate cache every build directory uses.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import fcntl
+import glob
+import os
+import re
+import shutil
+import sys
+import time
+
+from size_units import format_size, parse_size
+
+MSC_LDK_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# sstate:<pn>:...:<task hash>_<task>.tgz(.siginfo)
+SSTATE_HASH_RE = re.compile(r"([0-9a-f]{32}|[0-9a-f]{64})_[a-z_]+\.tgz(\.siginfo)?$")
+# <pv>-<pr>.do_<task>[_setscene].<task hash>[.<arch>]
+STAMP_HASH_RE = re.compile(r"\.([0-9a-f]{32}|[0-9a-f]{64})(\.|$)")
+# Files that belong to the download next to them
+DOWNLOAD_SUFFIXES = (".done", ".lock")
+
+class CacheEntry(object):
+    """Files that are removed together (e.g. an sstate archive and its .siginfo, a git mirror)."""
+    def __init__(self, key):
+        self.key = key
+        self.paths = []
+        self.size = 0
+        self.last_access = 0
+        self.task_hash = None
+        # Downloads: the lock file bitbake holds while fetching (<download>.lock)
+        self.lock_file = None
+
+    def add(self, path, size, last_access):
+        self.paths.append(path)
+        self.size += size
+        self.last_access = max(self.last_access, last_access)
+
+    def is_in_use(self):
+        """Checks whether bitbake holds the lock of the entry, a .lock file left behind by a finished fetch is not locked."""
+        if self.lock_file is None:
+            return False
+        try:
+            fd = os.open(self.lock_file, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    def remove(self):
+        """Removes the files of the entry, returns False when the entry is locked by bitbake.
+
+        A download is removed while holding its lock (like bitbake's lockfile() takes it),
+        so a fetch that starts at the same time waits and downloads the file again.
+        """
+        lock_fd = None
+        if self.lock_file is not None:
+            lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o664)
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(lock_fd)
+                return False
+        try:
+            for path in self.paths:
+                if path == self.lock_file:
+                    continue
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.lexists(path):
+                    os.unlink(path)
+        finally:
+            if lock_fd is not None:
+                # bitbake's lockfile() notices a removed lock file and takes a new one
+                if os.path.exists(self.lock_file):
+                    os.unlink(self.lock_file)
+                os.close(lock_fd)
+        return True
+
+def get_default_dir(env_name, dir_name):
+    """Returns the directory like env.sh and setup.py do."""
+    return os.environ.get(env_name, os.path.join(MSC_LDK_ROOT, dir_name))
+
+def get_file_info(path):
+    """Returns (allocated size, last access) of a file."""
+    stat = os.lstat(path)
+    # The access time is not updated on noatime mounts, the modification time is the fallback
+    return stat.st_blocks * 512, max(stat.st_atime, stat.st_mtime)
+
+def scan_sstate_dir(sstate_dir):
+    """Returns the sstate objects in sstate_dir as CacheEntry list."""
+    entries = {}
+    for dir_path, dir_names, file_names in os.walk(sstate_dir):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            match = SSTATE_HASH_RE.search(file_name)
+            key = path[:-len(".siginfo")] if file_name.endswith(".siginfo") else path
+            try:
+                size, last_access = get_file_info(path)
+            except OSError:
+                continue
+            entry = entries.setdefault(key, CacheEntry(key))
+            entry.add(path, size, last_access)
+            if match:
+                entry.task_hash = match.group(1)
+    return list(entries.values())
+
+def get_download_key(path):
+    """Returns the download a file like <download>.done or <download>.lock belongs to."""
+    for suffix in DOWNLOAD_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+def scan_downloads_dir(downloads_dir):
+    """Returns the downloads in downloads_dir as CacheEntry list, a VCS mirror directory is one entry."""
+    entries = {}
+    if not os.path.isdir(downloads_dir):
+        return []
+    for name in os.listdir(downloads_dir):
+        path = os.path.join(downloads_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            # git2/, svn/ etc.: every mirror is an entry of its own
+            for mirror_name in os.listdir(path):
+                mirror_path = os.path.join(path, mirror_name)
+                key = get_download_key(mirror_path)
+                entry = entries.setdefault(key, CacheEntry(key))
+                entry.lock_file = key + ".lock"
+                entry.paths.append(mirror_path)
+                for file_path in [mirror_path] + [os.path.join(d, f) for d, dummy, fs in os.walk(mirror_path) for f in fs]:
+                    try:
+                        size, last_access = get_file_info(file_path)
+                    except OSError:
+                        continue
+                    entry.size += size
+                    entry.last_access = max(entry.last_access, last_access)
+            continue
+        key = get_download_key(path)
+        try:
+            size, last_access = get_file_info(path)
+        except OSError:
+            continue
+        entry = entries.setdefault(key, CacheEntry(key))
+        entry.lock_file = key + ".lock"
+        entry.add(path, size, last_access)
+    return list(entries.values())
+
+def get_referenced_task_hashes(build_dir):
+    """Returns the task hashes of the stamps of a build directory (the sstate objects it was built from or created)."""
+    task_hashes = set()
+    for stamps_dir in glob.glob(os.path.join(build_dir, "tmp*", "stamps")):
+        for dir_path, dir_names, file_names in os.walk(stamps_dir):
+            for file_name in file_names:
+                match = STAMP_HASH_RE.search(file_name)
+                if match:
+                    task_hashes.add(match.group(1))
+    return task_hashes
+
+def evict(entries, budget, protected, dry_run):
+    """Removes the least recently used, unprotected entries until the entries fit into budget.
+
+    Returns (removed count, removed size, remaining size).
+    """
+    total_size = sum(entry.size for entry in entries)
+    removed_count = 0
+    removed_size = 0
+    for entry in sorted(entries, key=lambda entry: entry.last_access):
+        if total_size - removed_size <= budget:
+            break
+        if protected(entry):
+            continue
+        if dry_run:
+            print("Would remove %s (%s, last used %s)" % (entry.key, format_size(entry.size), time.strftime("%Y-%m-%d", time.localtime(entry.last_access))))
+        elif not entry.remove():
+            # Locked since protected() was checked
+            continue
+        removed_count += 1
+        removed_size += entry.size
+    return removed_count, removed_size, total_size - removed_size
+
+def print_build_dir_usage(sstate_entries, build_hashes):
+    """Prints the sstate cache size used by every build directory, 'exclusive' is not used by any other build directory."""
+    size_by_hash = {}
+    for entry in sstate_entries:
+        if entry.task_hash:
+            size_by_hash[entry.task_hash] = size_by_hash.get(entry.task_hash, 0) + entry.size
+    name_width = max([len("Build directory")] + [len(os.path.basename(build_dir)) for build_dir in build_hashes])
+    row_format = "%%-%ds  %%12s  %%12s" % name_width
+    print("sstate cache usage:")
+    print(row_format % ("Build directory", "Used", "Exclusive"))
+    for build_dir, task_hashes in sorted(build_hashes.items()):
+        other_hashes = set()
+        for other_build_dir, other_task_hashes in build_hashes.items():
+            if other_build_dir != build_dir:
+                other_hashes.update(other_task_hashes)
+        used = sum(size_by_hash.get(task_hash, 0) for task_hash in task_hashes)
+        exclusive = sum(size_by_hash.get(task_hash, 0) for task_hash in task_hashes - other_hashes)
+        print(row_format % (os.path.basename(build_dir), format_size(used), format_size(exclusive)))
+    referenced_hashes = set().union(*build_hashes.values()) if build_hashes else set()
+    unreferenced = sum(size for task_hash, size in size_by_hash.items() if task_hash not in referenced_hashes)
+    unreferenced += sum(entry.size for entry in sstate_entries if not entry.task_hash)
+    print(row_format % ("(not used)", format_size(unreferenced), ""))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Keeps the shared sstate cache and download directory within a size budget by removing the least recently used files.")
+    arg_parser.add_argument("--sstate-dir", default=get_default_dir("MSC_LDK_YOCTO_SSTATE_DIR", "sstate-cache"),
+                            help="The sstate cache (default: $MSC_LDK_YOCTO_SSTATE_DIR or sstate-cache/).")
+    arg_parser.add_argument("--downloads-dir", default=get_default_dir("MSC_LDK_YOCTO_DL_DIR", "downloads"),
+                            help="The download directory (default: $MSC_LDK_YOCTO_DL_DIR or downloads/).")
+    arg_parser.add_argument("--sstate-budget", metavar="SIZE", help="Maximum size of the sstate cache (e.g. 200G).")
+    arg_parser.add_argument("--downloads-budget", metavar="SIZE", help="Maximum size of the download directory (e.g. 100G).")
+    arg_parser.add_argument("--build-dir", action="append", dest="build_dirs",
+                            help="Build directory whose sstate objects are kept, can be given several times (default: all directories in build/).")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only show what would be removed.")
+    args = arg_parser.parse_args()
+
+    build_dirs = args.build_dirs
+    if build_dirs is None:
+        build_dirs = [path for path in glob.glob(os.path.join(MSC_LDK_ROOT, "build", "*")) if os.path.isdir(os.path.join(path, "conf"))]
+    build_hashes = dict((build_dir, get_referenced_task_hashes(build_dir)) for build_dir in build_dirs)
+    referenced_hashes = set().union(*build_hashes.values()) if build_hashes else set()
+    dry_run_info = " (dry-run)" if args.dry_run else ""
+
+    if os.path.isdir(args.sstate_dir):
+        sstate_entries = scan_sstate_dir(args.sstate_dir)
+        print_build_dir_usage(sstate_entries, build_hashes)
+        if args.sstate_budget:
+            removed_count, removed_size, remaining_size = evict(sstate_entries, parse_size(args.sstate_budget),
+                                                                lambda entry: entry.task_hash in referenced_hashes, args.dry_run)
+            print("%s: removed %d sstate objects (%s)%s, %s left (budget %s)" % (
+                args.sstate_dir, removed_count, format_size(removed_size), dry_run_info, format_size(remaining_size), args.sstate_budget))
+            if remaining_size > parse_size(args.sstate_budget):
+                print("WARNING: The sstate objects used by the build directories alone exceed the budget", file=sys.stderr)
+    else:
+        print("No sstate cache in %s" % args.sstate_dir)
+
+    if os.path.isdir(args.downloads_dir):
+        downloads_entries = scan_downloads_dir(args.downloads_dir)
+        print("%s: %s in %d downloads" % (args.downloads_dir, format_size(sum(entry.size for entry in downloads_entries)), len(downloads_entries)))
+        if args.downloads_budget:
+            # Downloads that are fetched right now are locked by bitbake
+            removed_count, removed_size, remaining_size = evict(downloads_entries, parse_size(args.downloads_budget),
+                                                                lambda entry: entry.is_in_use(), args.dry_run)
+            print("%s: removed %d downloads (%s)%s, %s left (budget %s)" % (
+                args.downloads_dir, removed_count, format_size(removed_size), dry_run_info, format_size(remaining_size), args.downloads_budget))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Durations for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : durations.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Formats build and task durations for the output of the build
+#               coordinator and the buildstats report.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+def format_duration(seconds):
+    """Formats seconds like '1:02:03', negative durations (differences) get a '-'."""
+    sign = "-" if seconds < 0 else ""
+    seconds = abs(seconds)
+    return "%s%d:%02d:%02d" % (sign, seconds // 3600, seconds % 3600 // 60, seconds % 60)
@@ -0,0 +1,122 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Git repository state for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : git_state.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Reads HEAD and the refs of a repository without running git and
+#               parses 'git status --porcelain=v2 --branch'. Only uses the
+#               Python standard library, so bootstrap_msc_boost_python.py can use
+#               it before libMscBoostPython is available.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import hashlib
+import os
+
+def get_git_dirs(repo_dir):
+    """Returns (git dir, common git dir) of a repository, they differ for worktrees. Raises OSError if unknown."""
+    git_dir = os.path.join(repo_dir, ".git")
+    if os.path.isfile(git_dir):
+        # Worktrees and submodules: ".git" is a file with 'gitdir: <path>'
+        git_dir = os.path.join(repo_dir, open(git_dir).read().strip().partition("gitdir: ")[2])
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, "commondir")
+    if os.path.exists(commondir_file):
+        common_dir = os.path.join(git_dir, open(commondir_file).read().strip())
+    return git_dir, common_dir
+
+def read_git_head(repo_dir):
+    """Returns (HEAD content, HEAD SHA1) of a repository without running git, (None, None) if unknown."""
+    try:
+        git_dir, common_dir = get_git_dirs(repo_dir)
+        head = open(os.path.join(git_dir, "HEAD")).read().strip()
+    except (OSError, IOError):
+        return None, None
+    if not head.startswith("ref: "):
+        return head, head
+    ref_name = head[len("ref: "):]
+    for ref_dir in (git_dir, common_dir):
+        ref_file = os.path.join(ref_dir, ref_name)
+        if os.path.isfile(ref_file):
+            return head, open(ref_file).read().strip()
+    packed_refs = os.path.join(common_dir, "packed-refs")
+    if os.path.exists(packed_refs):
+        for line in open(packed_refs):
+            sha1, dummy, packed_ref_name = line.strip().partition(" ")
+            if packed_ref_name == ref_name:
+                return head, sha1
+    return head, None
+
+def read_git_refs_digest(repo_dir):
+    """Returns a digest of the branches, remote branches and tags of a repository without running git, None if unknown."""
+    digest = hashlib.sha1()
+    try:
+        common_dir = get_git_dirs(repo_dir)[1]
+        packed_refs = os.path.join(common_dir, "packed-refs")
+        if os.path.exists(packed_refs):
+            with open(packed_refs, "rb") as f:
+                digest.update(f.read())
+        refs_dir = os.path.join(common_dir, "refs")
+        for dir_path, dir_names, file_names in os.walk(refs_dir):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                ref_file = os.path.join(dir_path, file_name)
+                with open(ref_file, "rb") as f:
+                    digest.update(("%s\n" % os.path.relpath(ref_file, refs_dir)).encode("utf-8") + f.read())
+    except (OSError, IOError):
+        return None
+    return digest.hexdigest()
+
+class GitStatus(object):
+    """Parsed output of 'git status --porcelain=v2 --branch'."""
+    def __init__(self, porcelain_output):
+        self.head_sha1 = None
+        self.branch = None
+        self.upstream = None
+        self.ahead = None
+        self.behind = None
+        self.staged = 0
+        self.modified = 0
+        self.conflicts = 0
+        self.untracked = 0
+        for line in porcelain_output.splitlines():
+            if line.startswith("# branch.oid "):
+                self.head_sha1 = line.split()[2]
+            elif line.startswith("# branch.head "):
+                branch = line.split()[2]
+                if branch != "(detached)":
+                    self.branch = branch
+            elif line.startswith("# branch.upstream "):
+                self.upstream = line.split()[2]
+            elif line.startswith("# branch.ab "):
+                ahead, behind = line.split()[2:4]
+                self.ahead, self.behind = int(ahead), -int(behind)
+            elif line.startswith("1 ") or line.startswith("2 "):
+                xy = line.split()[1]
+                if xy[0] != ".":
+                    self.staged += 1
+                if xy[1] != ".":
+                    self.modified += 1
+            elif line.startswith("u "):
+                self.conflicts += 1
+            elif line.startswith("? "):
+                self.untracked += 1
+    def is_dirty(self, untracked_files=False):
+        return self.staged + self.modified + self.conflicts + (self.untracked if untracked_files else 0) > 0
+    def get_branch_string(self):
+        if self.branch is None:
+            return "(detached at %s)" % (self.head_sha1 or "")[:10]
+        return self.branch
+    def get_ahead_behind_string(self):
+        if self.ahead is None:
+            return "-"
+        return "+%d/-%d" % (self.ahead, self.behind)
+    def get_state_string(self):
+        state_elems = ["%d %s" % (count, name) for count, name in [(self.conflicts, "conflicts"), (self.staged, "staged"),
+                                                                  (self.modified, "modified"), (self.untracked, "untracked")] if count]
+        return ", ".join(state_elems) or "clean"
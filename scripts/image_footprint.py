@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Image size tracking from the buildhistory data
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : image_footprint.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: buildhistory (BUILDHISTORY_COMMIT = "0") only keeps the data of
+#               the last build. This script appends the image and package sizes
+#               of every new build to an index in the build directory, shows the
+#               biggest packages and the size changes and checks the images
+#               against the size budgets (image-size-budgets.conf).
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import configparser
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+import size_units
+
+# One line per image and build, only the package sizes that changed are stored
+INDEX_FILE_NAME = "image_footprint_index.jsonl"
+
+class ImageHistory(object):
+    """The recorded builds of one image (<machine>/<image>)."""
+    def __init__(self, name):
+        self.name = name
+        self.runs = []
+        self.packages = {}
+        self.previous_packages = {}
+
+    def add_run(self, run):
+        self.runs.append(run)
+        self.previous_packages = dict(self.packages)
+        for package, size in run["packages_changed"].items():
+            if size is None:
+                self.packages.pop(package, None)
+            else:
+                self.packages[package] = size
+
+    def get_image_size(self, index=-1):
+        """Returns the size in KiB of the rootfs of the image, None if unknown."""
+        if len(self.runs) < -index:
+            return None
+        return self.runs[index]["image_size_kb"]
+
+def read_index(build_dir):
+    """Returns the ImageHistory of all images in the index of build_dir."""
+    images = {}
+    try:
+        with open(os.path.join(build_dir, INDEX_FILE_NAME)) as index_file:
+            for line in index_file:
+                if line.strip():
+                    run = json.loads(line)
+                    images.setdefault(run["image"], ImageHistory(run["image"])).add_run(run)
+    except (OSError, IOError):
+        pass
+    return images
+
+def read_image_info(image_dir):
+    """Returns (content digest, image size in KiB, {package: size in KiB}) of a buildhistory image directory."""
+    digest = hashlib.sha1()
+    image_size_kb = None
+    packages = {}
+    with open(os.path.join(image_dir, "image-info.txt"), "rb") as f:
+        image_info = f.read()
+    digest.update(image_info)
+    for line in image_info.decode("utf-8", "replace").splitlines():
+        name, dummy, value = line.partition("=")
+        if name.strip() == "IMAGESIZE" and value.strip().isdigit():
+            image_size_kb = int(value.strip())
+    package_sizes_file_name = os.path.join(image_dir, "installed-package-sizes.txt")
+    if os.path.exists(package_sizes_file_name):
+        with open(package_sizes_file_name, "rb") as f:
+            package_sizes = f.read()
+        digest.update(package_sizes)
+        for line in package_sizes.decode("utf-8", "replace").splitlines():
+            # '<size> KiB <package>'
+            fields = line.split()
+            if len(fields) == 3 and fields[0].isdigit():
+                packages[fields[2]] = int(fields[0])
+    return digest.hexdigest(), image_size_kb, packages
+
+def update_index(build_dir, images):
+    """Appends the images of the last build to the index, returns the names of the new images.
+
+    Only images whose buildhistory data changed since the last recorded build are read completely.
+    """
+    new_runs = []
+    image_dirs = glob.glob(os.path.join(build_dir, "buildhistory", "images", "*", "*", "*"))
+    for image_dir in sorted(image_dirs):
+        if not os.path.exists(os.path.join(image_dir, "image-info.txt")):
+            continue
+        machine, dummy, image = image_dir.split(os.sep)[-3:]
+        name = "%s/%s" % (machine, image)
+        history = images.setdefault(name, ImageHistory(name))
+        mtime = os.path.getmtime(os.path.join(image_dir, "image-info.txt"))
+        if history.runs and history.runs[-1]["mtime"] == mtime:
+            continue
+        digest, image_size_kb, packages = read_image_info(image_dir)
+        if history.runs and history.runs[-1]["digest"] == digest:
+            continue
+        packages_changed = dict((package, size) for package, size in packages.items() if history.packages.get(package) != size)
+        packages_changed.update((package, None) for package in history.packages if package not in packages)
+        run = {"image": name, "time": time.time(), "mtime": mtime, "digest": digest,
+               "image_size_kb": image_size_kb, "packages_changed": packages_changed}
+        history.add_run(run)
+        new_runs.append(run)
+    if new_runs:
+        with open(os.path.join(build_dir, INDEX_FILE_NAME), "a") as index_file:
+            for run in new_runs:
+                index_file.write(json.dumps(run, sort_keys=True) + "\n")
+    return [run["image"] for run in new_runs]
+
+def read_budgets(budget_files):
+    """Returns {image name or <machine>/<image>: budget in bytes} from the [budgets] section of budget_files."""
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    config.read([budget_file for budget_file in budget_files if os.path.exists(budget_file)])
+    if not config.has_section("budgets"):
+        return {}
+    return dict((name, size_units.parse_size(value)) for name, value in config.items("budgets"))
+
+def format_kb(size_kb):
+    return size_units.format_size(size_kb * 1024) if size_kb is not None else "-"
+
+def format_delta_kb(delta_kb):
+    return ("+" if delta_kb >= 0 else "-") + size_units.format_size(abs(delta_kb) * 1024)
+
+def print_image_report(history, top_n):
+    size_kb = history.get_image_size()
+    previous_size_kb = history.get_image_size(-2)
+    delta = ""
+    if size_kb is not None and previous_size_kb is not None:
+        delta = " (%s since the previous build)" % format_delta_kb(size_kb - previous_size_kb)
+    print("%s: %s%s, %d packages, %d builds recorded" % (history.name, format_kb(size_kb), delta, len(history.packages), len(history.runs)))
+    print("  Biggest packages:")
+    for package, package_size_kb in sorted(history.packages.items(), key=lambda item: item[1], reverse=True)[:top_n]:
+        print("    %12s  %s" % (format_kb(package_size_kb), package))
+    if len(history.runs) < 2:
+        return
+    changes = []
+    for package in set(history.packages) | set(history.previous_packages):
+        package_delta = history.packages.get(package, 0) - history.previous_packages.get(package, 0)
+        if package_delta:
+            changes.append((package_delta, package))
+    if changes:
+        print("  Biggest changes since the previous build:")
+        for package_delta, package in sorted(changes, key=lambda change: abs(change[0]), reverse=True)[:top_n]:
+            info = ""
+            if package not in history.previous_packages:
+                info = " (new)"
+            elif package not in history.packages:
+                info = " (removed)"
+            print("    %12s  %s%s" % (format_delta_kb(package_delta), package, info))
+
+def check_budgets(images, budgets):
+    """Returns the number of images that exceed their budget."""
+    failed_count = 0
+    for name, history in sorted(images.items()):
+        size_kb = history.get_image_size()
+        budget = budgets.get(name, budgets.get(name.split("/")[-1]))
+        if budget is None or size_kb is None:
+            continue
+        if size_kb * 1024 > budget:
+            print("ERROR: %s is %s, its size budget is %s" % (name, format_kb(size_kb), size_units.format_size(budget)), file=sys.stderr)
+            failed_count += 1
+        else:
+            print("%s: %s of %s size budget used" % (name, format_kb(size_kb), size_units.format_size(budget)))
+    return failed_count
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Records the image and package sizes of every build from buildhistory and checks the image size budgets.")
+    arg_parser.add_argument("build_dir", help="The build directory.")
+    arg_parser.add_argument("--budgets", action="append", default=[], metavar="FILE",
+                            help="File with a [budgets] section, e.g. 'msc-image-lxqt = 600M' (a <machine>/<image> entry overrides an <image> entry), can be given several times.")
+    arg_parser.add_argument("--check", action="store_true", help="Only check the size budgets, exit code 1 when an image exceeds its budget.")
+    arg_parser.add_argument("--top", type=int, default=10, help="Number of packages in the lists (default: 10).")
+    args = arg_parser.parse_args()
+
+    images = read_index(args.build_dir)
+    new_images = update_index(args.build_dir, images)
+    if new_images:
+        print("Recorded new builds of %s" % ", ".join(new_images))
+    if not images:
+        print("No buildhistory image data in %s" % os.path.join(args.build_dir, "buildhistory"))
+        return 0
+    if not args.check:
+        for name, history in sorted(images.items()):
+            print_image_report(history, args.top)
+    return 1 if check_budgets(images, read_budgets(args.budgets)) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Incremental installation of build artifacts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : install_artifacts.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Installs images and RPMs into DESTDIR for 'make install'.
+#               A manifest in the destination directory records size, mtime and
+#               checksum of the installed files, so only changed artifacts are
+#               copied. Reflinks or hardlinks are used when possible.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import concurrent.futures
+import fcntl
+import hashlib
+import json
+import os
+import sys
+
+from size_units import format_size
+
+MANIFEST_FILE_NAME = ".install_manifest.json"
+# ioctl to share the data blocks of two files (btrfs, xfs), see 'man ioctl_ficlone'
+FICLONE = 0x40049409
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+class Artifact(object):
+    """A file that is installed into the destination directory."""
+    def __init__(self, source, dest_dir):
+        self.source = source
+        self.name = os.path.basename(source)
+        self.dest = os.path.join(dest_dir, self.name)
+        self.source_stat = os.stat(source)
+        self.method = None
+        self.sha256 = None
+
+    def get_manifest_entry(self, source_root):
+        dest_stat = os.stat(self.dest)
+        return {"source": os.path.relpath(os.path.realpath(self.source), source_root),
+                "source_root": source_root,
+                "size": dest_stat.st_size,
+                "mtime_ns": dest_stat.st_mtime_ns,
+                "sha256": self.sha256}
+
+def read_manifest(dest_dir):
+    try:
+        with open(os.path.join(dest_dir, MANIFEST_FILE_NAME)) as f:
+            return json.load(f)
+    except (OSError, IOError, ValueError):
+        return {}
+
+def write_manifest(dest_dir, manifest):
+    manifest_file_name = os.path.join(dest_dir, MANIFEST_FILE_NAME)
+    with open(manifest_file_name + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(manifest_file_name + ".tmp", manifest_file_name)
+
+def get_sha256(file_name):
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def is_unchanged(artifact, manifest_entry):
+    """Checks whether the installed file is still identical to the source artifact."""
+    if manifest_entry is None or not os.path.exists(artifact.dest):
+        return False
+    dest_stat = os.stat(artifact.dest)
+    if dest_stat.st_size != manifest_entry["size"] or dest_stat.st_mtime_ns != manifest_entry["mtime_ns"]:
+        # Modified in DESTDIR
+        return False
+    if artifact.source_stat.st_size != dest_stat.st_size:
+        return False
+    if artifact.source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    # A rebuild may have deployed an identical file with a new mtime
+    if manifest_entry.get("sha256") and get_sha256(artifact.source) == manifest_entry["sha256"]:
+        artifact.sha256 = manifest_entry["sha256"]
+        os.utime(artifact.dest, ns=(artifact.source_stat.st_atime_ns, artifact.source_stat.st_mtime_ns))
+        return True
+    return False
+
+def try_reflink(source, tmp_dest):
+    try:
+        with open(source, "rb") as src, open(tmp_dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except (OSError, IOError):
+        if os.path.exists(tmp_dest):
+            os.unlink(tmp_dest)
+        return False
+    return True
+
+def try_hardlink(source, tmp_dest):
+    try:
+        os.link(source, tmp_dest)
+    except OSError:
+        return False
+    return True
+
+def copy_file(source, tmp_dest):
+    """Copies source to tmp_dest, returns the SHA256 of the content."""
+    sha256 = hashlib.sha256()
+    with open(source, "rb") as src, open(tmp_dest, "wb") as dst:
+        for block in iter(lambda: src.read(COPY_BUFFER_SIZE), b""):
+            sha256.update(block)
+            dst.write(block)
+    return sha256.hexdigest()
+
+def install_artifact(artifact, mode, use_links):
+    """Installs the artifact via a temporary file that atomically replaces the destination file."""
+    if use_links and os.path.exists(artifact.dest) and os.path.samefile(artifact.source, artifact.dest):
+        # Already hardlinked, os.replace() of a second link to the same file would do nothing
+        artifact.method = "hardlink"
+        return artifact
+    tmp_dest = os.path.join(os.path.dirname(artifact.dest), ".%s.tmp-%d" % (artifact.name, os.getpid()))
+    if use_links and try_reflink(artifact.source, tmp_dest):
+        artifact.method = "reflink"
+    elif use_links and artifact.source_stat.st_mode & 0o7777 == mode and try_hardlink(artifact.source, tmp_dest):
+        # A hardlink shares the mode with the source, so it is only used when no chmod is necessary
+        artifact.method = "hardlink"
+    else:
+        artifact.sha256 = copy_file(artifact.source, tmp_dest)
+        artifact.method = "copy"
+    try:
+        if os.stat(tmp_dest).st_mode & 0o7777 != mode:
+            os.chmod(tmp_dest, mode)
+        os.utime(tmp_dest, ns=(artifact.source_stat.st_atime_ns, artifact.source_stat.st_mtime_ns))
+        os.replace(tmp_dest, artifact.dest)
+    except OSError:
+        if os.path.exists(tmp_dest):
+            os.unlink(tmp_dest)
+        raise
+    return artifact
+
+def install_artifacts(sources, dest_dir, mode=0o644, jobs=4, use_links=True, exact=False, dry_run=False):
+    """Installs sources into dest_dir, returns the number of failed files.
+
+    Files that were installed before from the same source directory but are no longer
+    part of sources are removed. With exact, all files that are not part of sources are removed.
+    """
+    source_root = os.path.realpath(os.getcwd())
+    if not dry_run:
+        os.makedirs(dest_dir, exist_ok=True)
+    manifest = read_manifest(dest_dir)
+    artifacts = {}
+    for source in sources:
+        if not os.path.isfile(source):
+            continue
+        artifact = Artifact(source, dest_dir)
+        if artifact.name in artifacts:
+            print("WARNING: '%s' and '%s' are both installed as '%s', using '%s'" % (artifacts[artifact.name].source, source, artifact.name, source), file=sys.stderr)
+        artifacts[artifact.name] = artifact
+
+    changed_artifacts = []
+    unchanged_count = 0
+    for name, artifact in sorted(artifacts.items()):
+        manifest_entry = manifest.get(name)
+        if is_unchanged(artifact, manifest_entry):
+            unchanged_count += 1
+            manifest[name] = artifact.get_manifest_entry(source_root)
+            manifest[name]["sha256"] = manifest_entry.get("sha256")
+        else:
+            changed_artifacts.append(artifact)
+
+    # Stale files: installed before, but no longer built
+    stale_names = []
+    for name, entry in sorted(manifest.items()):
+        if name not in artifacts and (exact or entry.get("source_root") == source_root):
+            stale_names.append(name)
+    if exact and os.path.isdir(dest_dir):
+        stale_names.extend(name for name in sorted(os.listdir(dest_dir))
+                           if name not in artifacts and name not in stale_names and name != MANIFEST_FILE_NAME
+                           and os.path.isfile(os.path.join(dest_dir, name)))
+
+    failed_count = 0
+    installed_size = 0
+    methods = {}
+    if dry_run:
+        for artifact in changed_artifacts:
+            print("'%s' -> '%s' (dry-run)" % (artifact.source, artifact.dest))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            futures = [(artifact, executor.submit(install_artifact, artifact, mode, use_links)) for artifact in changed_artifacts]
+            for artifact, future in futures:
+                try:
+                    future.result()
+                except (OSError, IOError) as e:
+                    print("ERROR: Installing '%s' failed: %s" % (artifact.source, e), file=sys.stderr)
+                    manifest.pop(artifact.name, None)
+                    failed_count += 1
+                    continue
+                print("'%s' -> '%s' (%s)" % (artifact.source, artifact.dest, artifact.method))
+                manifest[artifact.name] = artifact.get_manifest_entry(source_root)
+                installed_size += artifact.source_stat.st_size
+                methods[artifact.method] = methods.get(artifact.method, 0) + 1
+
+    for name in stale_names:
+        stale_file = os.path.join(dest_dir, name)
+        print("Removing stale '%s'%s" % (stale_file, " (dry-run)" if dry_run else ""))
+        if not dry_run:
+            if os.path.exists(stale_file):
+                os.unlink(stale_file)
+            manifest.pop(name, None)
+
+    if not dry_run:
+        write_manifest(dest_dir, manifest)
+    method_info = ", ".join("%d %s" % (count, method) for method, count in sorted(methods.items()))
+    print("%s: %d %s%s (%s), %d unchanged, %d stale removed%s" % (
+        dest_dir, len(changed_artifacts) - failed_count, "to install" if dry_run else "installed", " [%s]" % method_info if method_info else "",
+        format_size(installed_size), unchanged_count, len(stale_names), ", %d failed" % failed_count if failed_count else ""))
+    return failed_count
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Installs build artifacts into a directory, only changed files are copied.")
+    arg_parser.add_argument("dest_dir", help="Destination directory.")
+    arg_parser.add_argument("files", nargs="*", help="Files to install (installed by their base name).")
+    arg_parser.add_argument("--files-from", metavar="FILE", help="Read the files to install from FILE (one per line, '-' for stdin).")
+    arg_parser.add_argument("--mode", default="644", help="File mode of the installed files (default: 644).")
+    arg_parser.add_argument("--jobs", type=int, default=4, help="Number of files that are installed in parallel (default: 4).")
+    arg_parser.add_argument("--no-links", action="store_true", help="Always copy, don't use reflinks or hardlinks.")
+    arg_parser.add_argument("--exact", action="store_true", help="Remove all files in the destination directory that are not installed.")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only show what would be done.")
+    args = arg_parser.parse_args()
+
+    files = list(args.files)
+    if args.files_from:
+        files_from = sys.stdin if args.files_from == "-" else open(args.files_from)
+        files.extend(line.rstrip("\n") for line in files_from if line.strip())
+    failed_count = install_artifacts(files, args.dest_dir, int(args.mode, 8), args.jobs, not args.no_links, args.exact, args.dry_run)
+    return 1 if failed_count else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
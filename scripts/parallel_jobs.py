@@ -0,0 +1,77 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Parallel jobs for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : parallel_jobs.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run independent jobs (e.g. git operations on layer repositories)
+#               in a bounded worker pool while keeping their log output ordered
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import traceback
+
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+class BufferedLog(object):
+    """Records the calls made to a MscBoost.Logging.Log() compatible object.
+
+    Each job logs into its own BufferedLog. The records are replayed into the
+    real log in job order, so the output of parallel jobs is not interleaved.
+    """
+    def __init__(self):
+        self.records = []
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.records.append((name, args, kwargs))
+        return record
+    def replay(self, log):
+        for name, args, kwargs in self.records:
+            getattr(log, name)(*args, **kwargs)
+        self.records = []
+
+class JobResult(object):
+    def __init__(self, name):
+        self.name = name
+        self.log = BufferedLog()
+        self.value = None
+        self.exception = None
+        self.traceback = None
+    def __repr__(self):
+        return "<JobResult %s %s>" % (self.name, "ok" if self.succeeded() else "failed")
+    def succeeded(self):
+        return self.exception is None
+
+def _run_job(result, function):
+    try:
+        result.value = function(log=result.log)
+    except Exception as e:
+        result.exception = e
+        result.traceback = traceback.format_exc()
+    return result
+
+def run_jobs(jobs, max_workers=DEFAULT_JOBS):
+    """Runs jobs with at most max_workers of them at the same time.
+
+    jobs is a list of (name, function) tuples, function is called as function(log=log).
+    Yields a JobResult for every job in the order of jobs, as soon as the job and
+    all jobs before it are finished. A failing job does not stop the other jobs.
+    """
+    results = [JobResult(name) for name, dummy in jobs]
+    if max_workers is None or max_workers < 1:
+        max_workers = 1
+    if max_workers == 1 or len(jobs) <= 1:
+        for result, (dummy, function) in zip(results, jobs):
+            yield _run_job(result, function)
+        return
+    # Imported here: loading concurrent.futures is a noticeable part of the script startup time
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_job, result, function) for result, (dummy, function) in zip(results, jobs)]
+        for future in futures:
+            yield future.result()
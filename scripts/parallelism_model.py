@@ -0,0 +1,117 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Parallelism model of the build host
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : parallelism_model.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Derives the number of parallel build jobs from the CPUs, memory
+#               and disk space of the build host and parallelism.conf. Used by
+#               setup.py for local.conf and by build_coordinator.py for the job
+#               budget shared by several builds.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import configparser
+import os
+import shutil
+
+def get_host_cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def get_host_memory_gb():
+    """Returns the memory of the build host in GiB, None if unknown."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) / (1024.0 * 1024.0)
+    except (OSError, IOError):
+        pass
+    return None
+
+class ParallelismModel(object):
+    """Derives BB_NUMBER_THREADS and PARALLEL_MAKE from the cores, memory and disk space of the build host.
+
+    Every compile job is assumed to need memory_per_job_gb of memory, so the
+    memory allows a limited number of jobs on the whole host. BB_NUMBER_THREADS
+    and the make jobs of a single task are both kept at the CPU count unless
+    the memory allows fewer jobs. The make load limit ('-l') bounds the jobs of
+    all running tasks together, it is the CPU count or the memory jobs if lower.
+    """
+    def __init__(self, model_files):
+        self.config = configparser.ConfigParser()
+        self.model_files = [model_file for model_file in model_files if os.path.exists(model_file)]
+        self.config.read(self.model_files)
+
+    def get_value(self, name, fallback):
+        return self.config.getfloat("parallelism", name, fallback=fallback)
+
+    def get_memory_jobs(self, memory_gb):
+        """Returns the number of compile jobs that fit into memory_gb, None if the memory is unknown."""
+        memory_per_job_gb = self.get_value("memory_per_job_gb", 2)
+        if memory_gb is None or memory_per_job_gb <= 0:
+            return None
+        return max(1, int((memory_gb - self.get_value("reserved_memory_gb", 2)) / memory_per_job_gb))
+
+    def get_job_budget(self, cpu_count=None, memory_gb=None):
+        """Returns (jobs, description): the compile jobs the whole build host can run at the same time."""
+        if cpu_count is None:
+            cpu_count = get_host_cpu_count()
+        if memory_gb is None:
+            memory_gb = get_host_memory_gb()
+        jobs = cpu_count
+        description = "%d CPUs" % cpu_count
+        memory_jobs = self.get_memory_jobs(memory_gb)
+        if memory_jobs is not None:
+            description += ", %.1f GiB memory (%d jobs)" % (memory_gb, memory_jobs)
+            jobs = min(jobs, memory_jobs)
+        return jobs, description
+
+    def calculate(self, build_dir, cpu_count=None, memory_gb=None):
+        """Returns (bb_number_threads, parallel_make, report_lines)."""
+        if cpu_count is None:
+            cpu_count = get_host_cpu_count()
+        if memory_gb is None:
+            memory_gb = get_host_memory_gb()
+        report = []
+        memory_jobs = self.get_memory_jobs(memory_gb)
+        if memory_jobs is not None:
+            report.append("Build host: %d CPUs, %.1f GiB memory (model: %.1f GiB per job, %.1f GiB reserved -> %d jobs)" %
+                          (cpu_count, memory_gb, self.get_value("memory_per_job_gb", 2), self.get_value("reserved_memory_gb", 2), memory_jobs))
+        else:
+            report.append("Build host: %d CPUs, memory size unknown" % cpu_count)
+        # Jobs of the whole host: make starts no new job while the load is above it
+        load_limit = cpu_count
+        limit_info = "limited by %d CPUs" % cpu_count
+        if memory_jobs is not None and memory_jobs < cpu_count:
+            load_limit = memory_jobs
+            limit_info = "limited by memory: %d jobs" % memory_jobs
+        bb_number_threads = load_limit
+        max_bb_number_threads = int(self.get_value("max_bb_number_threads", 0))
+        if max_bb_number_threads and max_bb_number_threads < bb_number_threads:
+            bb_number_threads = max_bb_number_threads
+        make_jobs = load_limit
+        max_parallel_make = int(self.get_value("max_parallel_make", 0))
+        if max_parallel_make and max_parallel_make < make_jobs:
+            make_jobs = max_parallel_make
+        parallel_make = "-j %d -l %d" % (make_jobs, load_limit)
+        report.append("BB_NUMBER_THREADS = %d, PARALLEL_MAKE = %s (%s)" % (bb_number_threads, parallel_make, limit_info))
+        if self.model_files:
+            report.append("Parallelism model: %s" % ", ".join(self.model_files))
+        min_free_disk_gb = self.get_value("min_free_disk_gb", 100)
+        disk_dir = build_dir
+        while not os.path.exists(disk_dir):
+            disk_dir = os.path.dirname(disk_dir)
+        free_disk_gb = shutil.disk_usage(disk_dir).free / (1024.0 ** 3)
+        if free_disk_gb < min_free_disk_gb:
+            report.append("Only %.1f GiB of free disk space in %s (a full build needs at least %d GiB)" % (free_disk_gb, disk_dir, min_free_disk_gb))
+        else:
+            report.append("%.1f GiB of free disk space in %s" % (free_disk_gb, disk_dir))
+        return bb_number_threads, parallel_make, report
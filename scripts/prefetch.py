@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Download the sources of all build directories
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : prefetch.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Runs 'bitbake -c fetchall' for the IMAGE_TYPES of several build
+#               directories at low CPU priority and with many parallel
+#               downloads, so the builds can run without network access.
+#               No union of the source URIs is computed up front: every build
+#               directory costs a full recipe parse, sources shared by several
+#               of them are downloaded once because bitbake locks them in the
+#               shared DL_DIR. The sources that could not be downloaded are
+#               taken from the fetcher errors in the logs.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+POSTFILE_NAME = "prefetch.conf"
+LOG_FILE_NAME = "prefetch.log"
+
+# Downloads are limited by the network, not by the CPUs
+POSTFILE_TEMPLATE = """# Written by prefetch.py
+BB_NUMBER_THREADS = "%(fetch_jobs)d"
+"""
+
+FETCH_FAILURE_RE = re.compile(r"Fetcher failure for URL: '([^']+)'")
+FAILED_TASK_RE = re.compile(r"\(([^,()]+), do_fetch\) failed")
+
+class Prefetch(object):
+    """The fetch of one build directory."""
+    def __init__(self, build_dir):
+        self.build_dir = os.path.realpath(build_dir)
+        self.name = os.path.basename(self.build_dir)
+        self.postfile = os.path.join(self.build_dir, "conf", POSTFILE_NAME)
+        self.log_file_name = os.path.join(self.build_dir, LOG_FILE_NAME)
+        self.process = None
+        self.start_time = None
+        self.duration = None
+
+    def start(self, fetch_jobs, nice):
+        with open(self.postfile, "w") as f:
+            f.write(POSTFILE_TEMPLATE % {"fetch_jobs": fetch_jobs})
+        bitbake_flags = "-k -R %s" % self.postfile
+        with open(self.log_file_name, "w") as log_file:
+            self.process = subprocess.Popen(["nice", "-n", str(nice), "make", "-C", self.build_dir, "fetch", "BITBAKE_FLAGS=%s" % bitbake_flags],
+                                            stdout=log_file, stderr=subprocess.STDOUT)
+        self.start_time = time.time()
+
+    def wait(self):
+        self.process.wait()
+        self.duration = time.time() - self.start_time
+        if os.path.exists(self.postfile):
+            os.unlink(self.postfile)
+        return self.process.returncode
+
+    def get_failures(self):
+        """Returns (failed URLs, recipes with failed do_fetch) from the log."""
+        failed_urls = set()
+        failed_recipes = set()
+        with open(self.log_file_name, errors="replace") as log_file:
+            for line in log_file:
+                for url in FETCH_FAILURE_RE.findall(line):
+                    failed_urls.add(url)
+                for recipe in FAILED_TASK_RE.findall(line):
+                    failed_recipes.add(os.path.basename(recipe))
+        return failed_urls, failed_recipes
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Downloads the sources of the IMAGE_TYPES of all build directories into DL_DIR. "
+                                         "Runs one 'bitbake -c fetchall' (with a full recipe parse) per build directory, all at the same time.")
+    arg_parser.add_argument("build_dirs", nargs="+", help="The build directories (e.g. build/01011-lxqt).")
+    arg_parser.add_argument("--fetch-jobs", type=int, default=16, help="Number of parallel downloads per build directory (default: 16).")
+    arg_parser.add_argument("--nice", type=int, default=19, help="CPU priority (nice value) of the fetch (default: 19).")
+    args = arg_parser.parse_args()
+
+    prefetches = []
+    for build_dir in args.build_dirs:
+        if not os.path.isfile(os.path.join(build_dir, "conf", "local.conf")):
+            print("ERROR: '%s' is no build directory created by setup.py" % build_dir, file=sys.stderr)
+            return 1
+        prefetches.append(Prefetch(build_dir))
+
+    # All build directories are fetched at the same time, each bitbake parses all recipes of its build
+    # directory. Sources needed by several of them are downloaded only once: bitbake locks a download in
+    # the shared DL_DIR and skips finished ones.
+    for prefetch in prefetches:
+        print("Fetching the sources of %s (log: %s)" % (prefetch.name, prefetch.log_file_name))
+        prefetch.start(args.fetch_jobs, args.nice)
+    missing_urls = {}
+    failed_count = 0
+    for prefetch in prefetches:
+        returncode = prefetch.wait()
+        failed_urls, failed_recipes = prefetch.get_failures()
+        if returncode != 0:
+            failed_count += 1
+        print("%s: %s after %ds%s" % (prefetch.name, "ok" if returncode == 0 else "failed", prefetch.duration,
+                                      " (do_fetch failed for %s)" % ", ".join(sorted(failed_recipes)) if failed_recipes else ""))
+        for url in failed_urls:
+            missing_urls.setdefault(url, []).append(prefetch.name)
+
+    if missing_urls:
+        print("%d sources could not be downloaded:" % len(missing_urls))
+        for url, names in sorted(missing_urls.items()):
+            print("  %s (needed by %s)" % (url, ", ".join(names)))
+    elif not failed_count:
+        print("All sources are in DL_DIR, the builds can run without network access (BB_NO_NETWORK = \"1\")")
+    return 1 if failed_count or missing_urls else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
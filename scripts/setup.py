@@ -15,6 +15,11 @@
 
 import sys
 
+import startup_profile
+startup_profile.start()
+import trace_events
+trace_events.start()
+
 print("""
 MSC-LDK has been moved. This repository will no longer be updated.
 Please fetch MSC-LDK from the new repository:
@@ -25,28 +30,65 @@ You can move the directories downloads/ and sstate-cache/ from this directory to
 """)
 
 import bootstrap_msc_boost_python
-bootstrap_msc_boost_python.bootstrap_msc_boost_python("v0.4.2")
+with trace_events.span("bootstrap libMscBoostPython"):
+    bootstrap_msc_boost_python.bootstrap_msc_boost_python("v0.4.2")
 
+import argparse
 import configparser
+import copy
 import datetime
+import fcntl
+import functools
 import glob
+import getpass
+import hashlib
+import io
+import itertools
+import json
 import os
+import re
+import shlex
+import socket
 import subprocess
+import threading
+
+import git_state
+import parallel_jobs
+import parallelism_model
+import version_layer
 
 import MscBoost.Logging as Logging
-import MscBoost.Git as Git
 import MscBoost.Util as Util
-import MscBoost.MscProject as MscProject
 
 from MscBoost.Application import Application
-from MscBoost.FilePath import FilePath
-from MscBoost.FindBestMatch import FindBestMatch
 
-MSC_GIT_SERVER = Git.get_git_server()
-MSC_GIT_SERVER_CACHE = Git.get_git_server_cache()
+# The git object cache (--git-cache) is only used when it is requested, e.g. MSC_LDK_GIT_OBJECT_CACHE=~/.cache/msc-ldk/git
+MSC_LDK_GIT_OBJECT_CACHE = os.getenv("MSC_LDK_GIT_OBJECT_CACHE", "")
+
+# Read-only sstate mirror with the directory layout of SSTATE_DIR (e.g. filled by the nightly builds with sstate_publish.py)
+MSC_LDK_SSTATE_MIRROR = os.getenv("MSC_LDK_SSTATE_MIRROR", "")
+
+# MSC_LDK_IGNORE_MOVED=1 runs the setup in spite of the "MSC-LDK has been moved" stop (used by benchmark.py)
+MSC_LDK_IGNORE_MOVED = os.getenv("MSC_LDK_IGNORE_MOVED", "")
+
+# Layer worktrees (--layer-worktrees) are created in sources/worktrees/<git ref>/<repo>.git
+LAYER_WORKTREES_DIR_NAME = "worktrees"
 
 LOG = Logging.Log()
 
+# MscBoost.Git (and gitpython) is imported by the functions that access the git server or a repository,
+# not on every code path (e.g. --help)
+
+@functools.lru_cache()
+def get_msc_git_server():
+    import MscBoost.Git as Git
+    return Git.get_git_server()
+
+@functools.lru_cache()
+def get_msc_git_server_cache():
+    import MscBoost.Git as Git
+    return Git.get_git_server_cache()
+
 GIT_LOG_PRETTY_ONE_LINE_FORMAT = '--pretty=format:%C(auto)%H - %an, %ar : %Cgreen%s%C(auto)%d'
 
 def cmd_exists(cmd):
@@ -68,6 +110,7 @@ def check_tools():
 
 def check_git_access():
     LOG.info("Checking access to git server")
+    import MscBoost.Git as Git
     if Git.check_git_access():
         LOG.notice("o.k.")
     else:
@@ -92,39 +135,311 @@ def ensure_ssh_mirror_is_known():
     LOG.info("Added host 'ftp4.ebv.com' to %s" % known_hosts_file)
     return True
 
+def get_sources_relative_path(msc_ldk_dir, path):
+    """Returns path relative to sources/, layer worktrees are mapped to the path in their repository."""
+    path = path[len(os.path.join(msc_ldk_dir, "sources/")):]
+    if path.startswith(LAYER_WORKTREES_DIR_NAME + "/"):
+        path = path[len(LAYER_WORKTREES_DIR_NAME + "/"):].partition("/")[2]
+    return path
+
+def read_file_maybe(file_name):
+    """Returns the content of file_name, None if it does not exist."""
+    try:
+        with open(file_name) as f:
+            return f.read()
+    except (OSError, IOError):
+        return None
+
+def get_sstate_mirrors_entry(sstate_mirror):
+    """Returns the SSTATE_MIRRORS value for a mirror with the layout of SSTATE_DIR, None for an unsupported URL."""
+    sstate_mirror = sstate_mirror.rstrip("/")
+    if sstate_mirror.startswith("file://"):
+        return "file://.* %s/PATH" % sstate_mirror
+    if sstate_mirror.startswith("http://") or sstate_mirror.startswith("https://"):
+        return "file://.* %s/PATH;downloadfilename=PATH" % sstate_mirror
+    return None
+
+class SetupFingerprint(object):
+    """Fingerprint of everything that determines the result of a setup.py run for a BSP build directory.
+
+    It covers the .csv files, the HEAD, branches and tags of all layer repositories,
+    the local.conf inputs and the generated .conf files. It is stored next to .setup_cmdline.txt.
+    """
+    FILE_NAME = ".setup_fingerprint.json"
+
+    def __init__(self):
+        self.inputs = {}
+        self.extra_info = {}
+
+    def add_value(self, name, value):
+        self.inputs[name] = str(value)
+
+    def add_file(self, file_name):
+        try:
+            with open(file_name, "rb") as f:
+                self.inputs["file %s" % file_name] = hashlib.sha1(f.read()).hexdigest()
+        except (OSError, IOError):
+            self.inputs["file %s" % file_name] = "missing"
+
+    def add_repository(self, repo_dir):
+        head, sha1 = git_state.read_git_head(repo_dir)
+        self.inputs["HEAD of %s" % repo_dir] = "%s %s" % (head, sha1)
+        # The git ref a layer is checked out on depends on the branches and tags present (see find_best_git_ref())
+        self.inputs["Refs of %s" % repo_dir] = str(git_state.read_git_refs_digest(repo_dir))
+
+    def get_digest(self):
+        return hashlib.sha1(json.dumps(self.inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get_changed_inputs(self, other):
+        """Returns the names of the inputs that differ from the other fingerprint."""
+        names = sorted(set(self.inputs) | set(other.inputs))
+        return [name for name in names if self.inputs.get(name) != other.inputs.get(name)]
+
+    @classmethod
+    def load(cls, bsp_build_root):
+        fingerprint = cls()
+        try:
+            with open(os.path.join(bsp_build_root, cls.FILE_NAME)) as f:
+                data = json.load(f)
+        except (OSError, IOError, ValueError):
+            return None
+        fingerprint.inputs = data.get("inputs", {})
+        fingerprint.extra_info = data.get("extra_info", {})
+        return fingerprint
+
+    def save(self, bsp_build_root):
+        data = {"digest": self.get_digest(), "inputs": self.inputs, "extra_info": self.extra_info}
+        with open(os.path.join(bsp_build_root, self.FILE_NAME), "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def remove(cls, bsp_build_root):
+        fingerprint_file = os.path.join(bsp_build_root, cls.FILE_NAME)
+        if os.path.exists(fingerprint_file):
+            os.unlink(fingerprint_file)
+
+class GitObjectCache(object):
+    """Persistent bare mirrors of the layer repositories on this host (setup.py --git-cache).
+
+    The mirrors are kept per server URL. A new layer clone is made from the
+    refreshed mirror without network access, its origin is set to the git
+    server afterwards. The clone gets its own copy (or hardlinks) of the
+    objects unless share_objects is set: then it borrows them from the mirror
+    via git alternates and breaks when the cache is deleted.
+    """
+    def __init__(self, cache_dir, share_objects=False):
+        self.cache_dir = cache_dir
+        self.share_objects = share_objects
+    def __repr__(self):
+        return "<GitObjectCache %s>" % self.cache_dir
+    def mirror_dir(self, repo):
+        """Returns the mirror of the repository URL repo, e.g. <cache_dir>/gitolite@msc-git02.msc-ge.com_9418/msc/C984/msc-ldk-bsp-recipes.git."""
+        mirror_name = os.path.normpath(re.sub(r"^[a-z+]+://", "", repo).strip("/"))
+        mirror_name = re.sub(r"[^A-Za-z0-9@._/-]", "_", mirror_name).replace("..", "__")
+        return os.path.join(self.cache_dir, mirror_name + ".git")
+    def _git(self, *args):
+        subprocess.check_output(["git"] + list(args), stderr=subprocess.STDOUT)
+    def update_mirror(self, repo, mirror_dir, log=LOG):
+        if os.path.isdir(mirror_dir):
+            log.out(1, "  Refreshing git object cache '%s'" % mirror_dir)
+            self._git("--git-dir", mirror_dir, "fetch", "--prune", "--quiet", "origin")
+        else:
+            log.out(1, "  Creating git object cache '%s'" % mirror_dir)
+            self._git("clone", "--mirror", "--quiet", repo, mirror_dir)
+            # Clones may borrow objects from the mirror -> never let git drop unreachable objects here
+            self._git("--git-dir", mirror_dir, "config", "gc.auto", "0")
+            self._git("--git-dir", mirror_dir, "config", "gc.pruneExpire", "never")
+    def clone(self, repo, install_to, log=LOG):
+        mirror_dir = self.mirror_dir(repo)
+        os.makedirs(os.path.dirname(mirror_dir), exist_ok=True)
+        # Several setup.py runs (e.g. CI workspaces) may share the cache -> serialize the access to a mirror
+        with open(mirror_dir + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.update_mirror(repo, mirror_dir, log)
+            except subprocess.CalledProcessError as e:
+                log.notice("Git object cache for '%s' is not usable, cloning without cache (%s)" % (repo, e.output.decode("utf-8", "replace").strip()))
+                import MscBoost.Git as Git
+                Git.clone(repo, install_to)
+                return
+            clone_args = ["clone", "--quiet"]
+            if self.share_objects:
+                clone_args.append("--shared")
+            self._git(*(clone_args + [mirror_dir, install_to]))
+        self._git("-C", install_to, "remote", "set-url", "origin", repo)
+
+class GitRefIndex(object):
+    """Branches, tags and their SHA1s of a repository, read with a single 'git for-each-ref'.
+
+    The index of a repository is built once and reused for the whole run,
+    use GitRefIndex.invalidate() after operations that change refs.
+    """
+    _indexes = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def for_repository(cls, repo_dir):
+        key = os.path.realpath(repo_dir)
+        with cls._lock:
+            index = cls._indexes.get(key)
+        if index is None:
+            index = cls(key)
+            with cls._lock:
+                cls._indexes[key] = index
+        return index
+
+    @classmethod
+    def invalidate(cls, repo_dir):
+        with cls._lock:
+            cls._indexes.pop(os.path.realpath(repo_dir), None)
+
+    def __init__(self, repo_dir):
+        self.repo_dir = repo_dir
+        self.local_branches = {}
+        self.remote_branches = {}
+        self.tags = {}
+        output = subprocess.check_output(["git", "for-each-ref", "--format=%(objectname) %(*objectname) %(refname)"],
+                                         cwd=repo_dir, universal_newlines=True)
+        for line in output.splitlines():
+            sha1, peeled_sha1, ref_name = line.split(" ", 2)
+            if ref_name.startswith("refs/heads/"):
+                self.local_branches[ref_name[len("refs/heads/"):]] = sha1
+            elif ref_name.startswith("refs/remotes/"):
+                # e.g. refs/remotes/origin/jethro-msc -> jethro-msc
+                branch_name = ref_name[len("refs/remotes/"):].partition("/")[2]
+                if branch_name != "HEAD":
+                    self.remote_branches.setdefault(branch_name, sha1)
+            elif ref_name.startswith("refs/tags/"):
+                # Annotated tags: use the SHA1 of the tagged commit
+                self.tags[ref_name[len("refs/tags/"):]] = peeled_sha1 or sha1
+        self.known_sha1s = set(self.local_branches.values()) | set(self.remote_branches.values()) | set(self.tags.values())
+
+    def __repr__(self):
+        return "<GitRefIndex %s>" % self.repo_dir
+
+    def get_branch_names(self, local=True, remote=False):
+        branch_names = []
+        if local:
+            branch_names.extend(sorted(self.local_branches))
+        if remote:
+            branch_names.extend(sorted(b for b in self.remote_branches if b not in self.local_branches or not local))
+        return branch_names
+
+    def get_tag_names(self):
+        return sorted(self.tags)
+
+    def is_branch_present(self, branch):
+        return branch in self.local_branches or branch in self.remote_branches
+
+    def get_sha1_for_version(self, version):
+        """Returns the commit SHA1 for a branch, tag or SHA1 known from the refs, None otherwise."""
+        if version in self.known_sha1s:
+            return version
+        for refs in (self.tags, self.local_branches, self.remote_branches):
+            if version in refs:
+                return refs[version]
+        return None
+
+@functools.lru_cache()
+def get_git_status_options():
+    """Returns git options that speed up 'git status': the untracked cache and, where git supports it, the builtin fsmonitor."""
+    options = ["-c", "core.untrackedCache=true"]
+    # e.g. 'git version 2.39.3 (Apple Git-145)'
+    git_version_output = subprocess.run(["git", "version"], stdout=subprocess.PIPE, universal_newlines=True).stdout
+    match = re.search(r"(\d+)\.(\d+)", git_version_output)
+    if match is None:
+        LOG.out(1, "Unknown git version '%s', the builtin fsmonitor is not used" % git_version_output.strip())
+        return options
+    git_version = (int(match.group(1)), int(match.group(2)))
+    # The builtin fsmonitor daemon is available since git 2.36 on macOS and Windows
+    if sys.platform in ("darwin", "win32") and git_version >= (2, 36):
+        options.extend(["-c", "core.fsmonitor=true"])
+    return options
+
 class MscLdkLayerDirectory(object):
     def __init__(self, msc_ldk_dir, layer_directory):
         self.full_layer_directory = layer_directory
         sources_prefix = os.path.join(msc_ldk_dir, "sources/")
         if layer_directory.startswith(sources_prefix):
-            self.layer_directory = layer_directory[len(sources_prefix):]
+            self.layer_directory = get_sources_relative_path(msc_ldk_dir, layer_directory)
         elif layer_directory == msc_ldk_dir:
             self.layer_directory = "msc-ldk"
         else:
             self.layer_directory = layer_directory
-        self.git_repo = GitRepository(layer_directory)
+        self.git_repo = get_git_repository(layer_directory)
     def __repr__(self):
         return "<Layer %s>" % self.layer_directory
     def get_head_sha1(self):
         return self.git_repo.get_head_sha1()
+    def get_ref_index(self):
+        return GitRefIndex.for_repository(self.full_layer_directory)
+    def get_checkout_state(self):
+        """Returns (branch, SHA1) of HEAD, branch is None for a detached HEAD."""
+        head, sha1 = git_state.read_git_head(self.full_layer_directory)
+        if sha1 is None:
+            sha1 = self.get_head_sha1()
+        branch = None
+        if head is not None and head.startswith("ref: refs/heads/"):
+            branch = head[len("ref: refs/heads/"):]
+        return branch, sha1
+    def resolve_versions(self, versions):
+        """Resolves versions (SHA1s, tags, branches, describe strings) to commit SHA1s.
+
+        Versions that are not known from the ref index are checked with a single
+        'git cat-file --batch-check' call. Missing versions are resolved to None.
+        """
+        sha1s = {}
+        unknown_versions = []
+        ref_index = self.get_ref_index()
+        for version in versions:
+            sha1 = ref_index.get_sha1_for_version(version)
+            if sha1 is None:
+                unknown_versions.append(version)
+            else:
+                sha1s[version] = sha1
+        if unknown_versions:
+            for version in unknown_versions:
+                sha1s.setdefault(version, None)
+            batch_input = "".join("%s^{commit}\n" % version for version in unknown_versions)
+            batch_check = subprocess.run(["git", "cat-file", "--batch-check"], input=batch_input, cwd=self.full_layer_directory,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            if batch_check.returncode != 0:
+                raise Exception("git cat-file --batch-check failed in '%s': %s" % (self.full_layer_directory, batch_check.stderr.strip()))
+            # Output per line: '<sha1> <type> <size>' or '<version> missing'
+            for version, line in zip(unknown_versions, batch_check.stdout.splitlines()):
+                fields = line.split()
+                if len(fields) == 3 and fields[1] == "commit":
+                    sha1s[version] = fields[0]
+        return sha1s
+    def get_status(self, untracked_files=True):
+        """Returns the GitStatus of the layer repository."""
+        status_cmd = ["git"] + get_git_status_options() + ["status", "--porcelain=v2", "--branch",
+                                                           "--untracked-files=%s" % ("normal" if untracked_files else "no")]
+        status = subprocess.run(status_cmd, cwd=self.full_layer_directory, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if status.returncode != 0:
+            raise Exception("git status failed in '%s': %s" % (self.full_layer_directory, status.stderr.strip()))
+        return git_state.GitStatus(status.stdout)
+    def is_dirty(self):
+        return self.get_status(untracked_files=False).is_dirty()
+    def get_sha1_for_version(self, version):
+        sha1 = self.resolve_versions([version])[version]
+        if sha1 is None:
+            sha1 = self.git_repo.get_sha1_for_version(version)
+        return sha1
     def is_sha1_present(self, sha1):
-        try:
-            subprocess.check_call(["git", "cat-file", "-e", sha1], cwd=self.full_layer_directory, stderr=subprocess.PIPE)
-        except subprocess.CalledProcessError:
-            return False
-        return True
+        return self.resolve_versions([sha1])[sha1] is not None
     def is_branch_present(self, branch):
-        branch_names = self.git_repo.get_branch_names(local=True, remote=True)
-        return branch in branch_names
+        return self.get_ref_index().is_branch_present(branch)
     def is_msc_ldk(self):
         return self.layer_directory == "msc-ldk"
 
 class MscLdkSnapshot(object):
-    def __init__(self, msc_ldk_dir, id_string, bsp_build_root, bsp_mapping):
+    def __init__(self, msc_ldk_dir, id_string, bsp_build_root, bsp_mapping, jobs=parallel_jobs.DEFAULT_JOBS):
         self.msc_ldk_dir = msc_ldk_dir
         self.id_string = id_string
         self.bsp_build_root = bsp_build_root
         self.bsp_mapping = bsp_mapping
+        self.jobs = jobs
 
     def parse_bblayers(self, file_name):
         WAIT_FOR_BBLAYERS, BUILD_BBLAYERS, DONE = range(3)
@@ -150,7 +465,7 @@ class MscLdkSnapshot(object):
         bblayers_conf = os.path.join(self.bsp_build_root, "conf", "bblayers.conf")
         for layer in self.parse_bblayers(bblayers_conf):
             dir_candidate = layer
-            layer_name = layer[len(os.path.join(self.msc_ldk_dir, "sources/")):]
+            layer_name = get_sources_relative_path(self.msc_ldk_dir, layer)
             while dir_candidate:
                 if os.path.exists(os.path.join(dir_candidate, ".git")):
                     if dir_candidate not in repo_list:
@@ -168,6 +483,7 @@ class MscLdkSnapshot(object):
     def get_layer_directories(self, include_msc_ldk=True):
         return [MscLdkLayerDirectory(self.msc_ldk_dir, layer_directory) for layer_directory in self.get_ldk_layers(include_msc_ldk)]
 
+    @trace_events.traced()
     def show_layer_info(self):
         for layer_directory in self.get_layer_directories():
             layers = self.layer_repo_layers.get(layer_directory)
@@ -181,72 +497,86 @@ class MscLdkSnapshot(object):
             print(Logging.colorize(Logging.COLOR.pink, header))
             print(Util.indent_text(layer_directory.git_repo.git.log(GIT_LOG_PRETTY_ONE_LINE_FORMAT, '-5')))
 
+    def get_layer_status(self, layer_directory, untracked_files=True, log=LOG):
+        return layer_directory.get_status(untracked_files)
+
+    def show_layer_status(self):
+        """Shows branch, ahead/behind and working tree state of all layer repositories (checked in parallel)."""
+        start_time = datetime.datetime.now()
+        layer_directories = self.get_layer_directories()
+        status_jobs = [(layer_directory, functools.partial(self.get_layer_status, layer_directory)) for layer_directory in layer_directories]
+        rows = []
+        for result in parallel_jobs.run_jobs(status_jobs, self.jobs):
+            result.log.replay(LOG)
+            if result.succeeded():
+                status = result.value
+                rows.append((result.name.layer_directory, status.get_branch_string(), status.get_ahead_behind_string(), status.get_state_string(), status.is_dirty(untracked_files=True)))
+            else:
+                LOG.error("Layer %s: %s" % (result.name.layer_directory, result.exception))
+        if not rows:
+            return
+        layer_width = max(len("Layer"), *[len(row[0]) for row in rows])
+        branch_width = max(len("Branch"), *[len(row[1]) for row in rows])
+        row_format = "%%-%ds  %%-%ds  %%-13s %%s" % (layer_width, branch_width)
+        LOG.out(0, row_format % ("Layer", "Branch", "Ahead/Behind", "State"))
+        for layer_name, branch, ahead_behind, state, dirty in rows:
+            line = row_format % (layer_name, branch, ahead_behind, state)
+            if dirty:
+                line = Logging.colorize(Logging.COLOR.pink, line)
+            LOG.out(0, line)
+        LOG.out(2, "Status of %d layer repositories determined in %s" % (len(rows), datetime.datetime.now() - start_time))
+
     def read_version_layer(self, file_name):
+        """Reads a snapshot INI file or a legacy version_layer file in a single pass, returns False for an empty file."""
+        with open(file_name) as version_file:
+            first_line = None
+            for line in version_file:
+                if line.strip() and not line.lstrip().startswith(("#", ";")):
+                    first_line = line
+                    break
+            if first_line is None:
+                LOG.error("Version file '%s' is empty" % file_name)
+                return False
+            if first_line.lstrip().startswith("["):
+                snapshot = configparser.ConfigParser()
+                snapshot.read_file(itertools.chain([first_line], version_file), file_name)
+            else:
+                snapshot = version_layer.parse_version_layer_lines(itertools.chain([first_line], version_file), self.bsp_mapping)
+        self.snapshot_origin = ("--version-file", os.path.abspath(file_name))
+        self.snapshot = snapshot
+        return True
+
+    def create_snapshot(self):
+        """Returns a snapshot with the HEAD SHA1, branch and dirty flag of all layers (one git status call per layer, in parallel)."""
         snapshot = configparser.ConfigParser()
         snapshot["general"] = {}
-        snapshot["general"]["comment"] = "Converted version_layer on %s" % Util.get_timestamp_string()
-        snapshot["general"]["version_layer"] = "True"
-        # pass1: read MSC-LDK version and SETUP parameters
-        for line in open(file_name).readlines():
-            line = line.strip()
-            if " built on " in line:
-                # e.g.: MSC-LDK initial_separated-103-gaeccd82-dirty built on Sat Sep 17 00:42:41 CEST 2016 by buildserver@destsm3ux05bs01.emea.avnet.com
-                version, dummy, time_and_machine = line.partition(" built on ")
-                version = version.split(" ")[1]
-                timestamp_str, dummy, machine = time_and_machine.partition(" by ")
-                try:
-                    timestamp = datetime.datetime.strptime(timestamp_str, "%a %b %d %H:%M:%S %Z %Y")
-                    snapshot["general"]["timestamp"] = Util.get_timestamp_string(timestamp)
-                except ValueError:
-                    pass
-                snapshot["general"]["machine"] = machine
-                snapshot["msc-ldk"] = {}
-                if version.endswith("-dirty"):
-                    snapshot["msc-ldk"]["dirty"] = "True"
-                    version = version[:-6]
-                snapshot["msc-ldk"]["version"] = version
+        snapshot["general"]["comment"] = "Written by setup.py --write-snapshot"
+        snapshot["general"]["timestamp"] = Util.get_timestamp_string()
+        snapshot["general"]["id"] = self.id_string
+        snapshot["general"]["machine"] = "%s@%s" % (getpass.getuser(), socket.getfqdn())
+        snapshot_jobs = [(layer_directory, functools.partial(self.get_layer_status, layer_directory, untracked_files=False))
+                         for layer_directory in self.get_layer_directories(include_msc_ldk=True)]
+        for result in parallel_jobs.run_jobs(snapshot_jobs, self.jobs):
+            result.log.replay(LOG)
+            if not result.succeeded():
+                LOG.error("Layer %s: %s" % (result.name.layer_directory, result.exception))
                 continue
-            elif "--bsp" in line:
-                # e.g.: --bsp=0000 --variant=32 --layers-hwtests --re-create-conf
-                options = line.split(" ")
-                bsp = "???"
-                variant = ""
-                layers = []
-                for option in options:
-                    name, dummy, value = option.partition("=")
-                    name = name.strip()
-                    value = value.strip()
-                    if name == "--bsp":
-                        bsp = self.bsp_mapping.get(value, value)
-                    elif name == "--variant":
-                        variant = value
-                    elif name.startswith("--layers-"):
-                        layers.append(name[len("--layers-"):])
-                layers.sort()
-                id_elems = [bsp]
-                if variant:
-                    id_elems.append(variant)
-                if layers:
-                    id_elems.extend(layers)
-                id_string = "-".join(id_elems)
-                snapshot["general"]["id"] = id_string
-        # pass2: read layer information
-        for line in open(file_name).readlines():
-            line = line.strip()
-            if line.startswith("LAYER "):
-                line = line[6:]
-                # e.g.: MSC-LDK meta-openembedded=LC984_20160504_V1_0_0
-                layer, version = line.split("=")
-                if layer == "msc-ldk-bsp-recipes":
-                    layer = "%s/%s" % (bsp, layer)
-                layer += ".git"
-                snapshot[layer] = {}
-                if version.endswith("-dirty"):
-                    snapshot[layer]["dirty"] = "True"
-                    version = version[:-6]
-                snapshot[layer]["version"] = version
-        self.snapshot_origin = ("--version-file", os.path.abspath(file_name))
-        self.snapshot = snapshot
+            status = result.value
+            layer_name = result.name.layer_directory
+            snapshot[layer_name] = {}
+            if status.branch is not None:
+                snapshot[layer_name]["branch"] = status.branch
+            snapshot[layer_name]["sha1"] = status.head_sha1
+            if status.is_dirty():
+                snapshot[layer_name]["dirty"] = "True"
+                LOG.warn("Layer %s is dirty - the snapshot does not contain the uncommitted changes" % layer_name)
+        return snapshot
+
+    def write_snapshot(self, file_name):
+        snapshot = self.create_snapshot()
+        with open(file_name, "w") as snapshot_file:
+            snapshot.write(snapshot_file)
+        LOG.notice("Wrote snapshot of %d layers to '%s'" % (len(snapshot.sections()) - 1, file_name))
 
     def extract_bsp_info(self, known_layers):
         snapshot_id = self.snapshot.get("general", "id")
@@ -261,6 +591,7 @@ class MscLdkSnapshot(object):
                 variant = elem
         return bsp, variant, layers
 
+    @trace_events.traced()
     def use_snapshot_file(self, dry_run):
         self.use_snapshot_config(self.snapshot, self.snapshot_origin, dry_run)
 
@@ -268,7 +599,7 @@ class MscLdkSnapshot(object):
         version = snapshot.get("msc-ldk", "version", fallback=None)
         if version is None:
             version = snapshot.get("msc-ldk", "sha1", fallback=None)
-        msc_ldk_git = GitRepository(self.msc_ldk_dir)
+        msc_ldk_git = get_git_repository(self.msc_ldk_dir)
         head_sha1 = msc_ldk_git.get_head_sha1()
         desired_sha1 = msc_ldk_git.get_sha1_for_version(version)
         if head_sha1 == desired_sha1:
@@ -324,71 +655,129 @@ class MscLdkSnapshot(object):
                 LOG.warn("Current MSC-LDK Id: %s does not match snapshot Id: %s" % (self.id_string, snapshot_id))
         snapshot_layers = snapshot.sections()
         snapshot_layers.remove("general")
-        snapshot_info = []
+        # Verify all layers in parallel, the output is shown in layer order
+        verify_jobs = []
         for layer_directory in self.get_layer_directories(include_msc_ldk=True):
-            layer_name = layer_directory.layer_directory
-            if layer_name in snapshot_layers:
-                snapshot_layers.remove(layer_name)
-                snapshot_branch = snapshot.get(layer_name, "branch", fallback=None)
-                snapshot_version = snapshot.get(layer_name, "version", fallback=None)
-                snapshot_version_dirty = snapshot.get(layer_name, "dirty", fallback=False)
-                if snapshot_version is not None:
-                    version_str = "Version"
-                    version_or_sha1 = snapshot_version
-                else:
-                    version_or_sha1 = snapshot.get(layer_name, "sha1", fallback=None)
-                    version_str = "SHA1"
+            if layer_directory.layer_directory in snapshot_layers:
+                snapshot_layers.remove(layer_directory.layer_directory)
+            verify_jobs.append((layer_directory, functools.partial(self.verify_snapshot_layer, snapshot, layer_directory)))
+        snapshot_info = []
+        for result in parallel_jobs.run_jobs(verify_jobs, self.jobs):
+            result.log.replay(LOG)
+            if not result.succeeded():
+                LOG.warn("Layer %s: verification failed: %s" % (result.name.layer_directory, result.exception))
+            elif result.value is not None:
+                branch, sha1, snapshot_version_dirty = result.value
                 if snapshot_version_dirty:
-                    LOG.warning("  Layer '%s' was dirty: %s" % (layer_name, version_or_sha1))
                     warn_count1 += 1 # not a critical warning...
-                if snapshot_branch is not None:
-                    if not layer_directory.is_branch_present(snapshot_branch):
-                        LOG.warn("Layer %s: branch '%s' is not present" % (layer_name, snapshot_branch))
-                        snapshot_branch = None
-                if not layer_directory.is_sha1_present(version_or_sha1):
-                    LOG.warn("Layer %s: %s '%s' is not present" % (layer_name, version_str, version_or_sha1))
-                    version_or_sha1 = None
-                if layer_directory.git_repo.is_dirty():
-                    LOG.warn("Layer %s is dirty - please commit or stash your changes first" % layer_directory.full_layer_directory)
-                    layer_directory.git_repo.show_diff()
-                if not layer_directory.is_msc_ldk():
-                    snapshot_info.append((layer_directory, snapshot_branch, version_or_sha1))
-            else:
-                LOG.warn("Uncovered layer '%s' - not found in snapshot file" % layer_name)
+                if not result.name.is_msc_ldk():
+                    snapshot_info.append((result.name, branch, sha1))
         for unprocessed_snapshot_layer in snapshot_layers:
             LOG.warn("Additional layer in snapshot file '%s' - not used in MSC-LDK project" % unprocessed_snapshot_layer)
         warn_count2 = Logging.get_log_call_count("WARNING")
         if warn_count2 == warn_count1:
-            switch_info_string = "Switching Layer repositories to snapshot position"
-            if dry_run:
-                switch_info_string += " (dry-run)"
-            num_switched_layers = 0
-            for layer_directory, branch, version in snapshot_info:
-                git_repo = GitRepository(layer_directory.full_layer_directory)
-                cur_branch = git_repo.get_active_branch_name()
-                sha1 = git_repo.get_sha1_for_version(version)
-                if cur_branch != branch and branch is not None:
-                    LOG.notice("%s: Switching branch from %s -> %s" % (layer_directory, cur_branch, branch))
-                    if not dry_run:
-                        git_repo.git.checkout(branch)
-                cur_sha1 = git_repo.get_head_sha1()
-                if cur_sha1 != sha1:
-                    if num_switched_layers == 0:
-                        print(Logging.colorize(Logging.COLOR.pink, switch_info_string))
-                    num_switched_layers += 1
-                    LOG.notice("%s: Switching checked out SHA1 from %s -> %s" % (layer_directory, cur_sha1, sha1))
-                    if not dry_run:
-                        if git_repo.is_in_detached_head_state():
-                            git_repo.git.checkout("-")
-                            LOG.out(2, "%s: git checkout -" % git_repo)
-                        git_repo.git.checkout(sha1)
-            if num_switched_layers == 0:
-                print(Logging.colorize(Logging.COLOR.pink, "All Layer repositories are already at their requested versions"))
+            return self.switch_layers_to_snapshot(snapshot_info, dry_run)
         else:
             LOG.error("Aborting Snapshot Activation")
             return False
+
+    def verify_snapshot_layer(self, snapshot, layer_directory, log=LOG):
+        """Checks a layer against the snapshot, returns (branch, SHA1, snapshot_version_dirty) to switch to."""
+        layer_name = layer_directory.layer_directory
+        if not snapshot.has_section(layer_name):
+            log.warn("Uncovered layer '%s' - not found in snapshot file" % layer_name)
+            return None
+        snapshot_branch = snapshot.get(layer_name, "branch", fallback=None)
+        snapshot_version = snapshot.get(layer_name, "version", fallback=None)
+        snapshot_version_dirty = snapshot.get(layer_name, "dirty", fallback=False)
+        if snapshot_version is not None:
+            version_str = "Version"
+            version_or_sha1 = snapshot_version
+        else:
+            version_or_sha1 = snapshot.get(layer_name, "sha1", fallback=None)
+            version_str = "SHA1"
+        if snapshot_version_dirty:
+            log.warning("  Layer '%s' was dirty: %s" % (layer_name, version_or_sha1))
+        if snapshot_branch is not None:
+            if not layer_directory.is_branch_present(snapshot_branch):
+                log.warn("Layer %s: branch '%s' is not present" % (layer_name, snapshot_branch))
+                snapshot_branch = None
+        sha1 = None
+        if version_or_sha1 is not None:
+            sha1 = layer_directory.resolve_versions([version_or_sha1])[version_or_sha1]
+        if sha1 is None:
+            log.warn("Layer %s: %s '%s' is not present" % (layer_name, version_str, version_or_sha1))
+        if layer_directory.is_dirty():
+            log.warn("Layer %s is dirty - please commit or stash your changes first" % layer_directory.full_layer_directory)
+            show_diff(layer_directory.git_repo, log)
+        return snapshot_branch, sha1, snapshot_version_dirty
+
+    def switch_layers_to_snapshot(self, snapshot_info, dry_run):
+        """Switches the layers in parallel. When a layer fails, all layers are restored to their previous HEAD."""
+        switch_info_string = "Switching Layer repositories to snapshot position"
+        if dry_run:
+            switch_info_string += " (dry-run)"
+        num_switched_layers = 0
+        switch_plan = []
+        for layer_directory, branch, sha1 in snapshot_info:
+            cur_branch, cur_sha1 = layer_directory.get_checkout_state()
+            previous_head = cur_branch or cur_sha1
+            switch_branch = None
+            if cur_branch != branch and branch is not None:
+                LOG.notice("%s: Switching branch from %s -> %s" % (layer_directory, cur_branch, branch))
+                switch_branch = branch
+                cur_sha1 = layer_directory.get_ref_index().get_sha1_for_version(branch)
+            switch_sha1 = None
+            if cur_sha1 != sha1:
+                if num_switched_layers == 0:
+                    print(Logging.colorize(Logging.COLOR.pink, switch_info_string))
+                num_switched_layers += 1
+                LOG.notice("%s: Switching checked out SHA1 from %s -> %s" % (layer_directory, cur_sha1, sha1))
+                switch_sha1 = sha1
+            if switch_branch is not None or switch_sha1 is not None:
+                switch_plan.append((layer_directory, switch_branch, switch_sha1, previous_head))
+        if num_switched_layers == 0:
+            print(Logging.colorize(Logging.COLOR.pink, "All Layer repositories are already at their requested versions"))
+        if dry_run or not switch_plan:
+            return True
+
+        switch_jobs = [(layer_directory, functools.partial(self.switch_layer, layer_directory, branch, sha1))
+                       for layer_directory, branch, sha1, previous_head in switch_plan]
+        failed_layers = []
+        for result in parallel_jobs.run_jobs(switch_jobs, self.jobs):
+            result.log.replay(LOG)
+            if not result.succeeded():
+                LOG.error("%s: Switching failed: %s" % (result.name, result.exception))
+                failed_layers.append(result.name)
+        if failed_layers:
+            LOG.error("Restoring the previous checkouts of all switched layers")
+            for layer_directory, branch, sha1, previous_head in switch_plan:
+                cur_branch, cur_sha1 = layer_directory.get_checkout_state()
+                if previous_head in (cur_branch, cur_sha1):
+                    continue
+                try:
+                    layer_directory.git_repo.git.checkout(previous_head)
+                    LOG.notice("%s: Restored %s" % (layer_directory, previous_head))
+                except Exception as e:
+                    LOG.error("%s: Restoring %s failed: %s" % (layer_directory, previous_head, e))
+                GitRefIndex.invalidate(layer_directory.full_layer_directory)
+            return False
         return True
 
+    def switch_layer(self, layer_directory, branch, sha1, log=LOG):
+        git_repo = layer_directory.git_repo
+        if branch is not None:
+            git_repo.git.checkout(branch)
+            GitRefIndex.invalidate(layer_directory.full_layer_directory)
+        if sha1 is not None:
+            if git_repo.is_in_detached_head_state():
+                git_repo.git.checkout("-")
+                log.out(2, "%s: git checkout -" % git_repo)
+            git_repo.git.checkout(sha1)
+            cur_sha1 = layer_directory.get_checkout_state()[1]
+            if cur_sha1 != sha1:
+                raise Exception("HEAD is at %s instead of %s" % (cur_sha1, sha1))
+
 
 class YoctoLayer(object):
     def __init__(self, layer_name, file_name):
@@ -404,27 +793,33 @@ class YoctoLayer(object):
                 return layer_description
         return self.name
 
-class GitRepository(Git.GitRepository):
-    def is_on_develop_branch(self):
-        active_branch_name = self.get_active_branch_name()
-        if active_branch_name is not None and (active_branch_name == "develop" or active_branch_name.startswith("feature/")):
-            return True
-        return False
-    def is_on_master_branch(self):
-        return self.get_active_branch_name() == "master"
-    def get_repo_tag(self):
-        if self.is_on_develop_branch() or self.is_on_master_branch():
-            return ""
-        tag_string = subprocess.getoutput("git describe --tags")
-        return tag_string
-    def show_diff(self):
-        unstaged_diff = self.git.diff()
-        staged_diff = self.git.diff("--staged")
-        if unstaged_diff:
-            LOG.out(1, unstaged_diff)
-        if staged_diff:
-            LOG.out(1, "Staged changes:")
-            LOG.out(1, staged_diff)
+def get_git_repository(repo_dir):
+    import MscBoost.Git as Git
+    return Git.GitRepository(repo_dir)
+
+def is_on_develop_branch(git_repo):
+    active_branch_name = git_repo.get_active_branch_name()
+    if active_branch_name is not None and (active_branch_name == "develop" or active_branch_name.startswith("feature/")):
+        return True
+    return False
+
+def is_on_master_branch(git_repo):
+    return git_repo.get_active_branch_name() == "master"
+
+def get_repo_tag(git_repo):
+    if is_on_develop_branch(git_repo) or is_on_master_branch(git_repo):
+        return ""
+    tag_string = subprocess.getoutput("git describe --tags")
+    return tag_string
+
+def show_diff(git_repo, log=LOG):
+    unstaged_diff = git_repo.git.diff()
+    staged_diff = git_repo.git.diff("--staged")
+    if unstaged_diff:
+        log.out(1, unstaged_diff)
+    if staged_diff:
+        log.out(1, "Staged changes:")
+        log.out(1, staged_diff)
 
 class SetupMscLdkApplication(Application):
     def __init__(self):
@@ -438,12 +833,28 @@ class SetupMscLdkApplication(Application):
         self.arg_parser.add_argument("--re-create-conf", action="store_true", help="Force re-creation of 'local.conf', 'bblayers.conf'.")
 
         self.arg_parser.add_argument("--version-file", help="Setup MSC-LDK layers to match VERSION_FILE.")
+        self.arg_parser.add_argument("--write-snapshot", metavar="SNAPSHOT_FILE", help="Write the HEAD SHA1s, branches and dirty flags of all layers to SNAPSHOT_FILE (usable with --version-file).")
         self.arg_parser.add_argument("--show-layer-info", action="store_true", help="Show MSC-LDK layer info.")
+        self.arg_parser.add_argument("--status", action="store_true", help="Show branch, ahead/behind and working tree state of all layers in bblayers.conf.")
+
+        self.arg_parser.add_argument("--matrix", metavar="MATRIX_FILE", help="Prepare the BSP build directories of all combinations in MATRIX_FILE in one run (one combination per line, e.g. '--bsp=C984 --variant=64 --layers-lxqt').")
+
+        self.arg_parser.add_argument("--explain", action="store_true", help="Show which setup inputs changed since the last successful setup of the BSP build directory. Setup is skipped when nothing changed; branches and tags pushed to the git server count once they are fetched (e.g. by update.py).")
 
         self.arg_parser.add_argument("--dry-run", action="store_true", help="Don't perform some actions (Available for --version-file).")
+        self.arg_parser.add_argument("--git-cache", metavar="DIR", default=MSC_LDK_GIT_OBJECT_CACHE, help="Keep bare mirrors of the layer repositories in DIR (e.g. ~/.cache/msc-ldk/git), new layer clones are made from them and only fetch what is missing from the git server (can be predefined with MSC_LDK_GIT_OBJECT_CACHE). Not used with a MSC git server cache.")
+        self.arg_parser.add_argument("--git-cache-share-objects", action="store_true", help="New clones borrow their objects from the --git-cache mirrors instead of copying them (no extra disk space, but deleting the cache breaks the clones).")
+        self.arg_parser.add_argument("--sstate-mirror", metavar="URL", default=MSC_LDK_SSTATE_MIRROR, help="Use the shared sstate mirror URL (file:///<dir> or http(s)://<server>/<dir>, can be predefined with MSC_LDK_SSTATE_MIRROR).")
+        self.arg_parser.add_argument("--layer-worktrees", action="store_true", help="Layer repositories whose checkout in sources/ is not on the git ref needed by the BSP get a git worktree in sources/%s/<git ref>/ (build directories on different branches can coexist). update.py fast-forwards the worktrees as well." % LAYER_WORKTREES_DIR_NAME)
+        self.arg_parser.add_argument(startup_profile.PROFILE_STARTUP_OPTION, action="store_true", help="Run with 'python3 -X importtime' and show the modules with the highest import times.")
+        self.arg_parser.add_argument(trace_events.TRACE_OPTION, metavar="FILE", help="Write the duration of the setup phases, layer repositories and subprocesses as Chrome trace-event JSON to FILE and show the slowest ones.")
+        self.arg_parser.add_argument("--jobs", type=int, default=parallel_jobs.DEFAULT_JOBS, help="Number of layer repositories that are cloned/checked out in parallel (default: %d)." % parallel_jobs.DEFAULT_JOBS)
 
         self.show_recreate_conf_warning = True
         self.inform_about_checkout_layers = False
+        self.git_object_cache = None
+        self.matrix_combination = None
+        self.error_and_warning_count_baseline = 0
         self._determine_msc_ldk_root()
         self.msc_ldk_sources = os.path.join(self.msc_ldk_root, "sources")
         self.msc_ldk_scripts = os.path.join(self.msc_ldk_root, "scripts")
@@ -473,6 +884,11 @@ class SetupMscLdkApplication(Application):
   ./setup.py --bsp=C984 --variant=64 --layers-lxqt: will download and prepare the BSP for the project/board C984 in the 64bit variant. The required layers for LXQt are enabled.
   ./setup.py --version-file version_file --dry-run: Shows what will be done to setup a BSP build with the layer versions specified in version_file.
   ./setup.py --version-file version_file: Setup a BSP build with the layer versions specified in version_file.
+  ./setup.py --status: Shows the branch and working tree state of all layers of the last setup BSP.
+  ./setup.py --write-snapshot snapshot_file: Writes the layer versions of the last setup BSP to snapshot_file (use it later with --version-file).
+  ./setup.py --matrix matrix_file: Prepare the BSP builds for all combinations listed in matrix_file (one line per combination, e.g. '--bsp=C984 --variant=32').
+  ./setup.py --bsp=C984 --sstate-mirror http://buildserver/sstate: Prepare the BSP build for C984, sstate objects built by the nightly builds are taken from the mirror.
+  ./setup.py --bsp=C984 --trace setup-trace.json: Prepare the BSP build for C984 and write the duration of all setup phases and git commands to setup-trace.json (open it in chrome://tracing).
         """
 
     def _print_version(self):
@@ -480,6 +896,7 @@ class SetupMscLdkApplication(Application):
         # This is not a full MscProject (missing COPYING etc.),
         # but is sufficient for getting the version
 
+        import MscBoost.MscProject as MscProject
         proj = MscProject.MscProject(self.msc_ldk_root)
         LOG.out(0, "Version: {}".format(str(proj.version)))
 
@@ -488,11 +905,27 @@ class SetupMscLdkApplication(Application):
         with open(os.path.join(self.msc_ldk_root, "COPYING_linked")) as f:
             LOG.out(0, f.read())
 
+    def get_error_and_warning_count(self):
+        return Logging.get_log_call_count("ERROR") + Logging.get_log_call_count("WARNING")
+
     def did_errors_or_warnings_happen(self):
-        return Logging.get_log_call_count("ERROR") + Logging.get_log_call_count("WARNING") > 0
+        return self.get_error_and_warning_count() > self.error_and_warning_count_baseline
+
+    def is_known_bsp(self, bsp):
+        # BSP numbers start with max. 2 alphanumeric chars followed by numeric chars
+        if bsp[:2].isalnum() and bsp[2:].isnumeric():
+            # A well formed BSP number -> we can't verify whether it is available
+            return True
+        known_bsp_names = self.bsp_mapping.keys()
+        # Check whether a known BPS from bsp-mapping.csv is given
+        if bsp not in known_bsp_names:
+            from MscBoost.FindBestMatch import FindBestMatch
+            LOG.error("BSP '%s' is not known - did you mean: '%s'" % (bsp, FindBestMatch(bsp, known_bsp_names)))
+            return False
+        return True
 
     def in_msc_network(self):
-        return MSC_GIT_SERVER in ["gitosis@msc-aac-debian01.msc-ge.mscnet:/"]
+        return get_msc_git_server() in ["gitosis@msc-aac-debian01.msc-ge.mscnet:/"]
 
     def parse_bsp_mapping(self):
         bsp_mapping_file_name = "bsp-mapping.csv"
@@ -513,6 +946,7 @@ class SetupMscLdkApplication(Application):
         local_conf = os.path.join(bsp_conf, "local"+variant_file_name_part+".conf")
         return local_conf
 
+    @trace_events.traced()
     def determine_variant(self, variant):
         local_conf = self.local_conf_name(variant)
         if not os.path.exists(local_conf):
@@ -520,7 +954,7 @@ class SetupMscLdkApplication(Application):
             possible_variants = glob.glob(os.path.join(bsp_conf, "local-*.conf"))
             possible_variants = [v.rpartition("local-")[2].partition(".conf")[0] for v in possible_variants]
             LOG.error("Variant '%s' not supported, possible variants: %s" % (variant, ", ".join(possible_variants)))
-            self._exit(2)
+            return None
         if os.path.islink(local_conf):
             # Determine variant name from real path of the used local.conf file
             real_local_conf = os.path.basename(os.path.realpath(local_conf))
@@ -540,27 +974,25 @@ class SetupMscLdkApplication(Application):
                                              help="Enable %s layers." % layer.description(),
                                              action="store_true")
 
-    def find_best_git_ref(self, repo_path, requested_git_ref, force_branch=False):
-        g = GitRepository(repo_path)
-        repo_branch_names = g.get_branch_names(local=True, remote=True)
-        repo_tag_names = g.get_tag_names()
-        if self.git_repo_msc_ldk.is_on_develop_branch() and not force_branch:
+    def find_best_git_ref(self, repo_path, requested_git_ref, force_branch=False, log=LOG):
+        repo_branch_names = GitRefIndex.for_repository(repo_path).get_branch_names(local=True, remote=True)
+        if is_on_develop_branch(self.git_repo_msc_ldk) and not force_branch:
             requested_git_ref = ""
         if requested_git_ref == "":
             if self.msc_ldk_active_branch_name is None:
                 git_ref = self.msc_ldk_active_tag_name
             elif self.msc_ldk_active_branch_name not in ("develop", "master") and self.msc_ldk_active_branch_name in repo_branch_names:
                 git_ref = self.msc_ldk_active_branch_name
-            elif self.git_repo_msc_ldk.is_on_develop_branch() and self.msc_ldk_based_on_yocto_branch+"-msc-develop" in repo_branch_names:
+            elif is_on_develop_branch(self.git_repo_msc_ldk) and self.msc_ldk_based_on_yocto_branch+"-msc-develop" in repo_branch_names:
                 git_ref = self.msc_ldk_based_on_yocto_branch+"-msc-develop"
             elif self.msc_ldk_based_on_yocto_branch+"-msc" in repo_branch_names:
                 git_ref = self.msc_ldk_based_on_yocto_branch+"-msc"
             elif self.msc_ldk_based_on_yocto_branch in repo_branch_names:
                 git_ref = self.msc_ldk_based_on_yocto_branch
-            elif self.git_repo_msc_ldk.is_on_develop_branch():
+            elif is_on_develop_branch(self.git_repo_msc_ldk):
                 git_ref = "develop"
                 if git_ref not in repo_branch_names:
-                    LOG.out(1, "  Using fallback branch 'master' for repo: %s (branch 'develop' does not exist)" % repo_path)
+                    log.out(1, "  Using fallback branch 'master' for repo: %s (branch 'develop' does not exist)" % repo_path)
                     git_ref = "master"
             else:
                 git_ref = "master"
@@ -568,51 +1000,69 @@ class SetupMscLdkApplication(Application):
             git_ref = requested_git_ref
         return git_ref
 
-    def install_repo(self, relative_repo, install_to, branch="", force_branch=False):
+    @trace_events.traced("repo", lambda self, relative_repo, *args, **kwargs: "install_repo %s" % relative_repo)
+    def install_repo(self, relative_repo, install_to, branch="", force_branch=False, use_worktree=False, log=LOG):
+        """Clones relative_repo to install_to if needed and checks that it is on the requested git ref.
+
+        With use_worktree a layer worktree provides a different git ref (see use_layer_worktrees()),
+        an existing checkout in install_to is then not switched and not reported as error.
+        """
         run_checkout = False
         prev_checkout_info = None
         if os.path.isdir(install_to):
-            g = GitRepository(install_to)
-            LOG.notice("Repository '%s' is already installed (%s)" % (relative_repo, g.get_checkout_info_string()))
+            g = get_git_repository(install_to)
+            log.notice("Repository '%s' is already installed (%s)" % (relative_repo, g.get_checkout_info_string()))
             prev_checkout_info = g.get_checkout_info_string()
-            if self.args.checkout_layers:
+            if self.args.checkout_layers and not use_worktree:
                 run_checkout = True
         else:
-            repo = MSC_GIT_SERVER + relative_repo
-            LOG.notice("Installing repository '%s'" % repo)
+            repo = get_msc_git_server() + relative_repo
+            log.notice("Installing repository '%s'" % repo)
             layer_base_dir = os.path.dirname(install_to)
             if not os.path.isdir(layer_base_dir):
                 os.makedirs(layer_base_dir)
-            Git.clone(repo, install_to)
-            g = GitRepository(install_to)
+            if self.git_object_cache:
+                self.git_object_cache.clone(repo, install_to, log)
+            else:
+                import MscBoost.Git as Git
+                Git.clone(repo, install_to)
+            g = get_git_repository(install_to)
             run_checkout = True
 
         repo_name = os.path.basename(relative_repo)
-        LOG.out(2, "  Branches in repo %s: %s" % (repo_name, g.get_branch_names(remote=True)))
-        LOG.out(2, "  TAGS in repo %s: %s" % (repo_name, g.get_tag_names()))
-        git_ref = self.find_best_git_ref(install_to, branch, force_branch)
+        ref_index = GitRefIndex.for_repository(install_to)
+        log.out(2, "  Branches in repo %s: %s" % (repo_name, ref_index.get_branch_names(remote=True)))
+        log.out(2, "  TAGS in repo %s: %s" % (repo_name, ref_index.get_tag_names()))
+        git_ref = self.find_best_git_ref(install_to, branch, force_branch, log)
         if run_checkout:
             g.git.checkout(git_ref)
+            # A checkout of a remote branch creates a local branch
+            GitRefIndex.invalidate(install_to)
             if prev_checkout_info is not None:
                 cur_checkout_info = g.get_checkout_info_string()
                 if prev_checkout_info != cur_checkout_info:
-                    LOG.notice("Repository '%s': Switched to <%s>" % (relative_repo, cur_checkout_info))
-        if g.get_active_branch_name() != git_ref and g.get_repo_tag() != git_ref:
-            LOG.error("Repository '%s' is not on the requested branch '%s' (it is at '%s')" % (install_to, git_ref, g.get_checkout_info_string()))
+                    log.notice("Repository '%s': Switched to <%s>" % (relative_repo, cur_checkout_info))
+        if g.get_active_branch_name() != git_ref and get_repo_tag(g) != git_ref:
+            if use_worktree:
+                # The requested git ref is provided by a layer worktree, see add_layer_worktree()
+                return
+            log.error("Repository '%s' is not on the requested branch '%s' (it is at '%s')" % (install_to, git_ref, g.get_checkout_info_string()))
             self.inform_about_checkout_layers = True
 
-    def install_all_layers(self):
+    def get_layer_files(self):
         layer_files = [os.path.join(self.msc_ldk_scripts, "layers-core.csv")]
         layer_files.append(os.path.join(self.bsp_layer, "layers-bsp.csv"))
         for layer in self.active_layers:
             layer_files.append(os.path.join(self.msc_ldk_scripts, "layers-%s.csv" % layer.name))
+        return layer_files
 
-        # BSP layer itself is not provided by layer_file
-        self.msc_ldk_layers_for_bsp = [os.path.join(self.bsp_layer, "meta")]
-        installed_repos = []
-        for layer_file in layer_files:
+    def read_layer_files(self, report_errors=True):
+        """Returns the (repo, subdir, branch) entries of all layer .csv files."""
+        layer_entries = []
+        for layer_file in self.get_layer_files():
             if os.path.exists(layer_file):
-                LOG.out(1, "Processing: %s" % layer_file)
+                if report_errors:
+                    LOG.out(1, "Processing: %s" % layer_file)
                 for line in open(layer_file).readlines():
                     line = line.strip()
                     if line.startswith("#"):
@@ -622,22 +1072,111 @@ class SetupMscLdkApplication(Application):
                     try:
                         repo, subdir, branch = line.split(",")
                     except:
-                        LOG.error("Malformed line in '%s': '%s'" % (layer_file, line))
-                        LOG.error("  Expected repo,subdir,branch (three values, separated by two ',')")
+                        if report_errors:
+                            LOG.error("Malformed line in '%s': '%s'" % (layer_file, line))
+                            LOG.error("  Expected repo,subdir,branch (three values, separated by two ',')")
                         continue
-                    local_repo_dir = os.path.join(self.msc_ldk_sources, os.path.basename(repo)+".git")
-                    if repo not in installed_repos:
-                        self.install_repo(repo, local_repo_dir, branch)
-                        installed_repos.append(repo)
-                    layer_dir = os.path.join(local_repo_dir, subdir)
-                    layer_entry = os.path.join(self.msc_ldk_root, layer_dir).rstrip("/")
-                    if layer_entry not in self.msc_ldk_layers_for_bsp:
-                        self.msc_ldk_layers_for_bsp.append(layer_entry)
+                    layer_entries.append((repo, subdir, branch))
+        return layer_entries
+
+    def get_local_repo_dir(self, repo):
+        return os.path.join(self.msc_ldk_sources, os.path.basename(repo)+".git")
+
+    def collect_layers(self):
+        """Sets self.msc_ldk_layers_for_bsp and returns the (repo, local_repo_dir, branch) entries of the needed repositories."""
+        # BSP layer itself is not provided by layer_file
+        self.msc_ldk_layers_for_bsp = [os.path.join(self.bsp_layer, "meta")]
+        installed_repos = []
+        layer_repos = []
+        for repo, subdir, branch in self.read_layer_files():
+            local_repo_dir = self.get_local_repo_dir(repo)
+            if repo not in installed_repos:
+                layer_repos.append((repo, local_repo_dir, branch))
+                installed_repos.append(repo)
+            layer_dir = os.path.join(local_repo_dir, subdir)
+            layer_entry = os.path.join(self.msc_ldk_root, layer_dir).rstrip("/")
+            if layer_entry not in self.msc_ldk_layers_for_bsp:
+                self.msc_ldk_layers_for_bsp.append(layer_entry)
+        return layer_repos
+
+    def install_repositories(self, repos, use_worktrees=False):
+        """Installs the (repo, local_repo_dir, branch) entries, returns the names of the failed repositories."""
+        install_jobs = [(repo, functools.partial(self.install_repo, repo, local_repo_dir, branch, use_worktree=use_worktrees))
+                        for repo, local_repo_dir, branch in repos]
+
+        # Independent repositories are installed in parallel, their output is shown in .csv order
+        failed_repos = []
+        for result in parallel_jobs.run_jobs(install_jobs, self.args.jobs):
+            result.log.replay(LOG)
+            if not result.succeeded():
+                LOG.error("Installing repository '%s' failed: %s" % (result.name, result.exception))
+                LOG.out(2, result.traceback)
+                failed_repos.append(result.name)
+        if failed_repos:
+            LOG.error("%d of %d repositories could not be installed: %s" % (len(failed_repos), len(install_jobs), ", ".join(failed_repos)))
+        return failed_repos
+
+    @trace_events.traced()
+    def install_all_layers(self):
+        layer_repos = self.collect_layers()
+        self.install_repositories(layer_repos, self.args.layer_worktrees)
+        if self.args.layer_worktrees:
+            self.use_layer_worktrees(layer_repos)
+
+    def get_layer_worktree_dir(self, local_repo_dir, git_ref):
+        return os.path.join(self.msc_ldk_sources, LAYER_WORKTREES_DIR_NAME, git_ref.replace("/", "_"), os.path.basename(local_repo_dir))
+
+    def add_layer_worktree(self, repo, local_repo_dir, branch, log=LOG):
+        """Returns the worktree directory for repo, None when the checkout in sources/ is on the requested git ref."""
+        git_ref = self.find_best_git_ref(local_repo_dir, branch, log=log)
+        g = get_git_repository(local_repo_dir)
+        if g.get_active_branch_name() == git_ref or get_repo_tag(g) == git_ref:
+            return None
+        worktree_dir = self.get_layer_worktree_dir(local_repo_dir, git_ref)
+        if os.path.isdir(worktree_dir):
+            log.notice("Repository '%s': Using worktree '%s'" % (repo, worktree_dir))
+        else:
+            log.notice("Repository '%s': Adding worktree '%s'" % (repo, worktree_dir))
+            worktree_cmd = ["git", "worktree", "add", "--quiet"]
+            if git_ref in GitRefIndex.for_repository(local_repo_dir).get_tag_names():
+                worktree_cmd.append("--detach")
+            # A remote branch is checked out as new local branch (like 'git checkout <branch>')
+            worktree_add = subprocess.run(worktree_cmd + [worktree_dir, git_ref], cwd=local_repo_dir,
+                                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+            GitRefIndex.invalidate(local_repo_dir)
+            if worktree_add.returncode != 0:
+                raise Exception("git worktree add failed: %s" % worktree_add.stdout.strip())
+        worktree = get_git_repository(worktree_dir)
+        if worktree.get_active_branch_name() != git_ref and get_repo_tag(worktree) != git_ref:
+            log.error("Worktree '%s' is not on the requested branch '%s' (it is at '%s')" % (worktree_dir, git_ref, worktree.get_checkout_info_string()))
+            self.inform_about_checkout_layers = True
+        return worktree_dir
+
+    def use_layer_worktrees(self, layer_repos):
+        """Redirects the layers in self.msc_ldk_layers_for_bsp to worktrees where the checkout in sources/ is on another git ref.
+
+        Layer repositories on the same git ref keep using the checkout in sources/.
+        """
+        worktree_jobs = [(repo, functools.partial(self.add_layer_worktree, repo, local_repo_dir, branch))
+                         for repo, local_repo_dir, branch in layer_repos if os.path.isdir(local_repo_dir)]
+        local_repo_dirs = dict((repo, local_repo_dir) for repo, local_repo_dir, branch in layer_repos)
+        for result in parallel_jobs.run_jobs(worktree_jobs, self.args.jobs):
+            result.log.replay(LOG)
+            if not result.succeeded():
+                LOG.error("Adding worktree for repository '%s' failed: %s" % (result.name, result.exception))
+                LOG.out(2, result.traceback)
+            elif result.value is not None:
+                local_repo_dir = local_repo_dirs[result.name]
+                self.msc_ldk_layers_for_bsp = [result.value + layer[len(local_repo_dir):] if layer == local_repo_dir or layer.startswith(local_repo_dir + "/") else layer
+                                               for layer in self.msc_ldk_layers_for_bsp]
 
     def create_bsp_info_files(self, bsp, variant):
         # Create .setup_cmdline.txt, .bsp.txt, .variant.txt
         setup_cmdline_txt_file = open(os.path.join(self.bsp_build_root, ".setup_cmdline.txt"), "w")
-        cmd_line_param = " ".join(self.app_startup_information[2][1:])
+        if self.matrix_combination:
+            cmd_line_param = self.matrix_combination
+        else:
+            cmd_line_param = " ".join(self.app_startup_information[2][1:])
         print(cmd_line_param, file=setup_cmdline_txt_file, end="")
         setup_cmdline_txt_file.close()
 
@@ -653,6 +1192,43 @@ class SetupMscLdkApplication(Application):
         print(variant_file_content, file=variant_txt_file, end="")
         variant_txt_file.close()
 
+    def get_extra_local_conf_files(self):
+        extra_confs = []
+        for layer in self.active_layers:
+            extra_confs.append(os.path.join(self.msc_ldk_scripts, "local-%s.conf" % layer.name))
+            extra_confs.append(os.path.join(self.bsp_layer, "conf", "local-"+layer.name+".conf"))
+        return extra_confs
+
+    def get_parallelism_model_files(self):
+        return [os.path.join(self.msc_ldk_scripts, "parallelism.conf"), os.path.join(self.bsp_layer, "conf", "parallelism.conf")]
+
+    @trace_events.traced()
+    def render_build_dir_templates(self):
+        """Renders the MSC-LDK template/ files like 'TEMPLATECONF=template source oe-init-build-env' does.
+
+        Returns the content of local.conf and bblayers.conf (with ##OEROOT## replaced),
+        conf/templateconf.cfg is created as oe-init-build-env would do it.
+        """
+        template_root = os.path.join(self.msc_ldk_root, "template")
+        oe_root = os.path.realpath(os.path.join(self.msc_ldk_sources, "yocto.git"))
+        template_files = {}
+        try:
+            with open(os.path.join(template_root, "local.conf.sample")) as f:
+                template_files["local.conf"] = f.read()
+            with open(os.path.join(template_root, "bblayers.conf.sample")) as f:
+                template_files["bblayers.conf"] = f.read().replace("##OEROOT##", oe_root).replace("##COREBASE##", oe_root)
+            with open(os.path.join(template_root, "conf-notes.txt")) as f:
+                LOG.out(2, f.read())
+        except (OSError, IOError) as e:
+            LOG.error("Reading MSC-LDK template failed: %s" % e)
+            return None
+        templateconf_cfg = os.path.join(self.bsp_build_root, "conf", "templateconf.cfg")
+        if not os.path.exists(templateconf_cfg):
+            with open(templateconf_cfg, "w") as f:
+                print(template_root, file=f)
+        return template_files
+
+    @trace_events.traced()
     def update_bsp_conf(self, variant):
         local_conf = self.local_conf_name(variant)
         bsp_build_root_conf = os.path.join(self.bsp_build_root, "conf")
@@ -661,26 +1237,37 @@ class SetupMscLdkApplication(Application):
 
         local_conf_file_name = os.path.join(bsp_build_root_conf, "local.conf")
         bblayers_conf_file_name = os.path.join(bsp_build_root_conf, "bblayers.conf")
-        local_conf_file_bak = Util.make_timestamped_backup_file(local_conf_file_name, keep_old=False, bak_extension=".bak")
-        bblayers_conf_file_bak = Util.make_timestamped_backup_file(bblayers_conf_file_name, keep_old=False, bak_extension=".bak")
+        # The files are only replaced when their content changes: bitbake re-parses all recipes when they get a new mtime
+        old_local_conf = read_file_maybe(local_conf_file_name)
 
-        oe_init_build_env_cmd = 'bash -c "export TEMPLATECONF=\"{MSC_LDK_TEMPLATE_ROOT}\"; source \"{MSC_LDK_YOCTO_ROOT}/oe-init-build-env\" \"{BSP_BUILD_ROOT}\""'.format(
-            MSC_LDK_TEMPLATE_ROOT=os.path.join(self.msc_ldk_root, "template"),
-            MSC_LDK_YOCTO_ROOT=os.path.join(self.msc_ldk_sources, "yocto.git"),
-            BSP_BUILD_ROOT=self.bsp_build_root)
-        st, output = subprocess.getstatusoutput(oe_init_build_env_cmd)
-        if "Error" in output:
-            LOG.error("oe-init-build-env: '%s' -> '%s'" % (oe_init_build_env_cmd, output))
+        template_files = self.render_build_dir_templates()
+        if template_files is None:
+            return
 
         msc_ldk_yocto_dl_dir = os.getenv("MSC_LDK_YOCTO_DL_DIR", os.path.join(self.msc_ldk_root, "downloads"))
         msc_ldk_yocto_sstate_dir = os.getenv("MSC_LDK_YOCTO_SSTATE_DIR", os.path.join(self.msc_ldk_root, "sstate-cache"))
-        local_conf_file = open(local_conf_file_name, "a")
+        local_conf_file = io.StringIO()
+        local_conf_file.write(template_files["local.conf"])
         local_conf_txt = """
 # This has been added by setup.py
 
 DL_DIR ?= "{MSC_LDK_YOCTO_DL_DIR}"
 SSTATE_DIR ?= "{MSC_LDK_YOCTO_SSTATE_DIR}"
 """.format(MSC_LDK_YOCTO_DL_DIR=msc_ldk_yocto_dl_dir, MSC_LDK_YOCTO_SSTATE_DIR=msc_ldk_yocto_sstate_dir)
+        print(local_conf_txt, file=local_conf_file)
+        if self.args.sstate_mirror:
+            local_conf_txt = """# Shared read-only sstate mirror (setup.py --sstate-mirror)
+SSTATE_MIRRORS ?= "{SSTATE_MIRRORS}"
+""".format(SSTATE_MIRRORS=get_sstate_mirrors_entry(self.args.sstate_mirror))
+            print(local_conf_txt, file=local_conf_file)
+        bb_number_threads, parallel_make, parallelism_report = parallelism_model.ParallelismModel(self.get_parallelism_model_files()).calculate(self.bsp_build_root)
+        LOG.notice("Parallelism for '%s':" % self.bsp_build_root)
+        for line in parallelism_report:
+            LOG.out(0, "  %s" % line)
+        local_conf_txt = """# Parallelism tuned by setup.py for this build host (see scripts/parallelism.conf)
+BB_NUMBER_THREADS = "{BB_NUMBER_THREADS}"
+PARALLEL_MAKE = "{PARALLEL_MAKE}"
+""".format(BB_NUMBER_THREADS=bb_number_threads, PARALLEL_MAKE=parallel_make)
         print(local_conf_txt, file=local_conf_file)
         local_conf_txt = r"""
 # Setup permanent packet mirror
@@ -695,6 +1282,9 @@ INHERIT += "buildhistory"
 BUILDHISTORY_COMMIT = "0"
 BUILDHISTORY_FEATURES = "image"
 
+# Task statistics in tmp/buildstats/ for scripts/buildstats_report.py
+INHERIT += "buildstats"
+
 # disable this to generate .iso images
 NOISO = "1"
 
@@ -707,11 +1297,9 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
 """.format(MSC_GIT_SERVER_PUBLIC_HOST="msc-git02.msc-ge.com", MSC_GIT_SERVER_PUBLIC_PORT="9418")
         print(local_conf_txt, file=local_conf_file)
         print(open(local_conf).read(), file=local_conf_file)
-        for layer in self.active_layers:
-            for extra_conf in [os.path.join(self.msc_ldk_scripts, "local-%s.conf" % layer.name),
-                               os.path.join(os.path.join(self.bsp_layer, "conf", "local-"+layer.name+".conf"))]:
-                if os.path.exists(extra_conf):
-                    print(open(extra_conf).read(), file=local_conf_file)
+        for extra_conf in self.get_extra_local_conf_files():
+            if os.path.exists(extra_conf):
+                print(open(extra_conf).read(), file=local_conf_file)
         user_config_anchor = "# User configuration should be placed below this line"
         print("\n%s" % user_config_anchor, file=local_conf_file)
         # Add content specified using --local-conf-append
@@ -721,45 +1309,57 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
             print(open(local_conf_append).read(), file=local_conf_file)
         if self.args.re_create_conf and not local_conf_append:
             # When local.conf is re-generated: Keep lines below the user_config_anchor
-            if local_conf_file_bak:
+            if old_local_conf is not None:
                 add_user_lines = False
-                for line in open(local_conf_file_bak):
+                for line in old_local_conf.splitlines(True):
                     if add_user_lines:
                         print(line, file=local_conf_file, end="")
                     elif line.strip("\n") == user_config_anchor:
                         add_user_lines = True
-        local_conf_file.close()
+        changed_files = []
+        if self.update_conf_file(local_conf_file_name, local_conf_file.getvalue()):
+            changed_files.append(local_conf_file_name)
 
         # Add enabled layers to bblayers.conf
         bblayers = " \\\n".join(["  %s" % entry for entry in self.msc_ldk_layers_for_bsp])
-        new_bblayers_lines = []
-        for line in (open(bblayers_conf_file_name).readlines()):
-            line = line.replace("##MSC_LDK_LAYERS##", bblayers)
-            new_bblayers_lines.append(line)
-        bblayers_file = open(bblayers_conf_file_name, "w")
-        for line in new_bblayers_lines:
-            print(line, file=bblayers_file, end="")
-        bblayers_file.close()
-
-        def inform_about_file_and_backup(file_name, backup_file_name):
-            if backup_file_name:
-                fp_file = FilePath(file_name)
-                fp_backup_file = FilePath(backup_file_name)
-                if fp_file.md5_check(fp_backup_file):
-                    # backup_file content and file content are identical -> restore file and get rid of the backup file
-                    os.unlink(file_name)
-                    os.rename(backup_file_name, file_name)
-                else:
-                    LOG.notice("Created backup file '%s'" % backup_file_name)
-                    LOG.notice("Created '%s'" % file_name)
-                    LOG.out(1, "Changes for '%s' (against '%s'):" % (file_name, backup_file_name))
-                    LOG.out(1, fp_file.diff_against(fp_backup_file))
-            else:
-                LOG.notice("Created '%s'" % file_name)
+        if self.update_conf_file(bblayers_conf_file_name, template_files["bblayers.conf"].replace("##MSC_LDK_LAYERS##", bblayers)):
+            changed_files.append(bblayers_conf_file_name)
 
-        inform_about_file_and_backup(local_conf_file_name, local_conf_file_bak)
-        inform_about_file_and_backup(bblayers_conf_file_name, bblayers_conf_file_bak)
+        if changed_files:
+            LOG.notice("Changed configuration files: %s" % ", ".join(os.path.basename(file_name) for file_name in changed_files))
+        else:
+            LOG.notice("Configuration in '%s' is unchanged" % bsp_build_root_conf)
 
+    def update_conf_file(self, file_name, content):
+        """Atomically replaces file_name with content if the content changed, returns True if the file was written."""
+        old_content = read_file_maybe(file_name)
+        if old_content == content:
+            LOG.out(1, "'%s' is unchanged" % file_name)
+            return False
+        tmp_file_name = "%s.tmp-%d" % (file_name, os.getpid())
+        try:
+            with open(tmp_file_name, "w") as tmp_file:
+                tmp_file.write(content)
+        except (OSError, IOError):
+            if os.path.exists(tmp_file_name):
+                os.unlink(tmp_file_name)
+            raise
+        backup_file_name = None
+        if old_content is not None:
+            # The backup is a copy, file_name stays in place until os.replace() swaps in the new content
+            backup_file_name = Util.make_timestamped_backup_file(file_name, keep_old=True, bak_extension=".bak")
+        os.replace(tmp_file_name, file_name)
+        if backup_file_name:
+            LOG.notice("Created backup file '%s'" % backup_file_name)
+            LOG.notice("Updated '%s'" % file_name)
+            LOG.out(1, "Changes for '%s' (against '%s'):" % (file_name, backup_file_name))
+            from MscBoost.FilePath import FilePath
+            LOG.out(1, FilePath(file_name).diff_against(FilePath(backup_file_name)))
+        else:
+            LOG.notice("Created '%s'" % file_name)
+        return True
+
+    @trace_events.traced()
     def create_bsp_build_dir(self, bsp, variant):
         if not os.path.isdir(self.bsp_build_root):
             os.makedirs(self.bsp_build_root)
@@ -791,6 +1391,7 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
             os.symlink(makefile_bsp_list[0], makefile_bsp_in_file_name)
         return True
 
+    @trace_events.traced()
     def setup_msc_ldk_maintainer(self):
         msc_ldk_maintainer = os.path.join(self.msc_ldk_sources, "msc-ldk-maintainer.git")
         if not os.path.exists(msc_ldk_maintainer):
@@ -802,8 +1403,9 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
 
     def read_version_layer_file_maybe(self, fill_command_line_parameters):
         if self.args.version_file:
-            self.read_layer_snapshot = MscLdkSnapshot(self.msc_ldk_root, self.bsp_build_dir_name, self.bsp_build_root, self.bsp_mapping)
-            self.read_layer_snapshot.read_version_layer(self.args.version_file)
+            self.read_layer_snapshot = MscLdkSnapshot(self.msc_ldk_root, self.bsp_build_dir_name, self.bsp_build_root, self.bsp_mapping, self.args.jobs)
+            if not self.read_layer_snapshot.read_version_layer(self.args.version_file):
+                self._exit(1)
             if fill_command_line_parameters:
                 bsp, variant, layers = self.read_layer_snapshot.extract_bsp_info([l.name for l in self.layers])
                 self.args.bsp = bsp
@@ -817,14 +1419,16 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
             self.read_layer_snapshot = None
         return False
 
-    def store_default_settings(self):
+    @trace_events.traced()
+    def store_default_settings(self, branch_or_tag_name=None):
         default_settings = configparser.ConfigParser()
         default_settings["general"] = {}
         default_settings["general"]["bsp"] = self.args.bsp
         default_settings["general"]["variant"] = self.args.variant
         active_layer_names = [t[0][7:] for t in self.args._get_kwargs() if t[1] and t[0].startswith("layers")]
         default_settings["general"]["layers"] = ",".join(active_layer_names)
-        branch_or_tag_name = self.msc_ldk_active_tag_name or self.msc_ldk_active_branch_name
+        if branch_or_tag_name is None:
+            branch_or_tag_name = self.msc_ldk_active_tag_name or self.msc_ldk_active_branch_name
         default_settings["general"]["branch"] = branch_or_tag_name
         with open(self.default_settings_file, "w") as default_info_file:
             default_settings.write(default_info_file)
@@ -832,7 +1436,7 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
     def use_default_settings_maybe(self):
         if os.path.exists(self.default_settings_file):
             if self.args.bsp is None:
-                if self.args.show_layer_info or self.args.re_create_conf or self.args.checkout_layers:
+                if self.args.show_layer_info or self.args.re_create_conf or self.args.checkout_layers or self.args.status or self.args.write_snapshot:
                     default_settings = configparser.ConfigParser()
                     default_settings.read(self.default_settings_file)
                     self.args.bsp = default_settings["general"]["bsp"]
@@ -840,54 +1444,183 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
                     for layer_name in default_settings["general"]["layers"].split(","):
                         setattr(self.args, "layers_%s" % layer_name, True)
 
-    def setup_ldk(self):
+    def set_bsp_build_root(self, bsp, variant, active_layer_names):
+        dir_elements = [e for e in [bsp, variant] if e]
+        dir_elements.extend(active_layer_names)
+        self.bsp_build_dir_name = "-".join(dir_elements)
+        self.bsp_build_root = os.path.join(self.msc_ldk_root, "build", self.bsp_build_dir_name)
+
+    def get_setup_fingerprint(self, variant):
+        fingerprint = SetupFingerprint()
+        fingerprint.add_value("BSP", self.args.bsp)
+        fingerprint.add_value("Variant", variant)
+        fingerprint.add_value("Layers", ",".join(sorted(layer.name for layer in self.active_layers)))
+        fingerprint.add_value("MSC_GIT_SERVER", get_msc_git_server())
+        for env_name in ("MSC_LDK_YOCTO_DL_DIR", "MSC_LDK_YOCTO_SSTATE_DIR"):
+            fingerprint.add_value(env_name, os.getenv(env_name, ""))
+        fingerprint.add_value("Build host CPUs", parallelism_model.get_host_cpu_count())
+        fingerprint.add_value("Build host memory", parallelism_model.get_host_memory_gb())
+        local_conf_append = self.args.local_conf_append
+        if local_conf_append:
+            local_conf_append = os.path.abspath(local_conf_append)
+        fingerprint.add_value("--local-conf-append", local_conf_append)
+        fingerprint.add_value("--layer-worktrees", self.args.layer_worktrees)
+        fingerprint.add_value("--sstate-mirror", self.args.sstate_mirror)
+        # The ref each layer should be on follows from the .csv files and the MSC-LDK HEAD (both below), except
+        # after --version-file: then the layers are on the snapshot versions and the next run has to check them again
+        fingerprint.add_value("--version-file", bool(self.read_layer_snapshot))
+        input_files = [os.path.realpath(__file__),
+                       os.path.join(self.msc_ldk_scripts, "based_on_yocto.txt"),
+                       os.path.join(self.msc_ldk_scripts, "bsp-mapping.csv")]
+        input_files.extend(self.get_layer_files())
+        input_files.extend([os.path.join(self.msc_ldk_root, "template", template) for template in ("local.conf.sample", "bblayers.conf.sample", "conf-notes.txt")])
+        input_files.append(self.local_conf_name(variant))
+        input_files.extend(self.get_extra_local_conf_files())
+        input_files.extend(self.get_parallelism_model_files())
+        if local_conf_append:
+            input_files.append(local_conf_append)
+        # Manual changes of the generated files have to be reverted by --re-create-conf
+        input_files.extend([os.path.join(self.bsp_build_root, "conf", conf) for conf in ("local.conf", "bblayers.conf")])
+        for input_file in input_files:
+            fingerprint.add_file(input_file)
+        fingerprint.add_repository(self.msc_ldk_root)
+        fingerprint.add_repository(self.bsp_layer)
+        bblayers_conf = ""
+        if self.args.layer_worktrees and os.path.exists(os.path.join(self.bsp_build_root, "conf", "bblayers.conf")):
+            bblayers_conf = open(os.path.join(self.bsp_build_root, "conf", "bblayers.conf")).read()
+        for repo in sorted(set(repo for repo, subdir, branch in self.read_layer_files(report_errors=False))):
+            local_repo_dir = self.get_local_repo_dir(repo)
+            fingerprint.add_repository(local_repo_dir)
+            # Layer worktrees that are used by this BSP build directory
+            for worktree_dir in sorted(glob.glob(os.path.join(self.msc_ldk_sources, LAYER_WORKTREES_DIR_NAME, "*", os.path.basename(local_repo_dir)))):
+                if worktree_dir + "/" in bblayers_conf or worktree_dir + " " in bblayers_conf:
+                    fingerprint.add_repository(worktree_dir)
+        return fingerprint
+
+    @trace_events.traced()
+    def is_setup_unchanged(self, bsp, active_layer_names):
+        """Fast path: checks (without running git) whether the last successful setup used the same inputs."""
+        if self.read_layer_snapshot or self.args.show_layer_info or self.args.dry_run:
+            return False
+        if self.args.re_create_conf or self.args.checkout_layers:
+            # Both options ask for the .conf files to be re-generated or the layers to be checked out
+            if self.args.explain:
+                LOG.info("--re-create-conf and --checkout-layers always run the full setup")
+            return False
+        if not os.path.exists(self.local_conf_name(self.args.variant)):
+            return False
+        variant = self.determine_variant(self.args.variant)
+        self.set_bsp_build_root(bsp, variant, active_layer_names)
+        previous_fingerprint = SetupFingerprint.load(self.bsp_build_root)
+        if previous_fingerprint is None:
+            if self.args.explain:
+                LOG.info("No fingerprint of a previous successful setup found in '%s'" % self.bsp_build_root)
+            return False
+        changed_inputs = self.get_setup_fingerprint(variant).get_changed_inputs(previous_fingerprint)
+        if changed_inputs:
+            if self.args.explain:
+                LOG.info("Setup inputs changed since the last successful setup of '%s':" % self.bsp_build_root)
+                for changed_input in changed_inputs:
+                    LOG.out(0, "  %s" % changed_input)
+            return False
+        LOG.notice("Setup inputs of '%s' are unchanged since the last successful setup -> nothing to do" % self.bsp_build_root)
+        if not self.matrix_combination and not self.args.matrix:
+            self.store_default_settings(previous_fingerprint.extra_info.get("branch"))
+        return True
+
+    @trace_events.traced()
+    def store_setup_fingerprint(self, variant):
+        if self.args.dry_run or not os.path.isdir(self.bsp_build_root):
+            return
+        if self.did_errors_or_warnings_happen():
+            SetupFingerprint.remove(self.bsp_build_root)
+            return
+        fingerprint = self.get_setup_fingerprint(variant)
+        fingerprint.extra_info["branch"] = self.msc_ldk_active_tag_name or self.msc_ldk_active_branch_name
+        fingerprint.save(self.bsp_build_root)
+
+    @trace_events.traced()
+    def select_combination(self):
+        """Sets the BSP and layer related attributes for the combination given in self.args.
+
+        Returns (bsp, bsp_number, active_layer_names).
+        """
         bsp = self.args.bsp
         bsp_number = self.bsp_mapping.get(bsp, bsp)
+        active_layer_names = [t[0][7:] for t in self.args._get_kwargs() if t[1] and t[0].startswith("layers")]
+        self.active_layers = [layer for layer in self.layers if layer.name in active_layer_names]
+        self.bsp_root = os.path.join(self.msc_ldk_sources, bsp_number)
+        self.bsp_layer = os.path.join(self.bsp_root, "msc-ldk-bsp-recipes.git")
+        return bsp, bsp_number, active_layer_names
+
+    def get_bsp_config_info_string(self, bsp, bsp_number, variant):
         if bsp != bsp_number:
             bsp_info_string = "%s (alias for %s)" % (bsp, bsp_number)
         else:
             bsp_info_string = bsp
-        active_layer_names = [t[0][7:] for t in self.args._get_kwargs() if t[1] and t[0].startswith("layers")]
-        self.active_layers = [layer for layer in self.layers if layer.name in active_layer_names]
-        msc_ldk_build_root = os.path.join(self.msc_ldk_root, "build")
-        self.bsp_root = os.path.join(self.msc_ldk_sources, bsp_number)
+        bsp_config_elems = []
+        bsp_config_elems.append("BSP=%s" % bsp_info_string)
+        if variant:
+            bsp_config_elems.append("Variant=%s" % variant)
+        layer_info_string = ", ".join([layer.description() for layer in self.active_layers])
+        if layer_info_string:
+            bsp_config_elems.append("Layers=%s" % layer_info_string)
+        return ", ".join(bsp_config_elems)
+
+    @trace_events.traced()
+    def prepare_setup(self):
+        """Determines the MSC-LDK git state and prepares the access to the git server (needed once per setup.py run)."""
         self.msc_ldk_based_on_yocto_branch = open(os.path.join(self.msc_ldk_scripts, "based_on_yocto.txt")).read().strip()
-        self.git_repo_msc_ldk = GitRepository(self.msc_ldk_root)
+        self.git_repo_msc_ldk = get_git_repository(self.msc_ldk_root)
         self.msc_ldk_active_branch_name, self.msc_ldk_active_tag_names = self.git_repo_msc_ldk.get_branch_and_tag_info()
         if self.msc_ldk_active_tag_names:
             self.msc_ldk_active_tag_name = self.msc_ldk_active_tag_names[0]
         else:
             self.msc_ldk_active_tag_name = None
-        self.bsp_layer = os.path.join(self.bsp_root, "msc-ldk-bsp-recipes.git")
 
         if not ensure_ssh_mirror_is_known():
-            return
+            return False
 
-        lib_mscboostpython_git = GitRepository(os.path.join(self.msc_ldk_scripts, "libMscBoostPython.git"))
+        self.git_object_cache = None
+        if self.args.git_cache:
+            if get_msc_git_server_cache():
+                # MscBoost.Git.clone() takes the objects from the MSC git server cache, the object cache would bypass it
+                LOG.notice("The git object cache '%s' is not used, clones are made with the MSC git server cache" % self.args.git_cache)
+            else:
+                self.git_object_cache = GitObjectCache(os.path.abspath(os.path.expanduser(self.args.git_cache)), self.args.git_cache_share_objects)
+
+        lib_mscboostpython_git = get_git_repository(os.path.join(self.msc_ldk_scripts, "libMscBoostPython.git"))
         LOG.notice("libMscBoostPython is at <%s>" % (lib_mscboostpython_git.get_checkout_info_string()))
-        git_server_info = "MSC-LDK git server: '%s'" % MSC_GIT_SERVER
-        if MSC_GIT_SERVER_CACHE:
-            git_server_info += ", MSC-LDK git server cache: '%s'" % MSC_GIT_SERVER_CACHE
+        git_server_info = "MSC-LDK git server: '%s'" % get_msc_git_server()
+        if get_msc_git_server_cache():
+            git_server_info += ", MSC-LDK git server cache: '%s'" % get_msc_git_server_cache()
+        if self.git_object_cache:
+            git_server_info += ", git object cache: '%s'" % self.git_object_cache.cache_dir
         LOG.notice(git_server_info)
         LOG.notice("MSC-LDK root: %s" % self.msc_ldk_root)
         LOG.notice("MSC-LDK is based on Yocto branch: %s, MSC-LDK is at <%s>" % (self.msc_ldk_based_on_yocto_branch, self.git_repo_msc_ldk.get_checkout_info_string()))
-        self.install_repo(os.path.join("msc", bsp_number, "msc-ldk-bsp-recipes"), self.bsp_layer)
+        return True
+
+    def get_bsp_layer_repo(self, bsp_number):
+        return os.path.join("msc", bsp_number, "msc-ldk-bsp-recipes")
+
+    @trace_events.traced()
+    def setup_ldk(self):
+        bsp, bsp_number, active_layer_names = self.select_combination()
+        if self.is_setup_unchanged(bsp, active_layer_names):
+            LOG.info("You can now cd to %s and run 'make' or './build.sh <image-name>'" % self.bsp_build_root)
+            return
+
+        if not self.prepare_setup():
+            return
+        self.install_repo(self.get_bsp_layer_repo(bsp_number), self.bsp_layer)
 
         # self.determine_variant() needs the BSPs msc-ldk-bsp-recipes repository to detect possible candidates
         variant = self.determine_variant(self.args.variant)
-        dir_elements = [e for e in [bsp, variant] if e]
-        dir_elements.extend(active_layer_names)
-        self.bsp_build_dir_name = "-".join(dir_elements)
-        self.bsp_build_root = os.path.join(msc_ldk_build_root, self.bsp_build_dir_name)
-
-        bsp_config_elems = []
-        bsp_config_elems.append("BSP=%s" % bsp_info_string)
-        if variant:
-            bsp_config_elems.append("Variant=%s" % variant)
-        layer_info_string = ", ".join([layer.description() for layer in self.active_layers])
-        if layer_info_string:
-            bsp_config_elems.append("Layers=%s" % layer_info_string)
-        LOG.notice("MSC-LDK Configuration: %s" % ", ".join(bsp_config_elems))
+        if variant is None:
+            self._exit(2)
+        self.set_bsp_build_root(bsp, variant, active_layer_names)
+        LOG.notice("MSC-LDK Configuration: %s" % self.get_bsp_config_info_string(bsp, bsp_number, variant))
 
         self.install_all_layers()
         self.create_bsp_build_dir(bsp, variant)
@@ -907,8 +1640,9 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
             final_msg = None
 
         self.store_default_settings()
+        self.store_setup_fingerprint(variant)
 
-        layer_snapshot = MscLdkSnapshot(self.msc_ldk_root, self.bsp_build_dir_name, self.bsp_build_root, self.bsp_mapping)
+        layer_snapshot = MscLdkSnapshot(self.msc_ldk_root, self.bsp_build_dir_name, self.bsp_build_root, self.bsp_mapping, self.args.jobs)
         if self.args.show_layer_info:
             LOG.info("MSC-LDK Layer Info:")
             layer_snapshot.show_layer_info()
@@ -916,8 +1650,169 @@ PREFERRED_PROVIDER_jpeg-native = "libjpeg-turbo-native"
         if final_msg:
             LOG.info(final_msg)
 
+    def select_existing_bsp_build_root(self):
+        """Selects the existing BSP build directory for --status and --write-snapshot (without fetching or checking out anything)."""
+        if not self.args.bsp:
+            LOG.error("--status and --write-snapshot need --bsp (or the settings of a previous setup.py run)")
+            return False
+        bsp, bsp_number, active_layer_names = self.select_combination()
+        if not os.path.isdir(self.bsp_layer):
+            LOG.error("BSP '%s' is not installed - run setup.py --bsp=%s first" % (bsp, bsp))
+            return False
+        variant = self.determine_variant(self.args.variant)
+        if variant is None:
+            return False
+        self.set_bsp_build_root(bsp, variant, active_layer_names)
+        if not os.path.exists(os.path.join(self.bsp_build_root, "conf", "bblayers.conf")):
+            LOG.error("'%s' does not exist - run setup.py first" % os.path.join(self.bsp_build_root, "conf", "bblayers.conf"))
+            return False
+        return True
+
+    def read_matrix_file(self, file_name):
+        """Returns the (line, args) combinations of a --matrix file, None for an invalid file.
+
+        Each line holds the setup.py options of one combination, e.g. '--bsp=C984 --variant=64 --layers-lxqt'.
+        Empty lines and lines starting with '#' are ignored.
+        """
+        matrix_arg_parser = argparse.ArgumentParser(prog="%s: --matrix" % file_name, add_help=False)
+        matrix_arg_parser.add_argument("--bsp", required=True)
+        matrix_arg_parser.add_argument("--variant", default="")
+        matrix_arg_parser.add_argument("--local-conf-append")
+        for layer in self.layers:
+            matrix_arg_parser.add_argument("--layers-%s" % layer.name, action="store_true")
+        try:
+            lines = open(file_name).readlines()
+        except (OSError, IOError) as e:
+            LOG.error("Reading matrix file failed: %s" % e)
+            return None
+        combinations = []
+        for line_nr, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                matrix_args = matrix_arg_parser.parse_args(shlex.split(line))
+            except SystemExit:
+                LOG.error("Malformed line %d in '%s': '%s'" % (line_nr, file_name, line))
+                return None
+            if not self.is_known_bsp(matrix_args.bsp):
+                return None
+            args = copy.copy(self.args)
+            for name, value in matrix_args._get_kwargs():
+                setattr(args, name, value)
+            combinations.append((line, args))
+        if not combinations:
+            LOG.error("No combinations found in matrix file '%s'" % file_name)
+            return None
+        return combinations
+
+    def setup_ldk_matrix(self):
+        """Prepares the BSP build directories of all combinations of the --matrix file in one run.
+
+        The repositories needed by all combinations are resolved and installed once,
+        afterwards the build directories are created one after another.
+        """
+        combinations = self.read_matrix_file(self.args.matrix)
+        if combinations is None:
+            return
+        matrix_args = self.args
+        results = []
+        pending_combinations = []
+        for line, args in combinations:
+            self.args = args
+            bsp, bsp_number, active_layer_names = self.select_combination()
+            if self.is_setup_unchanged(bsp, active_layer_names):
+                results.append((line, self.bsp_build_dir_name, "unchanged"))
+            else:
+                pending_combinations.append((line, args))
+
+        if pending_combinations:
+            self.args = matrix_args
+            if not self.prepare_setup():
+                return
+            # The BSP layers are installed first, they contain the layers-bsp.csv files
+            bsp_layer_repos = []
+            for line, args in pending_combinations:
+                self.args = args
+                bsp, bsp_number, active_layer_names = self.select_combination()
+                bsp_layer_repo = (self.get_bsp_layer_repo(bsp_number), self.bsp_layer, "")
+                if bsp_layer_repo not in bsp_layer_repos:
+                    bsp_layer_repos.append(bsp_layer_repo)
+            self.args = matrix_args
+            failed_repos = self.install_repositories(bsp_layer_repos)
+
+            # Union of the layer repositories of all combinations. Without --layer-worktrees a
+            # repository can only be on one branch, different requested branches fail the matrix.
+            layer_repos = {}
+            requesting_lines = {}
+            conflicts = []
+            for line, args in pending_combinations:
+                self.args = args
+                self.select_combination()
+                for repo, local_repo_dir, branch in self.collect_layers():
+                    if repo not in layer_repos:
+                        layer_repos[repo] = (repo, local_repo_dir, branch)
+                        requesting_lines[repo] = line
+                    elif layer_repos[repo][2] != branch and not self.args.layer_worktrees:
+                        conflicts.append((repo, layer_repos[repo][2], requesting_lines[repo], branch, line))
+            self.args = matrix_args
+            if conflicts:
+                for repo, first_branch, first_line, branch, line in conflicts:
+                    LOG.error("Repository '%s': branch '%s' requested by '%s' conflicts with branch '%s' requested by '%s'" %
+                              (repo, first_branch or "<default>", first_line, branch or "<default>", line))
+                LOG.error("The matrix combinations need different branches of the same repositories, use --layer-worktrees or separate --matrix files")
+                return
+            LOG.notice("Installing %d repositories for %d MSC-LDK configurations" % (len(layer_repos), len(pending_combinations)))
+            failed_repos.extend(self.install_repositories([layer_repos[repo] for repo in sorted(layer_repos)], self.args.layer_worktrees))
+
+            for line, args in pending_combinations:
+                self.args = args
+                self.matrix_combination = line
+                self.error_and_warning_count_baseline = self.get_error_and_warning_count()
+                bsp, bsp_number, active_layer_names = self.select_combination()
+                result = self.setup_matrix_combination(bsp, bsp_number, active_layer_names, failed_repos)
+                results.append((line, self.bsp_build_dir_name, result))
+            self.args = matrix_args
+            self.matrix_combination = None
+            self.error_and_warning_count_baseline = 0
+            if self.in_msc_network():
+                self.setup_msc_ldk_maintainer()
+
+        results.sort(key=lambda result: [line for line, args in combinations].index(result[0]))
+        LOG.info("MSC-LDK matrix setup results:")
+        for line, bsp_build_dir_name, result in results:
+            LOG.out(0, "  %-30s %-40s %s" % (bsp_build_dir_name or "-", line, result))
+        if self.inform_about_checkout_layers:
+            LOG.info("Add the option --checkout-layers to checkout the required branches for all MSC-LDK layers")
+
+    def setup_matrix_combination(self, bsp, bsp_number, active_layer_names, failed_repos):
+        """Creates the BSP build directory of one --matrix combination, returns the result string."""
+        self.bsp_build_dir_name = None
+        if self.get_bsp_layer_repo(bsp_number) in failed_repos:
+            return "failed (repository '%s' not installed)" % self.get_bsp_layer_repo(bsp_number)
+        variant = self.determine_variant(self.args.variant)
+        if variant is None:
+            return "failed (variant '%s' not supported)" % self.args.variant
+        self.set_bsp_build_root(bsp, variant, active_layer_names)
+        LOG.notice("MSC-LDK Configuration: %s" % self.get_bsp_config_info_string(bsp, bsp_number, variant))
+        layer_repos = self.collect_layers()
+        missing_repos = [repo for repo, local_repo_dir, branch in layer_repos if repo in failed_repos]
+        if missing_repos:
+            LOG.error("%s: repositories not installed: %s" % (self.bsp_build_dir_name, ", ".join(missing_repos)))
+            return "failed (repositories not installed: %s)" % ", ".join(missing_repos)
+        if self.args.layer_worktrees:
+            self.use_layer_worktrees(layer_repos)
+        created = self.create_bsp_build_dir(bsp, variant)
+        self.store_setup_fingerprint(variant)
+        if self.did_errors_or_warnings_happen():
+            return "failed (%d errors/warnings)" % (self.get_error_and_warning_count() - self.error_and_warning_count_baseline)
+        if not created:
+            return "skipped"
+        return "created"
+
     def _main(self):
-        raise Exception("""
+        if not MSC_LDK_IGNORE_MOVED:
+            raise Exception("""
 
 MSC-LDK has been moved to a new repository.
 This repository will no longer be updated.
@@ -930,27 +1825,37 @@ to improve build speed.
 
 """)
         
+        if self.args.sstate_mirror and get_sstate_mirrors_entry(self.args.sstate_mirror) is None:
+            LOG.error("Unsupported sstate mirror '%s' (use file:///<dir> or http(s)://<server>/<dir>)" % self.args.sstate_mirror)
+            self._exit(1)
         setup_msc_ldk = False
         setup_msc_ldk |= self.read_version_layer_file_maybe(fill_command_line_parameters=True)
-        self.use_default_settings_maybe()
-        if self.args.bsp:
-            # BSP numbers start with max. 2 alphanumeric chars followed by numeric chars
-            if self.args.bsp[:2].isalnum() and self.args.bsp[2:].isnumeric():
-                # A well formed BSP number -> we can't verify whether it is available
-                pass
-            else:
-                known_bsp_names = self.bsp_mapping.keys()
-                # Check whether a known BPS from bsp-mapping.csv is given
-                if self.args.bsp not in known_bsp_names:
-                    LOG.error("BSP '%s' is not known - did you mean: '%s'" % (self.args.bsp, FindBestMatch(self.args.bsp, known_bsp_names)))
-                    self._exit(1)
-            setup_msc_ldk = True
-        if setup_msc_ldk:
-            self.setup_ldk()
+        if not self.args.matrix:
+            self.use_default_settings_maybe()
+        if self.args.status or self.args.write_snapshot:
+            if self.select_existing_bsp_build_root():
+                layer_snapshot = MscLdkSnapshot(self.msc_ldk_root, self.bsp_build_dir_name, self.bsp_build_root, self.bsp_mapping, self.args.jobs)
+                if self.args.status:
+                    LOG.info("Layer status of %s:" % self.bsp_build_root)
+                    layer_snapshot.show_layer_status()
+                if self.args.write_snapshot:
+                    layer_snapshot.write_snapshot(self.args.write_snapshot)
+        elif self.args.matrix:
+            if setup_msc_ldk or self.args.bsp:
+                LOG.error("--matrix can't be combined with --version-file or --bsp")
+                self._exit(1)
+            self.setup_ldk_matrix()
         else:
-            check_tools()
-            check_git_access()
-            self._print_usage_and_exit()
+            if self.args.bsp:
+                if not self.is_known_bsp(self.args.bsp):
+                    self._exit(1)
+                setup_msc_ldk = True
+            if setup_msc_ldk:
+                self.setup_ldk()
+            else:
+                check_tools()
+                check_git_access()
+                self._print_usage_and_exit()
         if self.did_errors_or_warnings_happen():
             self._exit(1)
 
@@ -0,0 +1,30 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Size strings for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : size_units.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Parses size budgets like '200G' and formats byte counts for the
+#               output of the cache, image and install tools.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+def parse_size(size):
+    """Converts '200G', '500M', '1T' or a number of bytes to bytes."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    size = size.strip().upper().rstrip("B").rstrip("I")
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+def format_size(size):
+    """Formats a number of bytes like '1.5 GiB'."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            break
+        size /= 1024.0
+    return "%.1f %s" % (size, unit)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# ----------------------------------------------------------------------------------
+#  Title      : Publish sstate objects to the shared sstate mirror
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : sstate_publish.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Copies the sstate objects of a build directory (e.g. of the
+#               nightly build) into the directory that is served as sstate
+#               mirror (setup.py --sstate-mirror). Objects that are already in
+#               the mirror are skipped, all others are copied in one run.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import cache_cleanup
+import size_units
+
+def get_build_dir_sstate_dir(build_dir):
+    """Returns the SSTATE_DIR set by setup.py in the local.conf of build_dir, None if not found.
+
+    Like in bitbake the last '=' wins, otherwise the first '?=', otherwise the last '??='.
+    """
+    values = {"=": None, "?=": None, "??=": None}
+    try:
+        with open(os.path.join(build_dir, "conf", "local.conf")) as f:
+            for line in f:
+                match = re.match(r'\s*SSTATE_DIR\s*(\?{0,2}=)\s*"([^"$]+)"', line)
+                if match:
+                    operator, value = match.groups()
+                    if operator != "?=" or values["?="] is None:
+                        values[operator] = value
+    except (OSError, IOError):
+        pass
+    return values["="] or values["?="] or values["??="]
+
+def get_sstate_files(sstate_dir, build_dirs):
+    """Returns the paths (relative to sstate_dir) of the sstate objects used by build_dirs, all objects when build_dirs is empty."""
+    task_hashes = set()
+    for build_dir in build_dirs:
+        task_hashes.update(cache_cleanup.get_referenced_task_hashes(build_dir))
+    sstate_files = []
+    for entry in cache_cleanup.scan_sstate_dir(sstate_dir):
+        if entry.task_hash is None or (build_dirs and entry.task_hash not in task_hashes):
+            continue
+        # The archive is published after its .siginfo: a mirror user never sees an archive without it
+        for path in sorted(entry.paths, key=lambda path: not path.endswith(".siginfo")):
+            sstate_files.append(os.path.relpath(path, sstate_dir))
+    return sstate_files
+
+def publish_to_directory(sstate_dir, sstate_files, mirror_dir):
+    """Copies sstate_files into mirror_dir, returns the number of copied bytes."""
+    copied_size = 0
+    for sstate_file in sstate_files:
+        dest = os.path.join(mirror_dir, sstate_file)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_dest = "%s.tmp-%d" % (dest, os.getpid())
+        shutil.copyfile(os.path.join(sstate_dir, sstate_file), tmp_dest)
+        os.chmod(tmp_dest, 0o644)
+        os.replace(tmp_dest, dest)
+        copied_size += os.path.getsize(dest)
+    return copied_size
+
+def publish_with_rsync(sstate_dir, sstate_files, mirror, dry_run):
+    """Copies the sstate_files that are not yet in the remote mirror ('[user@]host:dir') with one rsync call."""
+    cmd = ["rsync", "--archive", "--ignore-existing", "--chmod=F644,D755", "--files-from=-", "--stats"]
+    if dry_run:
+        cmd.append("--dry-run")
+    cmd.extend([sstate_dir + "/", mirror.rstrip("/") + "/"])
+    rsync = subprocess.run(cmd, input="\n".join(sstate_files) + "\n", universal_newlines=True)
+    return rsync.returncode
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Publishes sstate objects to the shared sstate mirror (see setup.py --sstate-mirror).")
+    arg_parser.add_argument("mirror", help="The directory served as sstate mirror: a local directory (or file://<dir>) or '[user@]host:<dir>' (copied with rsync).")
+    arg_parser.add_argument("--build-dir", action="append", dest="build_dirs", default=[],
+                            help="Only publish the sstate objects used by this build directory, can be given several times.")
+    arg_parser.add_argument("--sstate-dir", help="The sstate cache (default: SSTATE_DIR of the first --build-dir, $MSC_LDK_YOCTO_SSTATE_DIR or sstate-cache/).")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only show what would be published.")
+    args = arg_parser.parse_args()
+
+    sstate_dir = args.sstate_dir
+    if sstate_dir is None and args.build_dirs:
+        sstate_dir = get_build_dir_sstate_dir(args.build_dirs[0])
+    if sstate_dir is None:
+        sstate_dir = cache_cleanup.get_default_dir("MSC_LDK_YOCTO_SSTATE_DIR", "sstate-cache")
+    if not os.path.isdir(sstate_dir):
+        print("ERROR: sstate cache %s not found" % sstate_dir, file=sys.stderr)
+        return 1
+    sstate_files = get_sstate_files(sstate_dir, args.build_dirs)
+
+    mirror = args.mirror
+    if mirror.startswith("file://"):
+        mirror = mirror[len("file://"):]
+    if ":" in mirror.split("/")[0]:
+        print("Publishing %d sstate files from %s to %s" % (len(sstate_files), sstate_dir, mirror))
+        return publish_with_rsync(sstate_dir, sstate_files, mirror, args.dry_run)
+
+    new_files = [sstate_file for sstate_file in sstate_files if not os.path.exists(os.path.join(mirror, sstate_file))]
+    new_size = sum(os.path.getsize(os.path.join(sstate_dir, sstate_file)) for sstate_file in new_files)
+    print("%s: %d of %d sstate files are new (%s)" % (mirror, len(new_files), len(sstate_files), size_units.format_size(new_size)))
+    if args.dry_run:
+        for sstate_file in new_files:
+            print("Would publish %s" % sstate_file)
+        return 0
+    copied_size = publish_to_directory(sstate_dir, new_files, mirror)
+    print("%s: published %d sstate files (%s)" % (mirror, len(new_files), size_units.format_size(copied_size)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
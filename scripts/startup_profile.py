@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Startup profiling for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : startup_profile.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: The --profile-startup option of setup.py and update.py: runs the
+#               script with 'python3 -X importtime' and shows the slowest imports
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import subprocess
+import sys
+
+PROFILE_STARTUP_OPTION = "--profile-startup"
+# Set for the child process that runs the script with 'python3 -X importtime'
+PROFILE_STARTUP_ENV = "MSC_LDK_PROFILE_STARTUP"
+
+def _print_import_times(importtime_output, top_n=25):
+    """Prints the modules with the highest cumulative import time from 'python3 -X importtime' output."""
+    import_times = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue # Header line
+        import_times.append((int(fields[1]), int(fields[0]), fields[2].rstrip()))
+    if not import_times:
+        return
+    print("Import times (top %d by cumulative time):" % top_n, file=sys.stderr)
+    print("  %10s %10s  %s" % ("cumul. ms", "self ms", "module"), file=sys.stderr)
+    for cumulative_us, self_us, module in sorted(import_times, reverse=True)[:top_n]:
+        print("  %10.1f %10.1f  %s" % (cumulative_us / 1000.0, self_us / 1000.0, module), file=sys.stderr)
+    print("  %10.1f ms for %d imported modules" % (sum(t[1] for t in import_times) / 1000.0, len(import_times)), file=sys.stderr)
+
+def start():
+    """Handles --profile-startup, has to be called right after the script has started.
+
+    The script is run again with 'python3 -X importtime', its import times are shown when it exits.
+    """
+    if PROFILE_STARTUP_OPTION not in sys.argv or os.environ.get(PROFILE_STARTUP_ENV):
+        return
+    env = dict(os.environ)
+    env[PROFILE_STARTUP_ENV] = "1"
+    profiled_run = subprocess.run([sys.executable, "-X", "importtime"] + sys.argv, env=env, stderr=subprocess.PIPE, universal_newlines=True)
+    _print_import_times(profiled_run.stderr)
+    sys.exit(profiled_run.returncode)
@@ -0,0 +1,71 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of build_coordinator.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_build_coordinator.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import build_coordinator
+
+def create_build(name, share=None, cpu_usage=None):
+    build = build_coordinator.Build(os.path.join("/nonexistent", name))
+    build.share = share
+    build.cpu_usage = cpu_usage
+    return build
+
+class CalculateSharesTest(unittest.TestCase):
+    def test_even_split(self):
+        builds = [create_build("a"), create_build("b")]
+        shares = build_coordinator.calculate_shares(builds, 16)
+        self.assertEqual([shares[build] for build in builds], [8, 8])
+
+    def test_remainder_goes_to_the_first_builds(self):
+        builds = [create_build("a"), create_build("b"), create_build("c")]
+        shares = build_coordinator.calculate_shares(builds, 8)
+        self.assertEqual([shares[build] for build in builds], [3, 3, 2])
+
+    def test_every_build_gets_one_job(self):
+        builds = [create_build("a"), create_build("b"), create_build("c")]
+        shares = build_coordinator.calculate_shares(builds, 2)
+        self.assertEqual([shares[build] for build in builds], [1, 1, 1])
+
+    def test_idle_build_keeps_what_it_uses(self):
+        # 'a' uses 1 of its 8 jobs (e.g. do_rootfs): it keeps 2, the busy build gets the rest
+        idle = create_build("a", share=8, cpu_usage=1.0)
+        busy = create_build("b", share=8, cpu_usage=7.5)
+        shares = build_coordinator.calculate_shares([idle, busy], 16)
+        self.assertEqual(shares[idle], 2)
+        self.assertEqual(shares[busy], 14)
+
+    def test_idle_build_without_cpu_usage(self):
+        idle = create_build("a", share=8, cpu_usage=0.0)
+        busy = create_build("b", share=8, cpu_usage=None)
+        shares = build_coordinator.calculate_shares([idle, busy], 16)
+        self.assertEqual(shares[idle], 1)
+        self.assertEqual(shares[busy], 15)
+
+    def test_all_builds_idle(self):
+        builds = [create_build("a", share=8, cpu_usage=1.0), create_build("b", share=8, cpu_usage=0.5)]
+        shares = build_coordinator.calculate_shares(builds, 16)
+        self.assertEqual([shares[build] for build in builds], [8, 8])
+
+    def test_shares_stay_within_budget(self):
+        builds = [create_build("a", share=4, cpu_usage=1.0), create_build("b", share=6, cpu_usage=6.0), create_build("c")]
+        shares = build_coordinator.calculate_shares(builds, 12)
+        self.assertEqual(sum(shares.values()), 12)
+
+if __name__ == "__main__":
+    unittest.main()
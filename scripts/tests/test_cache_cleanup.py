@@ -0,0 +1,126 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of cache_cleanup.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_cache_cleanup.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import cache_cleanup
+
+HASH_A = "0123456789abcdef" * 2
+HASH_B = "fedcba9876543210" * 4
+SSTATE_FILE_A = "sstate:zlib:core2-64-poky-linux:1.2.8:r0:core2-64:3:%s_populate_sysroot.tgz" % HASH_A
+SSTATE_FILE_B = "sstate:busybox:core2-64-poky-linux:1.24.1:r0:core2-64:3:%s_package_write_rpm.tgz" % HASH_B
+
+class SstateRegexTest(unittest.TestCase):
+    def test_sstate_archive(self):
+        self.assertEqual(cache_cleanup.SSTATE_HASH_RE.search(SSTATE_FILE_A).group(1), HASH_A)
+        self.assertEqual(cache_cleanup.SSTATE_HASH_RE.search(SSTATE_FILE_B).group(1), HASH_B)
+
+    def test_siginfo(self):
+        self.assertEqual(cache_cleanup.SSTATE_HASH_RE.search(SSTATE_FILE_A + ".siginfo").group(1), HASH_A)
+
+    def test_no_sstate_archive(self):
+        for file_name in ["index.html", SSTATE_FILE_A + ".tmp",
+                          "sstate:zlib:%s_populate_sysroot.tar" % HASH_A,
+                          "sstate:zlib:%s_populate_sysroot.tgz" % HASH_A[:16]]:
+            self.assertIsNone(cache_cleanup.SSTATE_HASH_RE.search(file_name), file_name)
+
+    def test_stamps(self):
+        self.assertEqual(cache_cleanup.STAMP_HASH_RE.search("1.2.8-r0.do_compile.%s" % HASH_A).group(1), HASH_A)
+        self.assertEqual(cache_cleanup.STAMP_HASH_RE.search("1.2.8-r0.do_populate_sysroot_setscene.%s.core2-64" % HASH_B).group(1), HASH_B)
+        self.assertIsNone(cache_cleanup.STAMP_HASH_RE.search("1.2.8-r0.do_fetch"))
+        self.assertIsNone(cache_cleanup.STAMP_HASH_RE.search("1.2.8-r0.do_compile.%s" % HASH_A[:16]))
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_file(self, relative_path, size=4096):
+        path = os.path.join(self.tmp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_scan_sstate_dir(self):
+        sstate_dir = os.path.join(self.tmp_dir, "sstate-cache")
+        self.create_file(os.path.join("sstate-cache", HASH_A[:2], SSTATE_FILE_A))
+        self.create_file(os.path.join("sstate-cache", HASH_A[:2], SSTATE_FILE_A + ".siginfo"))
+        self.create_file(os.path.join("sstate-cache", HASH_B[:2], SSTATE_FILE_B))
+        self.create_file(os.path.join("sstate-cache", "index.html"))
+        entries = dict((os.path.basename(entry.key), entry) for entry in cache_cleanup.scan_sstate_dir(sstate_dir))
+        self.assertEqual(sorted(entries), sorted([SSTATE_FILE_A, SSTATE_FILE_B, "index.html"]))
+        # The .siginfo is removed together with its archive
+        self.assertEqual(len(entries[SSTATE_FILE_A].paths), 2)
+        self.assertEqual(entries[SSTATE_FILE_A].task_hash, HASH_A)
+        self.assertEqual(entries[SSTATE_FILE_B].task_hash, HASH_B)
+        self.assertIsNone(entries["index.html"].task_hash)
+
+    def test_get_referenced_task_hashes(self):
+        build_dir = os.path.join(self.tmp_dir, "build")
+        self.create_file(os.path.join("build", "tmp", "stamps", "core2-64-poky-linux", "zlib", "1.2.8-r0.do_compile.%s" % HASH_A), 0)
+        self.create_file(os.path.join("build", "tmp-glibc", "stamps", "x86_64-linux", "busybox", "1.24.1-r0.do_install.%s.core2-64" % HASH_B), 0)
+        self.create_file(os.path.join("build", "tmp", "stamps", "core2-64-poky-linux", "zlib", "1.2.8-r0.do_fetch"), 0)
+        self.assertEqual(cache_cleanup.get_referenced_task_hashes(build_dir), set([HASH_A, HASH_B]))
+
+    def create_entries(self, sizes_and_ages):
+        entries = []
+        for index, (size, age_days) in enumerate(sizes_and_ages):
+            entry = cache_cleanup.CacheEntry(os.path.join(self.tmp_dir, "entry%d" % index))
+            path = self.create_file("entry%d" % index)
+            entry.add(path, size, 1000000000 - age_days * 86400)
+            entries.append(entry)
+        return entries
+
+    def test_evict_least_recently_used_first(self):
+        old, new, oldest = self.create_entries([(100, 10), (100, 1), (100, 20)])
+        removed_count, removed_size, remaining_size = cache_cleanup.evict([old, new, oldest], 150, lambda entry: False, False)
+        self.assertEqual((removed_count, removed_size, remaining_size), (2, 200, 100))
+        self.assertFalse(os.path.exists(oldest.key))
+        self.assertFalse(os.path.exists(old.key))
+        self.assertTrue(os.path.exists(new.key))
+
+    def test_evict_within_budget(self):
+        entries = self.create_entries([(100, 10), (100, 1)])
+        self.assertEqual(cache_cleanup.evict(entries, 200, lambda entry: False, False), (0, 0, 200))
+        self.assertTrue(all(os.path.exists(entry.key) for entry in entries))
+
+    def test_evict_keeps_protected_entries(self):
+        protected, unprotected = self.create_entries([(100, 20), (100, 10)])
+        result = cache_cleanup.evict([protected, unprotected], 0, lambda entry: entry is protected, False)
+        self.assertEqual(result, (1, 100, 100))
+        self.assertTrue(os.path.exists(protected.key))
+        self.assertFalse(os.path.exists(unprotected.key))
+
+    def test_evict_dry_run(self):
+        entries = self.create_entries([(100, 10), (100, 1)])
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            result = cache_cleanup.evict(entries, 100, lambda entry: False, True)
+        self.assertEqual(result, (1, 100, 100))
+        self.assertIn("Would remove %s" % entries[0].key, output.getvalue())
+        self.assertTrue(all(os.path.exists(entry.key) for entry in entries))
+
+if __name__ == "__main__":
+    unittest.main()
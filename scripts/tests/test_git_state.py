@@ -0,0 +1,140 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of git_state.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_git_state.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import git_state
+
+SHA1_A = "a" * 40
+SHA1_B = "b" * 40
+SHA1_C = "c" * 40
+
+class GitStatusTest(unittest.TestCase):
+    def test_clean_branch(self):
+        status = git_state.GitStatus("\n".join([
+            "# branch.oid %s" % SHA1_A,
+            "# branch.head jethro-msc",
+            "# branch.upstream origin/jethro-msc",
+            "# branch.ab +2 -3",
+        ]))
+        self.assertEqual(status.head_sha1, SHA1_A)
+        self.assertEqual(status.branch, "jethro-msc")
+        self.assertEqual(status.upstream, "origin/jethro-msc")
+        self.assertEqual((status.ahead, status.behind), (2, 3))
+        self.assertFalse(status.is_dirty())
+        self.assertEqual(status.get_branch_string(), "jethro-msc")
+        self.assertEqual(status.get_ahead_behind_string(), "+2/-3")
+        self.assertEqual(status.get_state_string(), "clean")
+
+    def test_detached_without_upstream(self):
+        status = git_state.GitStatus("# branch.oid %s\n# branch.head (detached)\n" % SHA1_A)
+        self.assertIsNone(status.branch)
+        self.assertIsNone(status.upstream)
+        self.assertEqual(status.get_branch_string(), "(detached at aaaaaaaaaa)")
+        self.assertEqual(status.get_ahead_behind_string(), "-")
+
+    def test_changes(self):
+        status = git_state.GitStatus("\n".join([
+            "# branch.oid %s" % SHA1_A,
+            "# branch.head master",
+            "1 M. N... 100644 100644 100644 %s %s staged.txt" % (SHA1_B, SHA1_C),
+            "1 .M N... 100644 100644 100644 %s %s modified.txt" % (SHA1_B, SHA1_B),
+            "1 MM N... 100644 100644 100644 %s %s both.txt" % (SHA1_B, SHA1_C),
+            "2 R. N... 100644 100644 100644 %s %s R100 new.txt\told.txt" % (SHA1_B, SHA1_B),
+            "u UU N... 100644 100644 100644 100644 %s %s %s conflict.txt" % (SHA1_A, SHA1_B, SHA1_C),
+            "? untracked.txt",
+        ]))
+        self.assertEqual(status.staged, 3)
+        self.assertEqual(status.modified, 2)
+        self.assertEqual(status.conflicts, 1)
+        self.assertEqual(status.untracked, 1)
+        self.assertTrue(status.is_dirty())
+        self.assertEqual(status.get_state_string(), "1 conflicts, 3 staged, 2 modified, 1 untracked")
+
+    def test_untracked_files_only(self):
+        status = git_state.GitStatus("# branch.oid %s\n# branch.head master\n? untracked.txt\n" % SHA1_A)
+        self.assertFalse(status.is_dirty())
+        self.assertTrue(status.is_dirty(untracked_files=True))
+
+class ReadGitHeadTest(unittest.TestCase):
+    """The repositories are written by hand, so the tests don't need git."""
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.repo_dir = os.path.join(self.tmp_dir, "repo")
+        self.git_dir = os.path.join(self.repo_dir, ".git")
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, path, content):
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_loose_ref(self):
+        self.write(os.path.join(self.git_dir, "HEAD"), "ref: refs/heads/master\n")
+        self.write(os.path.join(self.git_dir, "refs", "heads", "master"), SHA1_A + "\n")
+        self.assertEqual(git_state.read_git_head(self.repo_dir), ("ref: refs/heads/master", SHA1_A))
+
+    def test_packed_ref(self):
+        self.write(os.path.join(self.git_dir, "HEAD"), "ref: refs/heads/master\n")
+        self.write(os.path.join(self.git_dir, "packed-refs"),
+                   "# pack-refs with: peeled fully-peeled sorted\n%s refs/heads/develop\n%s refs/heads/master\n" % (SHA1_B, SHA1_A))
+        self.assertEqual(git_state.read_git_head(self.repo_dir)[1], SHA1_A)
+
+    def test_detached(self):
+        self.write(os.path.join(self.git_dir, "HEAD"), SHA1_C + "\n")
+        self.assertEqual(git_state.read_git_head(self.repo_dir), (SHA1_C, SHA1_C))
+
+    def test_unborn_branch(self):
+        self.write(os.path.join(self.git_dir, "HEAD"), "ref: refs/heads/master\n")
+        self.assertEqual(git_state.read_git_head(self.repo_dir), ("ref: refs/heads/master", None))
+
+    def test_no_repository(self):
+        self.assertEqual(git_state.read_git_head(os.path.join(self.tmp_dir, "missing")), (None, None))
+
+    def test_worktree(self):
+        # A worktree has its own HEAD, the branches are in the common git dir of the repository
+        self.write(os.path.join(self.git_dir, "refs", "heads", "develop"), SHA1_B + "\n")
+        worktree_git_dir = os.path.join(self.git_dir, "worktrees", "wt")
+        self.write(os.path.join(worktree_git_dir, "HEAD"), "ref: refs/heads/develop\n")
+        self.write(os.path.join(worktree_git_dir, "commondir"), "../..\n")
+        worktree_dir = os.path.join(self.tmp_dir, "wt")
+        self.write(os.path.join(worktree_dir, ".git"), "gitdir: %s\n" % worktree_git_dir)
+        git_dir, common_dir = git_state.get_git_dirs(worktree_dir)
+        self.assertEqual(os.path.realpath(git_dir), os.path.realpath(worktree_git_dir))
+        self.assertEqual(os.path.realpath(common_dir), os.path.realpath(self.git_dir))
+        self.assertEqual(git_state.read_git_head(worktree_dir)[1], SHA1_B)
+
+    def test_refs_digest(self):
+        self.write(os.path.join(self.git_dir, "HEAD"), "ref: refs/heads/master\n")
+        self.write(os.path.join(self.git_dir, "refs", "heads", "master"), SHA1_A + "\n")
+        digest = git_state.read_git_refs_digest(self.repo_dir)
+        self.assertEqual(git_state.read_git_refs_digest(self.repo_dir), digest)
+        self.write(os.path.join(self.git_dir, "refs", "tags", "v1.0.0"), SHA1_A + "\n")
+        tagged_digest = git_state.read_git_refs_digest(self.repo_dir)
+        self.assertNotEqual(tagged_digest, digest)
+        self.write(os.path.join(self.git_dir, "refs", "remotes", "origin", "master"), SHA1_B + "\n")
+        self.assertNotEqual(git_state.read_git_refs_digest(self.repo_dir), tagged_digest)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of install_artifacts.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_install_artifacts.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import install_artifacts
+
+class InstallArtifactsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.deploy_dir = os.path.join(self.tmp_dir, "deploy")
+        self.dest_dir = os.path.join(self.tmp_dir, "dest")
+        os.makedirs(self.deploy_dir)
+        # The source directory of the manifest entries is the current directory
+        self.old_cwd = os.getcwd()
+        os.chdir(self.deploy_dir)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def write_source(self, name, content, mtime=1000000000):
+        source = os.path.join(self.deploy_dir, name)
+        with open(source, "w") as f:
+            f.write(content)
+        os.chmod(source, 0o644)
+        os.utime(source, (mtime, mtime))
+        return source
+
+    def install(self, sources, **kwargs):
+        # Copies: a hardlink would share every later change of the source with the destination
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            failed_count = install_artifacts.install_artifacts(sources, self.dest_dir, use_links=False, **kwargs)
+        self.assertEqual(failed_count, 0)
+        return output.getvalue()
+
+    def is_unchanged(self, source):
+        manifest = install_artifacts.read_manifest(self.dest_dir)
+        artifact = install_artifacts.Artifact(source, self.dest_dir)
+        return install_artifacts.is_unchanged(artifact, manifest.get(artifact.name))
+
+    def test_not_installed(self):
+        source = self.write_source("zImage", "kernel")
+        self.assertFalse(self.is_unchanged(source))
+
+    def test_installed(self):
+        source = self.write_source("zImage", "kernel")
+        self.install([source])
+        self.assertTrue(self.is_unchanged(source))
+        self.assertIn("0 installed (0.0 B), 1 unchanged", self.install([source]))
+
+    def test_rebuilt_with_identical_content(self):
+        source = self.write_source("zImage", "kernel")
+        self.install([source])
+        self.write_source("zImage", "kernel", mtime=1000000100)
+        self.assertTrue(self.is_unchanged(source))
+        # The destination gets the new mtime, the next check needs no checksum
+        self.assertEqual(os.stat(os.path.join(self.dest_dir, "zImage")).st_mtime, 1000000100)
+
+    def test_rebuilt_with_new_content(self):
+        source = self.write_source("zImage", "kernel")
+        self.install([source])
+        self.write_source("zImage", "KERNEL", mtime=1000000100)
+        self.assertFalse(self.is_unchanged(source))
+        self.install([source])
+        with open(os.path.join(self.dest_dir, "zImage")) as f:
+            self.assertEqual(f.read(), "KERNEL")
+
+    def test_modified_in_dest_dir(self):
+        source = self.write_source("zImage", "kernel")
+        self.install([source])
+        with open(os.path.join(self.dest_dir, "zImage"), "w") as f:
+            f.write("edited")
+        self.assertFalse(self.is_unchanged(source))
+
+    def test_removed_from_dest_dir(self):
+        source = self.write_source("zImage", "kernel")
+        self.install([source])
+        os.unlink(os.path.join(self.dest_dir, "zImage"))
+        self.assertFalse(self.is_unchanged(source))
+
+    def test_stale_files(self):
+        kernel = self.write_source("zImage", "kernel")
+        rootfs = self.write_source("rootfs.tar.bz2", "rootfs")
+        self.install([kernel, rootfs])
+        with open(os.path.join(self.dest_dir, "README"), "w") as f:
+            f.write("not installed by install_artifacts.py")
+        self.install([kernel])
+        self.assertEqual(sorted(os.listdir(self.dest_dir)), sorted([install_artifacts.MANIFEST_FILE_NAME, "README", "zImage"]))
+        self.install([kernel], exact=True)
+        self.assertEqual(sorted(os.listdir(self.dest_dir)), sorted([install_artifacts.MANIFEST_FILE_NAME, "zImage"]))
+
+if __name__ == "__main__":
+    unittest.main()
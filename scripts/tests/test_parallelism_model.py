@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of parallelism_model.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_parallelism_model.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import parallelism_model
+
+class ParallelismModelTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_model(self, values):
+        model_file = os.path.join(self.tmp_dir, "parallelism.conf")
+        with open(model_file, "w") as f:
+            f.write("[parallelism]\n")
+            for name, value in sorted(values.items()):
+                f.write("%s = %s\n" % (name, value))
+        return parallelism_model.ParallelismModel([model_file, os.path.join(self.tmp_dir, "missing.conf")])
+
+    def calculate(self, model, cpu_count, memory_gb):
+        bb_number_threads, parallel_make, report = model.calculate(self.tmp_dir, cpu_count, memory_gb)
+        return bb_number_threads, parallel_make
+
+    def test_limited_by_cpus(self):
+        model = self.create_model({"memory_per_job_gb": 2, "reserved_memory_gb": 2})
+        self.assertEqual(self.calculate(model, 8, 64.0), (8, "-j 8 -l 8"))
+
+    def test_limited_by_memory(self):
+        model = self.create_model({"memory_per_job_gb": 2, "reserved_memory_gb": 2})
+        self.assertEqual(self.calculate(model, 16, 18.0), (8, "-j 8 -l 8"))
+
+    def test_at_least_one_job(self):
+        model = self.create_model({"memory_per_job_gb": 2, "reserved_memory_gb": 2})
+        self.assertEqual(self.calculate(model, 4, 1.0), (1, "-j 1 -l 1"))
+
+    def test_maximum_values(self):
+        # The maximums only lower the threads and make jobs, the load limit stays at the host limit
+        model = self.create_model({"max_bb_number_threads": 6, "max_parallel_make": 4})
+        self.assertEqual(self.calculate(model, 32, 256.0), (6, "-j 4 -l 32"))
+
+    def test_memory_model_disabled(self):
+        model = self.create_model({"memory_per_job_gb": 0})
+        self.assertEqual(self.calculate(model, 4, 2.0), (4, "-j 4 -l 4"))
+        self.assertIsNone(model.get_memory_jobs(2.0))
+
+    def test_unknown_memory(self):
+        # None is the memory size of a build host without /proc/meminfo
+        self.assertIsNone(self.create_model({}).get_memory_jobs(None))
+
+    def test_report(self):
+        model = self.create_model({"min_free_disk_gb": 0})
+        report = model.calculate(os.path.join(self.tmp_dir, "build", "C984-64"), 4, 34.0)[2]
+        self.assertEqual(report[0], "Build host: 4 CPUs, 34.0 GiB memory (model: 2.0 GiB per job, 2.0 GiB reserved -> 16 jobs)")
+        self.assertEqual(report[1], "BB_NUMBER_THREADS = 4, PARALLEL_MAKE = -j 4 -l 4 (limited by 4 CPUs)")
+        self.assertEqual(report[2], "Parallelism model: %s" % os.path.join(self.tmp_dir, "parallelism.conf"))
+        self.assertTrue(report[3].endswith("GiB of free disk space in %s" % self.tmp_dir))
+
+    def test_job_budget(self):
+        model = self.create_model({"memory_per_job_gb": 4, "reserved_memory_gb": 4})
+        self.assertEqual(model.get_job_budget(32, 68.0), (16, "32 CPUs, 68.0 GiB memory (16 jobs)"))
+        self.assertEqual(model.get_job_budget(8, 68.0), (8, "8 CPUs, 68.0 GiB memory (16 jobs)"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of size_units.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_size_units.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import size_units
+
+class ParseSizeTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(size_units.parse_size("512K"), 512 * 1024)
+        self.assertEqual(size_units.parse_size("500M"), 500 * 1024 ** 2)
+        self.assertEqual(size_units.parse_size("200G"), 200 * 1024 ** 3)
+        self.assertEqual(size_units.parse_size("1T"), 1024 ** 4)
+
+    def test_spellings(self):
+        for size in ["2G", "2g", "2GB", "2GiB", " 2G "]:
+            self.assertEqual(size_units.parse_size(size), 2 * 1024 ** 3, size)
+
+    def test_fraction(self):
+        self.assertEqual(size_units.parse_size("1.5G"), int(1.5 * 1024 ** 3))
+
+    def test_bytes(self):
+        self.assertEqual(size_units.parse_size("4096"), 4096)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, size_units.parse_size, "lots")
+
+class FormatSizeTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(size_units.format_size(100), "100.0 B")
+        self.assertEqual(size_units.format_size(1536), "1.5 KiB")
+        self.assertEqual(size_units.format_size(3 * 1024 ** 2), "3.0 MiB")
+        self.assertEqual(size_units.format_size(1.5 * 1024 ** 3), "1.5 GiB")
+
+    def test_gib_is_the_largest_unit(self):
+        self.assertEqual(size_units.format_size(2 * 1024 ** 4), "2048.0 GiB")
+
+    def test_negative(self):
+        self.assertEqual(size_units.format_size(-2048), "-2.0 KiB")
+
+    def test_round_trip(self):
+        self.assertEqual(size_units.format_size(size_units.parse_size("200G")), "200.0 GiB")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of sstate_publish.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_sstate_publish.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import sstate_publish
+
+HASH_A = "0123456789abcdef" * 2
+HASH_B = "fedcba9876543210" * 2
+SSTATE_FILE_A = "sstate:zlib:core2-64-poky-linux:1.2.8:r0:core2-64:3:%s_populate_sysroot.tgz" % HASH_A
+SSTATE_FILE_B = "sstate:busybox:core2-64-poky-linux:1.24.1:r0:core2-64:3:%s_package.tgz" % HASH_B
+
+class SstatePublishTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.build_dir = os.path.join(self.tmp_dir, "build")
+        os.makedirs(os.path.join(self.build_dir, "conf"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_local_conf(self, lines):
+        with open(os.path.join(self.build_dir, "conf", "local.conf"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def create_file(self, relative_path):
+        path = os.path.join(self.tmp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, "w").close()
+
+    def test_assignment(self):
+        self.write_local_conf(['SSTATE_DIR = "/srv/sstate"'])
+        self.assertEqual(sstate_publish.get_build_dir_sstate_dir(self.build_dir), "/srv/sstate")
+
+    def test_last_assignment_wins(self):
+        self.write_local_conf(['SSTATE_DIR ?= "/srv/default"', 'SSTATE_DIR = "/srv/first"', 'SSTATE_DIR = "/srv/second"'])
+        self.assertEqual(sstate_publish.get_build_dir_sstate_dir(self.build_dir), "/srv/second")
+
+    def test_first_default_wins(self):
+        self.write_local_conf(['SSTATE_DIR ??= "/srv/weak"', 'SSTATE_DIR ?= "/srv/first"', 'SSTATE_DIR ?= "/srv/second"'])
+        self.assertEqual(sstate_publish.get_build_dir_sstate_dir(self.build_dir), "/srv/first")
+
+    def test_last_weak_default_wins(self):
+        self.write_local_conf(['SSTATE_DIR ??= "/srv/first"', 'SSTATE_DIR ??= "/srv/second"'])
+        self.assertEqual(sstate_publish.get_build_dir_sstate_dir(self.build_dir), "/srv/second")
+
+    def test_ignored_values(self):
+        # Comments, other variables and values with bitbake variables can't be resolved here
+        self.write_local_conf(['#SSTATE_DIR = "/srv/comment"', 'SSTATE_DIRS = "/srv/other"', 'SSTATE_DIR = "${TOPDIR}/sstate"'])
+        self.assertIsNone(sstate_publish.get_build_dir_sstate_dir(self.build_dir))
+
+    def test_no_local_conf(self):
+        self.assertIsNone(sstate_publish.get_build_dir_sstate_dir(os.path.join(self.tmp_dir, "missing")))
+
+    def test_get_sstate_files(self):
+        self.create_file(os.path.join("sstate-cache", HASH_A[:2], SSTATE_FILE_A))
+        self.create_file(os.path.join("sstate-cache", HASH_A[:2], SSTATE_FILE_A + ".siginfo"))
+        self.create_file(os.path.join("sstate-cache", HASH_B[:2], SSTATE_FILE_B))
+        self.create_file(os.path.join("build", "tmp", "stamps", "core2-64-poky-linux", "zlib", "1.2.8-r0.do_populate_sysroot.%s" % HASH_A))
+        sstate_dir = os.path.join(self.tmp_dir, "sstate-cache")
+        # The .siginfo is published before its archive
+        self.assertEqual(sstate_publish.get_sstate_files(sstate_dir, [self.build_dir]),
+                         [os.path.join(HASH_A[:2], SSTATE_FILE_A + ".siginfo"), os.path.join(HASH_A[:2], SSTATE_FILE_A)])
+        self.assertEqual(len(sstate_publish.get_sstate_files(sstate_dir, [])), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tests of version_layer.py
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : test_version_layer.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Run with 'python3 -m unittest discover scripts/tests'. Needs
+#               libMscBoostPython (scripts/MscBoost, installed by setup.py),
+#               the tests are skipped without it.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+try:
+    import version_layer
+except ImportError:
+    version_layer = None
+
+BSP_MAPPING = {"Baytrail": "C984", "Q7-BT": "C984"}
+
+@unittest.skipIf(version_layer is None, "libMscBoostPython is not installed")
+class ParseVersionLayerLinesTest(unittest.TestCase):
+    def parse(self, lines):
+        return version_layer.parse_version_layer_lines(lines, BSP_MAPPING)
+
+    def test_version_layer(self):
+        snapshot = self.parse([
+            "MSC-LDK v1.2.0-3-gaeccd82-dirty built on Sat Sep 17 00:42:41 UTC 2016 by buildserver@build01\n",
+            "--bsp=Baytrail --variant=64 --layers-lxqt --layers-hwtests --re-create-conf\n",
+            "LAYER meta-openembedded=LC984_20160504_V1_0_0\n",
+            "LAYER msc-ldk-bsp-recipes=v1.2.0-dirty\n",
+        ])
+        self.assertEqual(snapshot["general"]["version_layer"], "True")
+        self.assertEqual(snapshot["general"]["id"], "C984-64-hwtests-lxqt")
+        self.assertEqual(snapshot["general"]["machine"], "buildserver@build01")
+        self.assertIn("timestamp", snapshot["general"])
+        self.assertEqual(snapshot["msc-ldk"]["version"], "v1.2.0-3-gaeccd82")
+        self.assertEqual(snapshot["msc-ldk"]["dirty"], "True")
+        self.assertEqual(snapshot["meta-openembedded.git"]["version"], "LC984_20160504_V1_0_0")
+        self.assertNotIn("dirty", snapshot["meta-openembedded.git"])
+        self.assertEqual(snapshot["C984/msc-ldk-bsp-recipes.git"]["version"], "v1.2.0")
+        self.assertEqual(snapshot["C984/msc-ldk-bsp-recipes.git"]["dirty"], "True")
+
+    def test_bsp_line_after_layer_lines(self):
+        snapshot = self.parse([
+            "LAYER msc-ldk-bsp-recipes=v1.0.0",
+            "--bsp=C984 --variant=32",
+        ])
+        self.assertEqual(snapshot["general"]["id"], "C984-32")
+        self.assertEqual(snapshot["C984/msc-ldk-bsp-recipes.git"]["version"], "v1.0.0")
+
+    def test_local_time_zone_name(self):
+        # strptime() only knows UTC, GMT and the local time zone names, CEST is skipped
+        snapshot = self.parse(["MSC-LDK v1.0.0 built on Sat Sep 17 00:42:41 CEST 2016 by buildserver@build01"])
+        self.assertIn("timestamp", snapshot["general"])
+        self.assertEqual(snapshot["msc-ldk"]["version"], "v1.0.0")
+        self.assertNotIn("dirty", snapshot["msc-ldk"])
+
+    def test_unknown_bsp(self):
+        snapshot = self.parse(["--bsp=0000"])
+        self.assertEqual(snapshot["general"]["id"], "0000")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+# ----------------------------------------------------------------------------------
+#  Title      : Tracing of the setup phases for MSC-LDK scripts
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : trace_events.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: The --trace FILE option of setup.py: timed spans of the setup
+#               phases, the layer repositories and all subprocesses, written as
+#               Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev).
+#               Without --trace, span() and traced() do nothing.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import atexit
+import os
+import sys
+import threading
+import time
+
+TRACE_OPTION = "--trace"
+SUMMARY_TOP_N = 15
+
+def _get_trace_file_name(argv):
+    """Returns FILE of '--trace FILE' or '--trace=FILE' in argv, None without --trace."""
+    for index, arg in enumerate(argv):
+        if arg == TRACE_OPTION and index + 1 < len(argv):
+            return argv[index + 1]
+        if arg.startswith(TRACE_OPTION + "="):
+            return arg[len(TRACE_OPTION + "="):]
+    return None
+
+TRACE_FILE_NAME = _get_trace_file_name(sys.argv[1:])
+ENABLED = TRACE_FILE_NAME is not None
+
+_events = []
+_thread_ids = {}
+_lock = threading.Lock()
+_start_time = time.perf_counter()
+
+def _get_thread_id():
+    """Returns a small number for the current thread (the trace viewer shows a row per thread)."""
+    with _lock:
+        return _thread_ids.setdefault(threading.get_ident(), len(_thread_ids) + 1)
+
+def _add_event(name, category, begin, end, args):
+    event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": _get_thread_id(),
+             "ts": (begin - _start_time) * 1e6, "dur": (end - begin) * 1e6}
+    if args:
+        event["args"] = args
+    with _lock:
+        _events.append(event)
+
+class _Span(object):
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.begin = None
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+    def __exit__(self, type_, value_, traceback_):
+        if type_ is not None:
+            self.args["exception"] = type_.__name__
+        _add_event(self.name, self.category, self.begin, time.perf_counter(), self.args)
+        return False
+
+class _NoSpan(object):
+    def __enter__(self):
+        return self
+    def __exit__(self, type_, value_, traceback_):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name, category="phase", **args):
+    """Returns a context manager that records a span while tracing is enabled."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(name, category, args)
+
+def traced(category="phase", get_name=None):
+    """Decorator recording a span for every call, get_name(*args, **kwargs) returns the span name (default: the function name).
+
+    Without --trace the function is returned unchanged.
+    """
+    def decorator(function):
+        if not ENABLED:
+            return function
+        def traced_function(*args, **kwargs):
+            name = get_name(*args, **kwargs) if get_name else function.__name__
+            with _Span(name, category, {}):
+                return function(*args, **kwargs)
+        traced_function.__name__ = function.__name__
+        traced_function.__doc__ = function.__doc__
+        return traced_function
+    return decorator
+
+def _get_command_string(cmd):
+    if isinstance(cmd, (list, tuple)):
+        return " ".join(str(arg) for arg in cmd)
+    return str(cmd)
+
+def _get_command_name(command_string):
+    """Returns e.g. 'git clone' for 'git clone --reference ... <url>'."""
+    words = command_string.split()
+    words = [os.path.basename(words[0])] + words[1:2] if words else ["?"]
+    if words[0] != "git" or len(words) < 2 or words[1].startswith("-"):
+        words = words[:1]
+    return " ".join(words)
+
+def _patch_subprocess():
+    """Records a span for every subprocess (also the ones started by gitpython and os.popen())."""
+    import subprocess
+
+    class TracedPopen(subprocess.Popen):
+        def __init__(self, args, *popen_args, **popen_kwargs):
+            self._trace_begin = time.perf_counter()
+            self._trace_thread_id = _get_thread_id()
+            self._trace_command = _get_command_string(args)
+            self._trace_cwd = popen_kwargs.get("cwd") or os.getcwd()
+            self._trace_recorded = False
+            super(TracedPopen, self).__init__(args, *popen_args, **popen_kwargs)
+        def _trace_end(self):
+            if self.returncode is None or self._trace_recorded:
+                return
+            self._trace_recorded = True
+            end = time.perf_counter()
+            event = {"name": _get_command_name(self._trace_command), "cat": "subprocess", "ph": "X", "pid": os.getpid(),
+                     "tid": self._trace_thread_id, "ts": (self._trace_begin - _start_time) * 1e6, "dur": (end - self._trace_begin) * 1e6,
+                     "args": {"cmd": self._trace_command, "cwd": str(self._trace_cwd), "returncode": self.returncode}}
+            with _lock:
+                _events.append(event)
+        def poll(self):
+            returncode = super(TracedPopen, self).poll()
+            self._trace_end()
+            return returncode
+        def wait(self, *args, **kwargs):
+            returncode = super(TracedPopen, self).wait(*args, **kwargs)
+            self._trace_end()
+            return returncode
+
+    subprocess.Popen = TracedPopen
+
+    os_system = os.system
+    def traced_system(command):
+        with _Span(_get_command_name(command), "subprocess", {"cmd": command, "cwd": os.getcwd()}):
+            return os_system(command)
+    os.system = traced_system
+
+def _print_summary():
+    """Prints the spans with the longest total duration."""
+    totals = {}
+    for event in _events:
+        key = (event["cat"], event["name"])
+        count, duration = totals.get(key, (0, 0.0))
+        totals[key] = (count + 1, duration + event["dur"] / 1e6)
+    print("Trace summary (top %d by total time, written to %s):" % (SUMMARY_TOP_N, TRACE_FILE_NAME), file=sys.stderr)
+    print("  %10s %6s  %-10s %s" % ("total s", "count", "category", "span"), file=sys.stderr)
+    for (category, name), (count, duration) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:SUMMARY_TOP_N]:
+        print("  %10.2f %6d  %-10s %s" % (duration, count, category, name), file=sys.stderr)
+
+def _write_trace():
+    import json
+    _add_event(os.path.basename(sys.argv[0]), "process", _start_time, time.perf_counter(), {"argv": sys.argv})
+    with _lock:
+        _events.sort(key=lambda event: event["ts"])
+    with open(TRACE_FILE_NAME, "w") as f:
+        json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f)
+    _print_summary()
+
+def start():
+    """Starts tracing when --trace FILE is given, has to be called before subprocesses are started or gitpython is imported."""
+    if not ENABLED:
+        return
+    _patch_subprocess()
+    atexit.register(_write_trace)
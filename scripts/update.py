@@ -1,9 +1,18 @@
 #! /usr/bin/python3
 
+import functools
+import hashlib
+import json
 import os
 import sys
+import time
 
-print("""
+import startup_profile
+startup_profile.start()
+
+# MSC_LDK_IGNORE_MOVED=1 runs the update in spite of the "MSC-LDK has been moved" stop (used by benchmark.py)
+if not os.getenv("MSC_LDK_IGNORE_MOVED"):
+    print("""
 MSC-LDK has been moved. This repository will no longer be updated.
 Please fetch MSC-LDK from the new repository:
 
@@ -12,15 +21,55 @@ Please fetch MSC-LDK from the new repository:
 You can move the directories downloads/ and sstate-cache/ from this directory to the new cloned MSC-LDK to improve build speed.
 """)
 
-sys.exit(1)
+    sys.exit(1)
 
 # Use MscBoost from this libMscBoostPython checkout
 sys.path.insert(0, "{0}/libMscBoostPython.git/src".format(os.path.dirname(__file__)))
 
 from MscBoost.Application import Application
-from MscBoost.Git import GitRepository, MscGitRepository, GitException
 from MscBoost.Logging import Log
-from MscBoost.MscProject import MscProject
+
+import parallel_jobs
+
+# Messages of git and ssh for network problems that may go away on a retry
+TRANSIENT_GIT_ERRORS = [
+    "could not resolve host",
+    "temporary failure in name resolution",
+    "connection timed out",
+    "connection refused",
+    "connection reset",
+    "connection closed",
+    "network is unreachable",
+    "operation timed out",
+    "the remote end hung up unexpectedly",
+    "early eof",
+    "rpc failed",
+    "unexpected disconnect",
+    "ssh: connect to host",
+]
+
+## @param exception The exception raised by a git command
+def is_transient_git_error(exception):
+    """Returns True for git failures caused by the network (worth a retry)."""
+    message = str(exception).lower()
+    return any(transient_error in message for transient_error in TRANSIENT_GIT_ERRORS)
+
+# Layer worktrees of setup.py --layer-worktrees are in sources/worktrees/<git ref>/<repo>.git
+LAYER_WORKTREES_DIR_NAME = "worktrees"
+
+class RepositoryUpdate(object):
+    """State and result of the update of one repository."""
+
+    def __init__(self, path, is_worktree=False):
+        self.path = path
+        self.is_worktree = is_worktree
+        self.old_commit = None
+        self.new_commit = None
+        self.result = None
+        self.failed = False
+        self.remote_url = None
+        self.remote_fingerprint = None
+        self.remote_unchanged = False
 
 class UpdateApplication(Application):
     """Updates MSC-LDK and all it's layers"""
@@ -30,22 +79,238 @@ class UpdateApplication(Application):
             "update.py",
             "Updates MSC-LDK and all it's layers.")
         self.msc_ldk_root = os.path.realpath(os.path.join(os.path.realpath(__file__), "..", ".."))
+        self.arg_parser.add_argument("--jobs", type=int, default=parallel_jobs.DEFAULT_JOBS,
+                                     help="Number of repositories that are fetched in parallel (default: {}).".format(parallel_jobs.DEFAULT_JOBS))
+        self.arg_parser.add_argument("--retries", type=int, default=2,
+                                     help="Number of retries for a fetch that fails because of the network (default: 2).")
+        self.arg_parser.add_argument("--retry-delay", type=float, default=2.0,
+                                     help="Seconds to wait before the first retry, doubled for the second retry etc. (default: 2).")
+        self.arg_parser.add_argument("--only-failed", action="store_true",
+                                     help="Only update the repositories that failed in the last run.")
+        self.arg_parser.add_argument("--force-fetch", action="store_true",
+                                     help="Fetch all repositories, even when the refs of their remote did not change since the last fetch.")
+        self.arg_parser.add_argument(startup_profile.PROFILE_STARTUP_OPTION, action="store_true",
+                                     help="Run with 'python3 -X importtime' and show the modules with the highest import times.")
 
     def _main(self):
         """Updates MSC-LDK and the layers."""
-        # Update MSC-LDK itself
-        self._update_repository_at_path(self.msc_ldk_root)
-
-        # Update all the layers
-        layer_paths = self._get_repositories_paths(
+        # Update MSC-LDK itself and all the layers
+        paths = [self.msc_ldk_root]
+        paths.extend(sorted(self._get_repositories_paths(
             os.path.join(self.msc_ldk_root, "sources"),
-            1)
+            1)))
+        # Layer worktrees share the objects and remote branches of their repository in sources/,
+        # they are fast-forwarded after it was fetched
+        worktrees_dir = os.path.join(self.msc_ldk_root, "sources", LAYER_WORKTREES_DIR_NAME)
+        worktree_paths = []
+        if os.path.isdir(worktrees_dir):
+            worktree_paths = sorted(self._get_repositories_paths(worktrees_dir, 1))
+        paths.extend(worktree_paths)
 
         # scripts is not included. A tagged version of libMscBoostPython is explicitly checked out by setup when needed
 
-        for path in layer_paths:
-            self._update_repository_at_path(path)
-            
+        if self.args.only_failed:
+            failed_paths = self._read_update_state().get("failed", [])
+            paths = [path for path in paths if path in failed_paths]
+            Log().info("Updating the {} repositories that failed in the last run".format(len(paths)))
+
+        updates = [RepositoryUpdate(path, path in worktree_paths) for path in paths]
+        self._check_remote_fingerprints(updates)
+        # MSC-LDK is updated first like before: its .csv files and based_on_yocto.txt decide which branches
+        # setup.py checks out in the layers. Then all layers are fetched in parallel and fast-forwarded one by one.
+        msc_ldk_updates = [update for update in updates if update.path == self.msc_ldk_root]
+        layer_updates = [update for update in updates if update.path != self.msc_ldk_root]
+        for group in (msc_ldk_updates, layer_updates):
+            self._update_repositories(group)
+
+        self._print_summary(updates)
+        self._write_update_state(updates)
+        failed_count = len([update for update in updates if update.failed])
+        if failed_count:
+            Log().error("{} repositories could not be updated, run 'update.py --only-failed' to retry them".format(failed_count))
+            return 1
+        return 0
+
+    ## @param updates List of RepositoryUpdate
+    def _update_repositories(self, updates):
+        """Fetches the repositories in parallel, then fast-forwards them one by one."""
+        fetch_jobs = [(update, functools.partial(self._fetch_repository, update)) for update in updates
+                      if not update.remote_unchanged and not update.is_worktree]
+        for job_result in parallel_jobs.run_jobs(fetch_jobs, self.args.jobs):
+            job_result.log.replay(Log())
+            if not job_result.succeeded():
+                message_lines = str(job_result.exception).strip().splitlines()
+                job_result.name.result = "fetch failed: {}".format(message_lines[-1] if message_lines else type(job_result.exception).__name__)
+                job_result.name.failed = True
+        for update in updates:
+            if not update.failed:
+                try:
+                    self._fast_forward_repository(update)
+                except Exception as e:
+                    # E.g. a layer worktree whose repository in sources/ was removed or pruned
+                    message_lines = str(e).strip().splitlines()
+                    update.result = "failed: {}".format(message_lines[-1] if message_lines else type(e).__name__)
+                    update.failed = True
+                    continue
+                if update.remote_unchanged and update.result == "up to date":
+                    update.result = "up to date (remote unchanged)"
+
+    ## @param updates List of RepositoryUpdate
+    def _check_remote_fingerprints(self, updates):
+        """Marks the repositories whose remote refs did not change since their last fetch.
+
+        Each remote is queried once with 'git ls-remote', also when several repositories use it.
+        """
+        # MscBoost.Git (and gitpython) is only imported when repositories are updated
+        from MscBoost.Git import MscGitRepository
+        remote_jobs = []
+        remote_urls = []
+        for update in updates:
+            try:
+                update.remote_url = MscGitRepository(update.path).git.config("--get", "remote.origin.url")
+            except Exception:
+                continue
+            if update.remote_url not in remote_urls:
+                remote_urls.append(update.remote_url)
+                remote_jobs.append((update.remote_url, functools.partial(self._get_remote_fingerprint, update.path)))
+        remote_fingerprints = {}
+        for job_result in parallel_jobs.run_jobs(remote_jobs, self.args.jobs):
+            job_result.log.replay(Log())
+            if job_result.succeeded():
+                remote_fingerprints[job_result.name] = job_result.value
+            else:
+                Log().out(1, "git ls-remote {} failed: {}".format(job_result.name, job_result.exception))
+        if self.args.force_fetch:
+            cached_fingerprints = {}
+        else:
+            cached_fingerprints = self._read_update_state().get("remote_fingerprints", {})
+        for update in updates:
+            update.remote_fingerprint = remote_fingerprints.get(update.remote_url)
+            if update.remote_fingerprint is not None and cached_fingerprints.get(update.path) == update.remote_fingerprint:
+                update.remote_unchanged = True
+        unchanged_count = len([update for update in updates if update.remote_unchanged])
+        Log().info("{} of {} repositories have unchanged remote refs ({} remotes checked)".format(unchanged_count, len(updates), len(remote_jobs)))
+
+    ## @param path The local path to a git repository using the remote
+    def _get_remote_fingerprint(self, path, log=None):
+        """Returns a fingerprint of all refs of the remote of the repository at path."""
+        if log is None:
+            log = Log()
+        from MscBoost.Git import MscGitRepository
+        repo = MscGitRepository(path)
+        remote_refs = self._run_with_retries("git ls-remote for {}".format(path), lambda: repo.git.ls_remote("origin"), log)
+        return hashlib.sha1(remote_refs.encode("utf-8")).hexdigest()
+
+    ## @param update The RepositoryUpdate of the repository to fetch
+    def _fetch_repository(self, update, log=None):
+        """Fetches a repository, transient failures are retried."""
+        if log is None:
+            log = Log()
+        log.out(0, "Fetching {}".format(update.path))
+        from MscBoost.Git import MscGitRepository
+        repo = MscGitRepository(update.path)
+        update.old_commit = repo.head.commit.hexsha
+        self._run_with_retries("Fetching {}".format(update.path), lambda: repo.git.fetch("--prune"), log)
+
+    ## @param description Description of the git command for the log
+    ## @param function The function running the git command
+    def _run_with_retries(self, description, function, log):
+        """Runs function, network failures are retried, other git errors (e.g. an unknown remote) are raised at once."""
+        for attempt in range(self.args.retries + 1):
+            try:
+                return function()
+            except Exception as e:
+                if attempt == self.args.retries or not is_transient_git_error(e):
+                    raise
+                log.warning("{} failed (attempt {} of {}): {}".format(description, attempt + 1, self.args.retries + 1, str(e).strip()))
+                time.sleep(self.args.retry_delay * (attempt + 1))
+
+    ## @param update The RepositoryUpdate of the fetched repository
+    def _fast_forward_repository(self, update):
+        """Fast-forwards the checked out branch of a fetched repository to its upstream branch.
+
+        This replaces MscGitRepository.update() (a 'git pull'): a branch that diverged
+        from its upstream is reported as failed instead of being merged, so update.py
+        never creates merge commits. Dirty and detached checkouts are skipped.
+        """
+        from MscBoost.Git import MscGitRepository
+        repo = MscGitRepository(update.path)
+        if update.old_commit is None:
+            update.old_commit = repo.head.commit.hexsha
+        if repo.head.is_detached:
+            update.result = "skipped (detached HEAD)"
+        elif repo.is_dirty():
+            update.result = "skipped (dirty)"
+        elif repo.active_branch.tracking_branch() is None:
+            update.result = "skipped (no upstream branch)"
+        else:
+            try:
+                repo.git.merge("--ff-only", "--quiet", "@{u}")
+            except Exception as e:
+                update.result = "failed (no fast-forward possible)"
+                update.failed = True
+                Log().out(1, "{}: {}".format(update.path, str(e).strip()))
+        update.new_commit = repo.head.commit.hexsha
+        if update.result is None:
+            if update.new_commit != update.old_commit:
+                update.result = "updated"
+            else:
+                update.result = "up to date"
+
+    ## @param updates List of RepositoryUpdate
+    def _print_summary(self, updates):
+        """Prints a table with the old and new commit and the result of every repository."""
+        name_width = max([len("Repository")] + [len(self._get_repository_name(update.path)) for update in updates])
+        row_format = "{:<%d}  {:<10}  {:<10}  {}" % name_width
+        Log().info("Update summary:")
+        Log().out(0, row_format.format("Repository", "Old", "New", "Result"))
+        for update in updates:
+            Log().out(0, row_format.format(
+                self._get_repository_name(update.path),
+                (update.old_commit or "-")[:10],
+                (update.new_commit or "-")[:10],
+                update.result))
+
+    ## @param path The local path to the git repository
+    def _get_repository_name(self, path):
+        """Returns the repository path relative to sources/ ("msc-ldk" for MSC-LDK itself)."""
+        if path == self.msc_ldk_root:
+            return "msc-ldk"
+        return os.path.relpath(path, os.path.join(self.msc_ldk_root, "sources"))
+
+    def _get_update_state_file_name(self):
+        """Returns the file that lists the repositories that failed in the last run."""
+        return os.path.join(self.msc_ldk_root, "sources", ".update_state.json")
+
+    def _read_update_state(self):
+        """Returns the state of the last run."""
+        try:
+            with open(self._get_update_state_file_name()) as f:
+                return json.load(f)
+        except (OSError, IOError, ValueError):
+            return {}
+
+    ## @param updates List of RepositoryUpdate
+    def _write_update_state(self, updates):
+        """Stores the failed repositories for 'update.py --only-failed' and the remote fingerprints of the fetched repositories."""
+        update_state = self._read_update_state()
+        failed_paths = [update.path for update in updates if update.failed]
+        if self.args.only_failed:
+            # Repositories that were not retried keep their state
+            retried_paths = [update.path for update in updates]
+            failed_paths.extend(path for path in update_state.get("failed", []) if path not in retried_paths)
+        update_state["failed"] = failed_paths
+        remote_fingerprints = update_state.setdefault("remote_fingerprints", {})
+        for update in updates:
+            if update.failed or update.remote_fingerprint is None:
+                remote_fingerprints.pop(update.path, None)
+            else:
+                remote_fingerprints[update.path] = update.remote_fingerprint
+        if not os.path.isdir(os.path.dirname(self._get_update_state_file_name())):
+            return
+        with open(self._get_update_state_file_name(), "w") as f:
+            json.dump(update_state, f, indent=4, sort_keys=True)
+
     ## @param path From where to start searching
     ## @param levels_remaining If <=0, no further subdirectories will be processed.
     ## @return List of paths which are git repositories
@@ -68,26 +333,19 @@ class UpdateApplication(Application):
 
         return paths
 
-    ## @param path The local path to the git repository
-    def _update_repository_at_path(self, path):
-        """Performs a git update at path."""
-        Log().out(0, "Updating {}".format(path))
-
-        repo = MscGitRepository(path)
-        head_commit = repo.head.commit
-        repo.update()
-        updated_commit = repo.head.commit
-
-        if updated_commit != head_commit:
-            Log().info(" Updated {} -> {}".format(
-                head_commit,
-                updated_commit))
-
     def _get_usage_examples(self):
         """Returns the example help text for --help."""
         return """
   update.py
-     Performs a git pull on MSC-LDK and all it's layers.
+     Fetches and fast-forwards MSC-LDK, then fetches all it's layers in parallel and fast-forwards them.
+     Branches that diverged from their upstream branch are not merged, they are reported as failed.
+     The layer worktrees of 'setup.py --layer-worktrees' are fast-forwarded as well (tags stay as they are).
+  update.py --jobs 16
+     Fetches up to 16 repositories at the same time.
+  update.py --only-failed
+     Retries the repositories that could not be updated in the last run.
+  update.py --force-fetch
+     Fetches all repositories, also when the refs of their remote did not change.
 """
 
     def _print_version(self):
@@ -95,6 +353,7 @@ class UpdateApplication(Application):
         # This is not a full MscProject (missing COPYING etc.),
         # but is sufficient for getting the version
 
+        from MscBoost.MscProject import MscProject
         proj = MscProject(self.msc_ldk_root)
         Log().out(0, "Version: {}".format(str(proj.version)))
 
@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------------
+#  Title      : version_layer files of MSC-LDK builds
+#  Project    : MSC-LDK
+# ----------------------------------------------------------------------------------
+#  File       : version_layer.py
+#  Author     : agent
+#  Company    : MSC Technologies
+#  Created    : 2026-10-18
+# ----------------------------------------------------------------------------------
+#  Description: Converts the version_layer file that is part of every MSC-LDK
+#               image into the snapshot format of setup.py --version-file.
+# ----------------------------------------------------------------------------------
+#  Copyright (c) 2026 -- MSC Technologies
+# ----------------------------------------------------------------------------------
+
+import configparser
+import datetime
+
+import MscBoost.Util as Util
+
+def parse_version_layer_lines(lines, bsp_mapping):
+    """Converts the lines of a version_layer file of an MSC-LDK build into a snapshot (ConfigParser)."""
+    snapshot = configparser.ConfigParser()
+    snapshot["general"] = {}
+    snapshot["general"]["comment"] = "Converted version_layer on %s" % Util.get_timestamp_string()
+    snapshot["general"]["version_layer"] = "True"
+    bsp = "???"
+    layer_versions = []
+    for line in lines:
+        line = line.strip()
+        if " built on " in line:
+            # e.g.: MSC-LDK initial_separated-103-gaeccd82-dirty built on Sat Sep 17 00:42:41 CEST 2016 by buildserver@destsm3ux05bs01.emea.avnet.com
+            version, dummy, time_and_machine = line.partition(" built on ")
+            version = version.split(" ")[1]
+            timestamp_str, dummy, machine = time_and_machine.partition(" by ")
+            try:
+                timestamp = datetime.datetime.strptime(timestamp_str, "%a %b %d %H:%M:%S %Z %Y")
+                snapshot["general"]["timestamp"] = Util.get_timestamp_string(timestamp)
+            except ValueError:
+                # %Z only knows UTC, GMT and the local time zone names (e.g. not CEST on a UTC host)
+                timestamp_elems = timestamp_str.split(" ")
+                try:
+                    timestamp = datetime.datetime.strptime(" ".join(timestamp_elems[:4] + timestamp_elems[5:]), "%a %b %d %H:%M:%S %Y")
+                    snapshot["general"]["timestamp"] = Util.get_timestamp_string(timestamp)
+                except ValueError:
+                    pass
+            snapshot["general"]["machine"] = machine
+            snapshot["msc-ldk"] = {}
+            if version.endswith("-dirty"):
+                snapshot["msc-ldk"]["dirty"] = "True"
+                version = version[:-6]
+            snapshot["msc-ldk"]["version"] = version
+        elif "--bsp" in line:
+            # e.g.: --bsp=0000 --variant=32 --layers-hwtests --re-create-conf
+            options = line.split(" ")
+            variant = ""
+            layers = []
+            for option in options:
+                name, dummy, value = option.partition("=")
+                name = name.strip()
+                value = value.strip()
+                if name == "--bsp":
+                    bsp = bsp_mapping.get(value, value)
+                elif name == "--variant":
+                    variant = value
+                elif name.startswith("--layers-"):
+                    layers.append(name[len("--layers-"):])
+            layers.sort()
+            id_elems = [bsp]
+            if variant:
+                id_elems.append(variant)
+            if layers:
+                id_elems.extend(layers)
+            id_string = "-".join(id_elems)
+            snapshot["general"]["id"] = id_string
+        elif line.startswith("LAYER "):
+            # e.g.: MSC-LDK meta-openembedded=LC984_20160504_V1_0_0
+            layer_versions.append(line[6:].split("="))
+    # The BSP layer name depends on the --bsp line, which may follow the LAYER lines
+    for layer, version in layer_versions:
+        if layer == "msc-ldk-bsp-recipes":
+            layer = "%s/%s" % (bsp, layer)
+        layer += ".git"
+        snapshot[layer] = {}
+        if version.endswith("-dirty"):
+            snapshot[layer]["dirty"] = "True"
+            version = version[:-6]
+        snapshot[layer]["version"] = version
+    return snapshot